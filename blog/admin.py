@@ -1,20 +1,64 @@
 # blog/admin.py
+from django import forms
 from django.contrib import admin
-from .models import Post, Category, Tag, Subscriber, Comment
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import FilteredSelectMultiple
+from django.db import transaction
+from .models import Post, Category, Tag, Subscriber, Comment, NewsletterDispatch
+from .page_cache import purge_tags
+from .pagination import EstimatedCountPaginator
+from .search import get_search_backend
+from .totals import add_comment_counts, comment_deltas
+
+ADMIN_SEARCH_LIMIT = 1000
+
+# ----------------------------------
+# Large tables (posts, comments)
+# ----------------------------------
+class DeferringChangeList(ChangeList):
+    # Changelist rows never show these, so they stay in the database
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.defer(*self.model_admin.list_defer)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Estimated counts, no full-table COUNT(*) and no big columns on the changelist."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_defer = ()
+
+    def get_changelist(self, request, **kwargs):
+        return DeferringChangeList
+
 
 # ----------------------------------
 # Category Admin
 # ----------------------------------
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name_en', 'name_sw', 'slug']
+    list_display = ['name_en', 'name_sw', 'slug', 'published_post_count']
     prepopulated_fields = {'slug': ('name_en',)}
 
 # ----------------------------------
 # Post Admin (Updated with Monetization CTA)
 # ----------------------------------
+class PostAdminForm(forms.ModelForm):
+    # The admin drops m2m fields with an explicit through model; saving this
+    # one calls post.tags.set(), so m2m_changed keeps PostTag/TagStat in step
+    tags = forms.ModelMultipleChoiceField(
+        Tag.objects.all(), required=False, widget=FilteredSelectMultiple("tags", is_stacked=False)
+    )
+
+    class Meta:
+        model = Post
+        fields = "__all__"
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
+    form = PostAdminForm
     list_display = [
         'title_en',
         'title_sw',
@@ -22,6 +66,7 @@ class PostAdmin(admin.ModelAdmin):
         'category',
         'created',
         'views',
+        'comment_count',
         'is_published',
         'is_featured',
         'cta_text',      # CTA button text
@@ -29,14 +74,34 @@ class PostAdmin(admin.ModelAdmin):
         'price',         # Optional price
     ]
     list_filter = ['category', 'created', 'is_published', 'is_featured']
-    search_fields = [
-        'title_en', 'title_sw',
-        'content_en', 'content_sw',
-        'meta_description_en', 'meta_description_sw',
-        'cta_text', 'cta_link'
+    list_select_related = ['author', 'category']
+    list_defer = [
+        'content_en', 'content_sw', 'content_html_en', 'content_html_sw',
+        'meta_description_en', 'meta_description_sw', 'instructions', 'featured_image_placeholder',
     ]
+    date_hierarchy = 'created'
+    # Words go through the full-text index (see get_search_results), not icontains scans
+    search_fields = ['=slug']
+    search_help_text = "Words from the title or body (drafts included), or an exact slug"
+    raw_id_fields = ['author']
     ordering = ['-created']
     prepopulated_fields = {'slug': ('title_en',)}
+    actions = ['queue_newsletter']
+
+    # Sending happens in `manage.py send_newsletter --pending`, never in the request
+    @admin.action(description="Queue newsletter for selected posts")
+    def queue_newsletter(self, request, queryset):
+        queued = NewsletterDispatch.objects.bulk_create(
+            [NewsletterDispatch(post=post) for post in queryset.filter(is_published=True)]
+        )
+        self.message_user(request, f"{len(queued)} newsletter(s) queued")
+
+    def get_search_results(self, request, queryset, search_term):
+        queryset_by_slug, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_term.strip():
+            return queryset_by_slug, may_have_duplicates
+        ids = get_search_backend().search(search_term, limit=ADMIN_SEARCH_LIMIT, published_only=False)
+        return queryset_by_slug | queryset.filter(pk__in=ids), may_have_duplicates
 
 # ----------------------------------
 # Tag Admin
@@ -51,15 +116,61 @@ class TagAdmin(admin.ModelAdmin):
 # ----------------------------------
 @admin.register(Subscriber)
 class SubscriberAdmin(admin.ModelAdmin):
-    list_display = ['email', 'subscribed_at']
+    list_display = ['email', 'language', 'subscribed_at']
+    list_filter = ['language']
     ordering = ['-subscribed_at']
 
+# ----------------------------------
+# Newsletter Dispatch Admin
+# ----------------------------------
+@admin.register(NewsletterDispatch)
+class NewsletterDispatchAdmin(admin.ModelAdmin):
+    list_display = ['post', 'status', 'sent', 'failed', 'last_subscriber_id', 'started', 'finished']
+    list_filter = ['status']
+    list_select_related = ['post']
+    readonly_fields = ['status', 'last_subscriber_id', 'sent', 'failed', 'started', 'finished']
+    raw_id_fields = ['post']
+
 # ----------------------------------
 # Comment Admin
 # ----------------------------------
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('name', 'email', 'post', 'approved', 'created')
     list_filter = ('approved', 'created')
-    search_fields = ('name', 'email', 'content')
+    list_select_related = ('post',)
+    # str(post) is its title; the bodies of the joined posts stay behind
+    list_defer = (
+        'post__content_en', 'post__content_sw', 'post__content_html_en', 'post__content_html_sw',
+        'post__meta_description_en', 'post__meta_description_sw', 'post__instructions',
+        'post__featured_image_placeholder',
+    )
+    date_hierarchy = 'created'
+    # Indexed on UPPER(email)/UPPER(name); content is not searchable here
+    search_fields = ('=email', '=name')
+    search_help_text = "Exact e-mail address or guest name"
+    raw_id_fields = ('post', 'parent', 'user')
+    ordering = ('-created',)
+    actions = ('approve_comments', 'unapprove_comments')
+
+    @admin.action(description="Approve selected comments")
+    def approve_comments(self, request, queryset):
+        self.moderate(request, queryset, approved=True)
+
+    @admin.action(description="Unapprove selected comments")
+    def unapprove_comments(self, request, queryset):
+        self.moderate(request, queryset, approved=False)
+
+    def moderate(self, request, queryset, approved):
+        # One UPDATE for the whole selection; update() sends no signals, so
+        # the counts and pages of the posts involved are seen to here
+        changing = queryset.filter(approved=not approved)
+        sign = 1 if approved else -1
+        with transaction.atomic():
+            deltas = comment_deltas(changing)
+            updated = changing.update(approved=approved)
+            for post_id, (comments, replies) in deltas.items():
+                add_comment_counts(post_id, sign * comments, sign * replies)
+        purge_tags(*(f"post:{pk}" for pk in deltas))
+        self.message_user(request, f"{updated} comment(s) {'approved' if approved else 'unapproved'}")
 
@@ -2,3 +2,11 @@ from django.apps import AppConfig
 
 class BlogConfig(AppConfig):
     name = 'blog'
+
+    def ready(self):
+        from django.core import checks
+
+        from . import signals  # noqa: F401
+        from .assets import check_bundle
+
+        checks.register(check_bundle, checks.Tags.staticfiles)
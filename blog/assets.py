@@ -0,0 +1,349 @@
+import logging
+import posixpath
+import re
+from functools import lru_cache
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:  # optional: icon fonts are then shipped whole
+    font_subset = None
+
+logger = logging.getLogger(__name__)
+
+# ==================================================
+# FRONTEND ASSETS (vendored, bundled, critical CSS)
+# ==================================================
+# `manage.py build_assets` downloads the pinned vendor files into
+# static/vendor/, keeps only the icons the templates use, and writes
+# static/dist/site.css, site.js and critical.css; collectstatic then hashes
+# and precompresses them (manifest storage, see STORAGES in settings).
+# base.html loads nothing but the bundle; `manage.py check` warns while it
+# has not been built (blog.W001).
+STATIC_DIR = Path(settings.BASE_DIR) / "static"
+VENDOR_DIR = "vendor"
+DIST_DIR = "dist"
+
+BUNDLE_CSS = f"{DIST_DIR}/site.css"
+BUNDLE_JS = f"{DIST_DIR}/site.js"
+CRITICAL_CSS = f"{DIST_DIR}/critical.css"
+DIST_FONTS_DIR = f"{DIST_DIR}/fonts"
+
+BOOTSTRAP_VERSION = "5.3.2"
+BOOTSTRAP_ICONS_VERSION = "1.11.3"
+
+# static path: source URL
+VENDOR_FILES = {
+    "vendor/bootstrap/bootstrap.min.css":
+        f"https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/css/bootstrap.min.css",
+    "vendor/bootstrap/bootstrap.bundle.min.js":
+        f"https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/js/bootstrap.bundle.min.js",
+    "vendor/bootstrap-icons/bootstrap-icons.css":
+        f"https://cdn.jsdelivr.net/npm/bootstrap-icons@{BOOTSTRAP_ICONS_VERSION}/font/bootstrap-icons.css",
+    "vendor/bootstrap-icons/fonts/bootstrap-icons.woff2":
+        f"https://cdn.jsdelivr.net/npm/bootstrap-icons@{BOOTSTRAP_ICONS_VERSION}/font/fonts/bootstrap-icons.woff2",
+    "vendor/bootstrap-icons/fonts/bootstrap-icons.woff":
+        f"https://cdn.jsdelivr.net/npm/bootstrap-icons@{BOOTSTRAP_ICONS_VERSION}/font/fonts/bootstrap-icons.woff",
+}
+ICONS_CSS = "vendor/bootstrap-icons/bootstrap-icons.css"
+ICON_FONTS = ["vendor/bootstrap-icons/fonts/bootstrap-icons.woff2", "vendor/bootstrap-icons/fonts/bootstrap-icons.woff"]
+
+# Bundles, in cascade order (later files win)
+CSS_SOURCES = ["vendor/bootstrap/bootstrap.min.css", ICONS_CSS, "css/styles.css"]
+JS_SOURCES = ["vendor/bootstrap/bootstrap.bundle.min.js", "js/scripts.js"]
+
+# The part of base.html visible before any content loads
+CRITICAL_TEMPLATE = "base.html"
+CRITICAL_END_MARKER = "<main"
+
+SOURCE_MAP_RE = re.compile(r"/\*#\s*sourceMappingURL=[^*]*\*/|//#\s*sourceMappingURL=\S*")
+ICON_CLASS_RE = re.compile(r"\bbi-[a-z0-9-]+")
+ICON_RULE_RE = re.compile(r"^\.(bi-[a-z0-9-]+)::?before$")
+FONT_AWESOME_RE = re.compile(r"\bfa-[a-z0-9-]+")
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+# ----- fetching -----
+def fetch_vendor_files(source_dir=None, force=False):
+    """Copy (from ``source_dir``) or download every vendor file missing from static/. Returns the paths written."""
+    written = []
+    for path, url in VENDOR_FILES.items():
+        target = STATIC_DIR / path
+        if target.exists() and not force:
+            continue
+        if source_dir:
+            data = (Path(source_dir) / posixpath.basename(path)).read_bytes()
+        else:
+            with urlopen(url, timeout=30) as response:
+                data = response.read()
+        if path.endswith((".css", ".js")):
+            # Source maps are not vendored; a dangling reference breaks collectstatic
+            data = SOURCE_MAP_RE.sub("", data.decode("utf-8")).encode("utf-8")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        written.append(path)
+    return written
+
+
+# ----- used icons -----
+def project_files(suffixes):
+    """Templates, scripts and Python of the project's own apps (not Django's)."""
+    roots = [Path(directory) for config in settings.TEMPLATES for directory in config.get("DIRS", [])]
+    roots += [
+        Path(config.path) for config in apps.get_app_configs()
+        if Path(config.path).resolve().is_relative_to(Path(settings.BASE_DIR).resolve())
+    ]
+    for root in roots:
+        for path in root.rglob("*"):
+            if path.suffix in suffixes and VENDOR_DIR not in path.parts and DIST_DIR not in path.parts:
+                yield path
+
+
+def used_icons(extra=()):
+    used = set(extra)
+    for path in project_files({".html", ".js", ".py", ".txt"}):
+        used.update(ICON_CLASS_RE.findall(path.read_text(encoding="utf-8", errors="ignore")))
+    return used
+
+
+def font_awesome_classes():
+    """Font Awesome is no longer bundled; any fa-* class left in a template is reported."""
+    found = set()
+    for path in project_files({".html", ".js"}):
+        found.update(FONT_AWESOME_RE.findall(path.read_text(encoding="utf-8", errors="ignore")))
+    return found
+
+
+# ----- CSS handling -----
+def split_rules(css):
+    """Top-level (prelude, body) pairs; nested @media bodies are left as text."""
+    rules, depth, start, prelude = [], 0, 0, ""
+    for index, char in enumerate(css):
+        if char == "{":
+            if depth == 0:
+                prelude, start = css[start:index].strip(), index + 1
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:index]))
+                start = index + 1
+    return rules
+
+
+def join_rules(rules):
+    return "".join(f"{prelude}{{{body}}}" for prelude, body in rules)
+
+
+def strip_unused_icons(css, used):
+    kept = []
+    for prelude, body in split_rules(css):
+        match = ICON_RULE_RE.match(prelude)
+        if match is None or match.group(1) in used:
+            kept.append((prelude, body))
+    return join_rules(kept)
+
+
+def icon_codepoints(css):
+    """{icon class: codepoint} from the ``.bi-name::before { content: "\\f101" }`` rules."""
+    codepoints = {}
+    for prelude, body in split_rules(css):
+        match = ICON_RULE_RE.match(prelude)
+        content = re.search(r'content:\s*"\\([0-9a-f]+)"', body)
+        if match and content:
+            codepoints[match.group(1)] = int(content.group(1), 16)
+    return codepoints
+
+
+def write_icon_fonts(codepoints):
+    """
+    Copy the icon fonts next to the bundle, cut down to the used glyphs when
+    fontTools is installed (woff2 also needs brotli). The vendored originals
+    stay whole so a later build can bring icons back.
+    """
+    written = []
+    for path in ICON_FONTS:
+        source = STATIC_DIR / path
+        if not source.exists():
+            continue
+        target = STATIC_DIR / DIST_FONTS_DIR / source.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(source.read_bytes())
+        if font_subset is not None and codepoints:
+            options = font_subset.Options()
+            options.flavor = target.suffix.lstrip(".")
+            options.layout_features = ["*"]
+            try:
+                font = font_subset.load_font(str(source), options)
+                subsetter = font_subset.Subsetter(options)
+                subsetter.populate(unicodes=codepoints)
+                subsetter.subset(font)
+                font_subset.save_font(font, str(target), options)
+            except Exception:
+                # The full copy stays in place, so the icons still render
+                logger.warning("Could not subset %s; shipping the whole font", path, exc_info=True)
+        written.append(target.name)
+    return written
+
+
+def rebase_urls(css, source_path, target_path):
+    """Rewrite relative url()s of ``source_path`` so they still resolve from ``target_path``."""
+    source_dir, target_dir = posixpath.dirname(source_path), posixpath.dirname(target_path)
+
+    def rebase(match):
+        quote, url = match.groups()
+        if re.match(r"^([a-z]+:|/|#)", url):
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(source_dir, url))
+        return f"url({quote}{posixpath.relpath(resolved, target_dir or '.')}{quote})"
+
+    return CSS_URL_RE.sub(rebase, css)
+
+
+def minify_css(css):
+    css = re.sub(r"/\*(?!!).*?\*/", "", css, flags=re.S)  # keeps /*! licences */
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_js(js):
+    # Deliberately conservative (no parser): drop comment-only lines and indentation
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+# ----- critical CSS -----
+def critical_tokens(html):
+    """Classes, ids and element names used above the fold of ``html``."""
+    head = html.split(CRITICAL_END_MARKER, 1)[0]
+    head = re.sub(r"{%.*?%}|{{.*?}}", " ", head)
+    tokens = {f".{name}" for value in re.findall(r'class="([^"]*)"', head) for name in value.split()}
+    tokens |= {f"#{value}" for value in re.findall(r'id="([^"]*)"', head)}
+    tokens |= {tag.lower() for tag in re.findall(r"<([a-zA-Z][a-zA-Z0-9]*)", head)}
+    return tokens
+
+
+def selector_matches(selector, tokens):
+    selector = re.sub(r"::?[a-z-]+(\([^)]*\))?", "", selector)  # pseudo classes/elements
+    selector = re.sub(r"\[[^\]]*\]", "", selector)  # attribute selectors
+    parts = re.findall(r"[.#]?[a-zA-Z][\w-]*|\*", selector)
+    return all(part in tokens or part == "*" or part in ("html", "body", "root") for part in parts)
+
+
+def critical_css(css, tokens):
+    kept = []
+    for prelude, body in split_rules(css):
+        if prelude.startswith("@media"):
+            inner = critical_css(body, tokens)
+            if inner:
+                kept.append((prelude, inner))
+        elif prelude.startswith("@"):
+            continue  # @font-face, @keyframes, @supports: not needed for first paint
+        elif re.search(r"url\((?!['\"]?data:)", body):
+            continue  # relative URLs would break once inlined
+        elif any(selector_matches(selector, tokens) for selector in prelude.split(",")) or prelude == ":root":
+            kept.append((prelude, body))
+    return join_rules(kept)
+
+
+# ----- build -----
+def read_static(path):
+    target = STATIC_DIR / path
+    if target.exists():
+        return target.read_text(encoding="utf-8")
+    found = finders.find(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    return Path(found).read_text(encoding="utf-8")
+
+
+def write_static(path, text):
+    target = STATIC_DIR / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text, encoding="utf-8")
+    return target.stat().st_size
+
+
+def build_bundles(keep_icons=()):
+    """Write the CSS/JS bundles, icon fonts and critical CSS; returns what was built."""
+    used = used_icons(keep_icons)
+    icons_css = read_static(ICONS_CSS)
+    codepoints = {name: code for name, code in icon_codepoints(icons_css).items() if name in used}
+    write_icon_fonts(list(codepoints.values()))
+
+    css_parts = []
+    for path in CSS_SOURCES:
+        if path == ICONS_CSS:
+            # Its fonts now live in dist/fonts/, as if the file sat in dist/
+            css_parts.append(rebase_urls(strip_unused_icons(icons_css, used), f"{DIST_DIR}/icons.css", BUNDLE_CSS))
+        else:
+            css_parts.append(rebase_urls(read_static(path), path, BUNDLE_CSS))
+    css = minify_css("\n".join(css_parts))
+
+    js_parts = []
+    for path in JS_SOURCES:
+        js = read_static(path)
+        js_parts.append(js if path.endswith(".min.js") else minify_js(js))
+    js = ";\n".join(js_parts)
+
+    template = Path(apps.get_app_config("blog").path) / "templates" / CRITICAL_TEMPLATE
+    critical = critical_css(css, critical_tokens(template.read_text(encoding="utf-8")))
+
+    built = {
+        BUNDLE_CSS: write_static(BUNDLE_CSS, css),
+        BUNDLE_JS: write_static(BUNDLE_JS, js),
+        CRITICAL_CSS: write_static(CRITICAL_CSS, critical),
+    }
+    bundle_available.cache_clear()
+    inline_text.cache_clear()
+    return {"icons": sorted(codepoints), "sizes": built}
+
+
+# ----- template side -----
+@lru_cache(maxsize=None)
+def bundle_available():
+    """True once build_assets (and, outside DEBUG, collectstatic) has produced the bundle."""
+    for path in (BUNDLE_CSS, BUNDLE_JS, CRITICAL_CSS):
+        if not (finders.find(path) or staticfiles_storage.exists(path)):
+            return False
+        try:
+            # Manifest storage raises for files collectstatic has not hashed yet
+            staticfiles_storage.url(path)
+        except ValueError:
+            return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def inline_text(path):
+    """Contents of the static file ``path``; empty until it is built (blog.W001 says so)."""
+    found = finders.find(path)
+    if found:
+        return Path(found).read_text(encoding="utf-8")
+    if not staticfiles_storage.exists(path):
+        return ""
+    with staticfiles_storage.open(path) as fh:
+        return fh.read().decode("utf-8")
+
+
+def check_bundle(app_configs=None, **kwargs):
+    if bundle_available():
+        return []
+    return [checks.Warning(
+        "The CSS/JS bundle has not been built, so pages load without styles or scripts.",
+        hint="Run `manage.py build_assets` (and collectstatic outside DEBUG).",
+        id="blog.W001",
+    )]
@@ -0,0 +1,224 @@
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+
+from .models import Comment, Post, Category, Tag
+from .tags import sync_post_tags
+
+
+# ==================================================
+# SYNTHETIC DATA + TIMING HELPERS (benchmark commands)
+# ==================================================
+WORDS_EN = (
+    "python django web development tutorial money online business marketing "
+    "code server database query cache performance design mobile payment "
+    "learn guide tips fast secure cloud deploy api data science course book"
+).split()
+
+WORDS_SW = (
+    "habari dunia mafunzo pesa mtandao biashara programu kompyuta simu malipo "
+    "jifunze mwongozo haraka salama wingu data kitabu kozi huduma bidhaa "
+    "maendeleo teknolojia elimu kazi soko"
+).split()
+
+# A long tail of rarer made-up words so queries are selective, like real ones
+SYLLABLES = "ka ma ta la na pa sa wa ri ko mu zi be do".split()
+RARE_WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+
+def fake_text(rng, words, count):
+    return " ".join(
+        rng.choice(words) if rng.random() < 0.8 else rng.choice(RARE_WORDS)
+        for _ in range(count)
+    )
+
+
+def fake_paragraphs(rng, words, paragraphs, words_per_paragraph=60):
+    return "\n\n".join(fake_text(rng, words, words_per_paragraph) for _ in range(paragraphs))
+
+
+def bench_category(slug="bench"):
+    category, _created = Category.objects.get_or_create(
+        slug=slug, defaults={"name_en": "Benchmark", "name_sw": "Kipimo"}
+    )
+    return category
+
+
+def seed_posts(count, category=None, batch_size=1000, paragraphs=3, seed=0, prefix="bench", categories=None):
+    """bulk_create ``count`` bilingual posts (signals do not fire; rebuild indexes after)."""
+    rng = random.Random(seed)
+    category = category or bench_category()
+    batch = []
+    for i in range(count):
+        if categories:
+            category = rng.choice(categories)
+        post = Post(
+            title_en=fake_text(rng, WORDS_EN, 6).capitalize(),
+            title_sw=fake_text(rng, WORDS_SW, 6).capitalize(),
+            slug=f"{prefix}-{seed}-{i}",
+            content_en=fake_paragraphs(rng, WORDS_EN, paragraphs),
+            content_sw=fake_paragraphs(rng, WORDS_SW, paragraphs),
+            category=category,
+            views=rng.randint(0, 10000),
+        )
+        post.render_content()  # bulk_create does not call save()
+        batch.append(post)
+        if len(batch) == batch_size:
+            Post.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Post.objects.bulk_create(batch)
+    return category
+
+
+def seed_categories(count, prefix="bench"):
+    Category.objects.bulk_create(
+        [Category(name_en=f"Benchmark {i}", name_sw=f"Kipimo {i}", slug=f"{prefix}-cat-{i}") for i in range(count)],
+        ignore_conflicts=True,
+    )
+    return list(Category.objects.filter(slug__startswith=f"{prefix}-cat-"))
+
+
+def seed_tags(count, prefix="bench"):
+    Tag.objects.bulk_create(
+        [Tag(name=f"{RARE_WORDS[i % len(RARE_WORDS)]} {i}", slug=f"{prefix}-tag-{i}") for i in range(count)],
+        ignore_conflicts=True,
+    )
+    return list(Tag.objects.filter(slug__startswith=f"{prefix}-tag-").values_list("pk", flat=True))
+
+
+def seed_post_tags(post_ids, tag_ids, per_post=(1, 4), batch_size=5000, seed=0):
+    """Attach a few random tags to every post through the m2m table."""
+    rng = random.Random(seed)
+    through = Post.tags.through
+    batch = []
+    for post_id in post_ids:
+        for tag_id in rng.sample(tag_ids, min(len(tag_ids), rng.randint(*per_post))):
+            batch.append(through(post_id=post_id, tag_id=tag_id))
+        if len(batch) >= batch_size:
+            through.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        through.objects.bulk_create(batch, ignore_conflicts=True)
+    if post_ids:
+        # The rows were written with the field defaults, not their posts' values
+        sync_post_tags(through.objects.filter(post_id__gte=min(post_ids), post_id__lte=max(post_ids)))
+
+
+def seed_comments(post_ids, count, reply_ratio=0.4, batch_size=5000, seed=0):
+    """
+    bulk_create ``count`` comments over ``post_ids``: top-level ones first,
+    then replies to them. Posts near the front of the list get most of the
+    traffic (a cubic skew), so there are a few very long threads as in life.
+    """
+    rng = random.Random(seed)
+
+    def pick(items):
+        return items[int(len(items) * rng.random() ** 3)]
+
+    def create(objs):
+        return [(comment.pk, comment.post_id) for comment in Comment.objects.bulk_create(objs)]
+
+    top_level_count = count - int(count * reply_ratio)
+    top_level, batch = [], []
+    for i in range(count):
+        if i < top_level_count:
+            post_id, parent_id = pick(post_ids), None
+        else:
+            parent_id, post_id = pick(top_level)
+        batch.append(Comment(
+            post_id=post_id,
+            parent_id=parent_id,
+            name=f"Reader {rng.randint(1, 5000)}",
+            content=fake_text(rng, WORDS_EN if rng.random() < 0.5 else WORDS_SW, rng.randint(5, 40)),
+            likes=rng.randint(0, 20),
+        ))
+        if len(batch) == batch_size or i + 1 == top_level_count:
+            created = create(batch)
+            if parent_id is None:
+                top_level.extend(created)
+            batch = []
+    if batch:
+        create(batch)
+
+
+@contextmanager
+def rolled_back():
+    """Run a benchmark against the real database and throw its data away afterwards."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def time_call(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def fetched_bytes(queryset):
+    """Size of the column values the database sends back for ``queryset``."""
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return sum(len(str(value).encode()) for row in cursor.fetchall() for value in row if value is not None)
+
+
+def peak_memory(fn):
+    """Peak bytes allocated while ``fn`` runs."""
+    tracemalloc.start()
+    try:
+        fn()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+# ----- budgets / baselines (benchmark_views) -----
+def check_budgets(results, budgets):
+    """``budgets`` maps a scenario name (or "*") to limits such as {"p95_ms": 200, "queries": 6}."""
+    failures = []
+    for name, result in results.items():
+        for metric, limit in {**budgets.get("*", {}), **budgets.get(name, {})}.items():
+            if result.get(metric) is not None and result[metric] > limit:
+                failures.append(f"{name}: {metric} {result[metric]} > budget {limit}")
+    return failures
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25, min_delta_ms=5.0):
+    """
+    Timings and memory may drift by ``tolerance`` (and timings by at least
+    ``min_delta_ms``, so sub-millisecond views are not flaky); query counts
+    may not grow at all.
+    """
+    failures = []
+    for name, before in baseline.items():
+        after = results.get(name)
+        if after is None:
+            continue
+        if None not in (before.get("queries"), after.get("queries")) and after["queries"] > before["queries"]:
+            failures.append(f"{name}: queries {before['queries']} -> {after['queries']}")
+        for metric in ("p95_ms", "peak_kb"):
+            if not (before.get(metric) and after.get(metric)):
+                continue
+            limit = before[metric] * (1 + tolerance)
+            if metric == "p95_ms":
+                limit = max(limit, before[metric] + min_delta_ms)
+            if after[metric] > limit:
+                failures.append(f"{name}: {metric} {before[metric]} -> {after[metric]} (>{tolerance:.0%} worse)")
+    return failures
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+
+from .models import Comment
+
+
+# ==================================================
+# COMMENT THREADS (one query per post)
+# ==================================================
+THREADS_PER_PAGE = getattr(settings, "BLOG_COMMENT_THREADS_PER_PAGE", 20)
+
+
+def load_comment_threads(post):
+    """
+    Fetch every approved comment of ``post`` with its user in a single query
+    and return the top-level ones, newest first, each carrying its replies
+    (oldest first) in ``thread_replies``.
+    """
+    comments = list(
+        Comment.objects.filter(post=post, approved=True)
+        .select_related("user")
+        .order_by("created", "pk")
+    )
+    by_id = {comment.pk: comment for comment in comments}
+    threads = []
+    for comment in comments:
+        comment.thread_replies = []
+    for comment in comments:
+        if comment.parent_id is None:
+            threads.append(comment)
+        elif comment.parent_id in by_id:
+            by_id[comment.parent_id].thread_replies.append(comment)
+    threads.reverse()
+    return threads
+
+
+def paginate_threads(threads, page_number):
+    return Paginator(threads, THREADS_PER_PAGE).get_page(page_number)
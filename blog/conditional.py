@@ -0,0 +1,67 @@
+import hashlib
+from collections import namedtuple
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+
+from .page_cache import has_pending_messages, tag_versions
+
+
+# ==================================================
+# CONDITIONAL GET (ETag / Last-Modified / 304)
+# ==================================================
+# A view's validator function computes (cheaply, before the view runs) what
+# its page depends on. When the client already has that version it gets a
+# bodyless 304 and the view, its queries and template rendering are skipped.
+PageValidators = namedtuple("PageValidators", ["parts", "last_modified", "obj"], defaults=[None, None])
+
+
+def make_etag(request, parts):
+    # Language, viewer and URL change the HTML even when the data does not
+    user = request.user.pk if request.user.is_authenticated else "anon"
+    raw = "|".join(str(part) for part in (get_language(), user, request.get_full_path(), *parts))
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def tag_parts(*tags):
+    """ETag parts from page-cache tag versions: changes whenever those tags are purged."""
+    versions = tag_versions(tags)
+    return [f"{tag}={versions[tag]}" for tag in sorted(versions)]
+
+
+def conditional_page(validators, on_not_modified=None):
+    """
+    ``validators(request, *args, **kwargs)`` returns PageValidators, or None
+    to skip conditional handling (e.g. so the view can 404).
+    ``on_not_modified(request, validated, *args, **kwargs)`` runs on a 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or has_pending_messages(request):
+                return view(request, *args, **kwargs)
+
+            validated = validators(request, *args, **kwargs)
+            if validated is None:
+                return view(request, *args, **kwargs)
+
+            etag = make_etag(request, validated.parts)
+            last_modified = int(validated.last_modified.timestamp()) if validated.last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                if response.status_code == 304 and on_not_modified is not None:
+                    on_not_modified(request, validated, *args, **kwargs)
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.headers.setdefault("ETag", etag)
+                if last_modified is not None:
+                    response.headers.setdefault("Last-Modified", http_date(last_modified))
+                # Browsers keep the page but revalidate it; shared caches must not store it
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
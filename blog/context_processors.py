@@ -1,7 +1,33 @@
-from .models import Category
+import logging
 
-def categories_processor(request):
+from django.utils.functional import SimpleLazyObject
+
+from .sidebar import get_sidebar_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def sidebar_processor(request):
     """
-    Returns all categories to templates (e.g., sidebar).
+    Sidebar/footer data (categories, popular posts, tag cloud) for every template.
+    Nothing is loaded unless a template actually reads it, and then only
+    once per request, however many includes use it.
     """
-    return {'categories': Category.objects.all()}
+    def snapshot():
+        if not hasattr(request, "_blog_sidebar"):
+            request._blog_sidebar = get_sidebar_snapshot(getattr(request, "LANGUAGE_CODE", "en"))
+        return request._blog_sidebar
+
+    def lazy(name):
+        def load():
+            # Instrumentation: which pages really pay for shared context
+            request.blog_context_evaluated = getattr(request, "blog_context_evaluated", set()) | {name}
+            logger.debug("%s evaluated %s", request.path, name)
+            return snapshot()[name]
+        return SimpleLazyObject(load)
+
+    return {
+        "categories": lazy("categories"),
+        "popular_posts": lazy("popular_posts"),
+        "tag_cloud": lazy("tag_cloud"),
+    }
@@ -0,0 +1,231 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import F
+
+from .models import Comment, Post
+from .trending import record_views
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# BUFFERS (where pending increments live until flushed)
+# ==================================================
+class MemoryBuffer:
+    """Per-process buffer: fastest, flushed by the process that owns it."""
+
+    def __init__(self, label):
+        self.label = label
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, pk, n):
+        with self._lock:
+            self._counts[pk] += n
+
+    def pending(self, pk):
+        with self._lock:
+            return self._counts.get(pk, 0)
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = dict(self._counts), defaultdict(int)
+        return counts
+
+    def restore(self, counts):
+        for pk, n in counts.items():
+            self.add(pk, n)
+
+
+class CacheBuffer:
+    """Shared buffer in the cache backend: any process can flush it."""
+
+    def __init__(self, label, model):
+        self.label = label
+        self.model = model
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def key(self, pk):
+        return f"blog:counter:{self.label}:{pk}"
+
+    def add(self, pk, n):
+        key = self.key(pk)
+        while not cache.add(key, n, timeout=None):
+            try:
+                cache.incr(key, n)
+                break
+            except ValueError:
+                # Evicted or drained away between add() and incr(): start it again
+                continue
+        with self._lock:
+            self._dirty.add(pk)
+
+    def pending(self, pk):
+        return cache.get(self.key(pk), 0)
+
+    def drain(self, pks=None):
+        if pks is None:
+            with self._lock:
+                pks, self._dirty = self._dirty, set()
+        counts = {}
+        keys = {self.key(pk): pk for pk in pks}
+        for key, n in cache.get_many(list(keys)).items():
+            if n:
+                # decr (not delete) so hits landing between get and decr survive
+                try:
+                    cache.decr(key, n)
+                except ValueError:
+                    # Evicted since get_many(); the n read here is still flushed
+                    pass
+                counts[keys[key]] = n
+        return counts
+
+    def drain_all(self, chunk_size=1000):
+        # Used by the management command, which cannot see other processes' dirty sets
+        counts = {}
+        pks = self.model.objects.values_list("pk", flat=True).order_by("pk")
+        batch = []
+        for pk in pks.iterator(chunk_size=chunk_size):
+            batch.append(pk)
+            if len(batch) == chunk_size:
+                counts.update(self.drain(batch))
+                batch = []
+        if batch:
+            counts.update(self.drain(batch))
+        return counts
+
+    def restore(self, counts):
+        for pk, n in counts.items():
+            self.add(pk, n)
+
+
+# ==================================================
+# BUFFERED COUNTER (write-behind F() + n updates)
+# ==================================================
+class BufferedCounter:
+    """
+    Accumulates increments of ``model.field`` and writes them back as one
+    ``UPDATE ... SET field = field + n`` per distinct n, either from a
+    background flusher thread every ``flush_interval`` seconds or on demand.
+    A flush interval of 0 writes every hit straight through. ``on_flush``
+    receives each written ``{pk: n}`` batch (e.g. for trending buckets).
+    """
+
+    def __init__(self, model, field, backend=None, flush_interval=None, on_flush=None):
+        self.model = model
+        self.field = field
+        self.on_flush = on_flush
+        self.label = f"{model._meta.label_lower}.{field}"
+        backend = backend or getattr(settings, "BLOG_COUNTER_BACKEND", "memory")
+        if backend == "cache":
+            self.buffer = CacheBuffer(self.label, model)
+        else:
+            self.buffer = MemoryBuffer(self.label)
+        if flush_interval is None:
+            flush_interval = getattr(settings, "BLOG_COUNTER_FLUSH_INTERVAL", 10)
+        self.flush_interval = flush_interval
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopped = threading.Event()
+        _registry.append(self)
+
+    def hit(self, pk, n=1):
+        self.buffer.add(pk, n)
+        if not self.flush_interval:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def pending(self, pk):
+        return self.buffer.pending(pk)
+
+    def flush(self, counts=None):
+        if counts is None:
+            counts = self.buffer.drain()
+        if not counts:
+            return 0
+
+        by_increment = defaultdict(list)
+        for pk, n in counts.items():
+            by_increment[n].append(pk)
+
+        try:
+            # All or nothing, so putting every count back cannot apply one twice
+            with transaction.atomic():
+                for n, pks in by_increment.items():
+                    self.model.objects.filter(pk__in=pks).update(**{self.field: F(self.field) + n})
+        except Exception:
+            # Put everything back; the next flush retries
+            self.buffer.restore(counts)
+            raise
+        if self.on_flush is not None:
+            try:
+                self.on_flush(counts)
+            except Exception:
+                # The counts are already in the table; never re-buffer them
+                logger.exception("on_flush hook of %s failed", self.label)
+        return sum(counts.values())
+
+    def flush_all(self):
+        if isinstance(self.buffer, CacheBuffer):
+            return self.flush(self.buffer.drain_all())
+        return self.flush()
+
+    # ----- background flusher -----
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"flush-{self.label}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing %s failed; its counts stay buffered", self.label)
+            finally:
+                connections.close_all()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+
+_registry = []
+
+
+def all_counters():
+    return list(_registry)
+
+
+@atexit.register
+def stop_all():
+    """
+    Stop every flusher and write what is left. Runs at graceful shutdown
+    (gunicorn worker exit, SIGTERM -> sys.exit); the test runner calls it
+    before dropping the test databases.
+    """
+    for counter in _registry:
+        try:
+            counter.stop()
+        except Exception:
+            logger.exception("Final flush of %s failed", counter.label)
+
+
+post_views = BufferedCounter(Post, "views", on_flush=record_views)
+# Likes of many visitors on one comment coalesce into one UPDATE per flush
+comment_likes = BufferedCounter(Comment, "likes")
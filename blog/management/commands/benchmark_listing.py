@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from blog.benchmarking import fetched_bytes, peak_memory, rolled_back, seed_posts
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Compare full Post rows with the per-language listing projection (DB bytes and memory per page)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=200)
+        parser.add_argument("--paragraphs", type=int, default=40, help="Per language; 40 is about 16 KB")
+        parser.add_argument("--per-page", type=int, default=5)
+        parser.add_argument("--lang", default="sw")
+
+    def handle(self, *args, **options):
+        per_page, lang = options["per_page"], options["lang"]
+        with rolled_back():
+            category = seed_posts(options["posts"], paragraphs=options["paragraphs"])
+            published = Post.objects.filter(is_published=True)
+            listing = Post.objects.for_language(lang).listing().filter(is_published=True)
+            ids = list(published.order_by("?").values_list("pk", flat=True)[:per_page])
+
+            # (page, queryset the view used before, queryset it uses now)
+            pages = [
+                (
+                    "post_list",
+                    published.select_related("category", "author").order_by("-created"),
+                    listing.order_by("-created"),
+                ),
+                (
+                    "category_posts",
+                    category.posts.filter(is_published=True).order_by("-created"),
+                    listing.filter(category=category).order_by("-created"),
+                ),
+                ("search", Post.objects.filter(pk__in=ids), Post.objects.for_language(lang).listing().filter(pk__in=ids)),
+                (
+                    "sidebar",
+                    published.order_by("-views"),
+                    published.for_language(lang).only("slug", "views").order_by("-views"),
+                ),
+            ]
+            for name, before, after in pages:
+                before, after = before[:per_page], after[:per_page]
+                rows = [("full rows", before), ("listing", after)]
+                sizes = {}
+                for label, queryset in rows:
+                    sizes[label] = fetched_bytes(queryset)
+                    peak = peak_memory(lambda: list(queryset.all()))
+                    self.stdout.write(
+                        f"{name:<15} {label:<10} db={sizes[label] / 1024:9.1f} KB  peak={peak / 1024:9.1f} KB"
+                    )
+                ratio = sizes["full rows"] / sizes["listing"] if sizes["listing"] else 0
+                self.stdout.write(self.style.SUCCESS(f"{name:<15} {ratio:.0f}x fewer bytes from the database"))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+
+from blog.benchmarking import percentile, rolled_back, seed_posts, time_call
+from blog.models import Post
+from blog.pagination import NEXT, CursorPaginator
+
+
+class Command(BaseCommand):
+    help = "Compare OFFSET/COUNT pagination with cursor pagination at shallow and deep pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 2000])
+        parser.add_argument("--per-page", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        per_page = options["per_page"]
+        with rolled_back():
+            seed_posts(options["posts"], paragraphs=1)
+            posts = Post.objects.filter(is_published=True)
+
+            for number in options["pages"]:
+                def offset_page():
+                    page = Paginator(posts.order_by("-created", "-pk"), per_page).get_page(number)
+                    list(page)
+
+                cursors = CursorPaginator(posts, per_page)
+                cursor = None
+                if number > 1:
+                    # The cursor a reader would hold after clicking "Next" number - 1 times
+                    boundary = posts.order_by("-created", "-pk")[(number - 1) * per_page - 1]
+                    cursor = cursors.encode_cursor(boundary, NEXT)
+
+                def cursor_page():
+                    list(cursors.get_page(cursor=cursor))
+
+                for name, fn in (("offset", offset_page), ("cursor", cursor_page)):
+                    samples = time_call(fn, options["repeat"])
+                    self.stdout.write(
+                        f"{options['posts']:>8} posts  page {number:>6}  {name:<6} "
+                        f"p50={percentile(samples, 50):8.2f}ms  max={max(samples):8.2f}ms"
+                    )
@@ -0,0 +1,48 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+
+from blog.benchmarking import WORDS_EN, fake_paragraphs, percentile, time_call
+from blog.models import Post
+
+# The post_detail.html body before and after the columns were added
+PER_REQUEST = "{{ post.content_en|linebreaks }}"
+PRE_RENDERED = "{{ post.content_html_en|safe }}"
+
+
+class Command(BaseCommand):
+    help = "Compare per-request |linebreaks with the pre-rendered body column on large posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-kb", type=int, nargs="+", default=[5, 50])
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        engine = engines["django"]
+        per_request, pre_rendered = engine.from_string(PER_REQUEST), engine.from_string(PRE_RENDERED)
+        rng = random.Random(0)
+
+        for size_kb in options["size_kb"]:
+            content = ""
+            while len(content) < size_kb * 1024:
+                content += fake_paragraphs(rng, WORDS_EN, 10) + "\n\n"
+            post = Post(title_en="Benchmark", content_en=content)
+            post.render_content()
+            context = {"post": post}
+            # Same bytes either way, or the comparison means nothing
+            if per_request.render(context) != pre_rendered.render(context):
+                raise CommandError(f"{size_kb} KB: the pre-rendered column differs from |linebreaks")
+
+            rows = [
+                ("linebreaks", time_call(lambda: per_request.render(context), options["repeat"])),
+                ("column", time_call(lambda: pre_rendered.render(context), options["repeat"])),
+                ("on save", time_call(post.render_content, options["repeat"])),
+            ]
+            for name, samples in rows:
+                self.stdout.write(
+                    f"{size_kb:>5} KB  {name:<10}  p50={percentile(samples, 50):8.3f}ms  "
+                    f"p95={percentile(samples, 95):8.3f}ms"
+                )
+            saved = percentile(rows[0][1], 50) - percentile(rows[1][1], 50)
+            self.stdout.write(self.style.SUCCESS(f"{size_kb:>5} KB  saved per view: {saved:.3f}ms (p50)"))
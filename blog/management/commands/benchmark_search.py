@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from blog.benchmarking import percentile, rolled_back, seed_posts, time_call
+from blog.search import ContainsSearchBackend, get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Compare the full-text search backend with the icontains scan on synthetic posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, nargs="+", default=[10000, 100000])
+        parser.add_argument("--queries", nargs="+", default=["django", "kamata", "pesa rikozi", "performance"])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        indexed, scan = get_search_backend(), ContainsSearchBackend()
+        self.stdout.write(f"backend: {type(indexed).__name__}")
+
+        # Each size runs in its own rolled-back transaction, so nothing is left behind
+        for size in options["posts"]:
+            with rolled_back():
+                seed_posts(size)
+                indexed.rebuild()
+                for query in options["queries"]:
+                    for name, backend in (("icontains", scan), ("index", indexed)):
+                        samples = time_call(lambda: backend.search(query), options["repeat"])
+                        self.stdout.write(
+                            f"{size:>8} posts  {name:<9}  q={query!r:<20} "
+                            f"p50={percentile(samples, 50):8.2f}ms  max={max(samples):8.2f}ms"
+                        )
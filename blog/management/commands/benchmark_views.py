@@ -0,0 +1,273 @@
+import json
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from threading import Thread
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import translation
+
+from blog import urls as blog_urls
+from blog.benchmarking import check_budgets, compare_to_baseline, percentile, rolled_back
+from blog.models import Comment, Post, Tag
+from blog.ratelimit import limiter
+from blog.syndication import SITEMAP_CHUNK_SIZE
+
+Scenario = namedtuple("Scenario", ["name", "method", "path", "data"], defaults=[None])
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every blog URL through the test client (and optionally a local WSGI server): "
+        "p50/p95/p99, queries and peak memory, checked against budgets and a stored baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--only", nargs="+", help="Scenario (URL) names to run")
+        parser.add_argument("--language", default=settings.LANGUAGE_CODE)
+        parser.add_argument("--post", help="Slug used for the post pages (default: the most commented post)")
+        parser.add_argument("--query", default="python django")
+        parser.add_argument("--host", help="Host header (default: first ALLOWED_HOSTS entry)")
+        parser.add_argument("--cold", action="store_true", help="Clear the cache before every timed request (queries are always counted cold)")
+        parser.add_argument("--as-user", action="store_true", help="Log in first (bypasses the page cache)")
+        parser.add_argument("--server", action="store_true", help="Also drive the GET pages through a local WSGI server")
+        parser.add_argument("--concurrency", type=int, default=4, help="Parallel clients against --server")
+        parser.add_argument("--baseline", help="JSON file of earlier results to compare against")
+        parser.add_argument("--update-baseline", action="store_true", help="Write the results to --baseline instead")
+        parser.add_argument("--tolerance", type=float, default=0.25)
+        parser.add_argument("--min-delta-ms", type=float, default=5.0)
+        parser.add_argument("--budgets", help="JSON file of budgets (default: settings.BLOG_BENCHMARK_BUDGETS)")
+        parser.add_argument("--output", help="Write the results as JSON")
+
+    def handle(self, *args, **options):
+        host = options["host"] or next((h for h in settings.ALLOWED_HOSTS if "*" not in h), "localhost").lstrip(".")
+        scenarios = self.build_scenarios(options)
+        if options["only"]:
+            scenarios = [scenario for scenario in scenarios if scenario.name in options["only"]]
+
+        client = Client(HTTP_HOST=host)
+        user = None
+        if options["as_user"]:
+            user, _created = User.objects.get_or_create(username="benchmark")
+            client.force_login(user)
+
+        results = {}
+        self.stdout.write(f"{'scenario':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'peak':>11}  status")
+        # One client replays every write far past its rate limit; load_test_writes covers those
+        with limiter.disabled():
+            for scenario in scenarios:
+                results[scenario.name] = self.measure(client, scenario, options, user)
+                self.report(scenario.name, results[scenario.name])
+
+        if options["server"]:
+            for scenario in scenarios:
+                if scenario.method == "get":
+                    name = f"{scenario.name}@wsgi"
+                    results[name] = self.measure_server(scenario, options, host)
+                    self.report(name, results[name])
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+
+        failures = [f"{name}: HTTP {result['status']}" for name, result in results.items() if result["status"] >= 400]
+        failures += check_budgets(results, self.load_budgets(options["budgets"]))
+        if options["baseline"]:
+            if options["update_baseline"]:
+                with open(options["baseline"], "w") as fh:
+                    json.dump(results, fh, indent=2, sort_keys=True)
+                self.stdout.write(f"baseline written to {options['baseline']}")
+            else:
+                with open(options["baseline"]) as fh:
+                    failures += compare_to_baseline(
+                        results, json.load(fh), options["tolerance"], options["min_delta_ms"]
+                    )
+
+        for failure in failures:
+            self.stderr.write(failure)
+        if failures:
+            raise CommandError(f"{len(failures)} benchmark check(s) failed")
+        self.stdout.write(self.style.SUCCESS("All views within budget"))
+
+    # ----- scenarios: one per URL name in blog.urls -----
+    def build_scenarios(self, options):
+        published = Post.objects.filter(is_published=True)
+        if options["post"]:
+            post = published.filter(slug=options["post"]).first()
+        else:
+            post = published.order_by("-comment_count").first()
+        if post is None:
+            raise CommandError("No published posts; run seed_blog first")
+        comment = Comment.objects.filter(post=post).first() or Comment.objects.first()
+        tag = post.tags.first() or Tag.objects.first()
+
+        with translation.override(options["language"]):
+            scenarios = [
+                Scenario("home", "get", reverse("home")),
+                Scenario("post_detail", "get", reverse("post_detail", args=[post.slug])),
+                Scenario("post_comments", "get", reverse("post_comments", args=[post.slug]), {"page": 2}),
+                Scenario("category_posts", "get", reverse("category_posts", args=[post.category.slug])),
+                Scenario("search", "get", reverse("search"), {"q": options["query"]}),
+                Scenario("register", "get", reverse("register")),
+                Scenario("login", "get", reverse("login")),
+                Scenario("about", "get", reverse("about")),
+                Scenario("contact", "get", reverse("contact")),
+                Scenario("subscribe", "post", reverse("subscribe"), {"email": "benchmark@example.com"}),
+                Scenario("set_language", "post", reverse("set_language"), {"language": "sw", "next": "/"}),
+                Scenario("logout", "post", reverse("logout")),
+                Scenario("sitemap", "get", reverse("sitemap")),
+                Scenario("sitemap_pages", "get", reverse("sitemap_pages")),
+                Scenario("sitemap_posts", "get", reverse("sitemap_posts", args=[post.pk // SITEMAP_CHUNK_SIZE])),
+                Scenario("feed", "get", reverse("feed")),
+                Scenario("feed_atom", "get", reverse("feed_atom")),
+                Scenario("category_feed", "get", reverse("category_feed", args=[post.category.slug])),
+                Scenario("category_feed_atom", "get", reverse("category_feed_atom", args=[post.category.slug])),
+            ]
+            if comment is not None:
+                scenarios.append(Scenario("like_comment", "post", reverse("like_comment", args=[comment.pk])))
+            if tag is not None:
+                scenarios.append(Scenario("tag_posts", "get", reverse("tag_posts", args=[tag.slug])))
+
+        # A new URL without a scenario should break the run, not go unmeasured
+        covered = {scenario.name for scenario in scenarios}
+        missing = [p.name for p in blog_urls.urlpatterns if p.name not in covered]
+        if missing and not (missing == ["like_comment"] and comment is None):
+            raise CommandError(f"No benchmark scenario for: {', '.join(missing)}")
+        return scenarios
+
+    # ----- test client -----
+    def measure(self, client, scenario, options, user):
+        send = getattr(client, scenario.method)
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        def request():
+            if scenario.method == "post":
+                with rolled_back():  # subscribe/like writes are thrown away
+                    return send(scenario.path, scenario.data or {})
+            response = send(scenario.path, scenario.data or {})
+            if response.streaming:
+                # Sitemaps are generated while they stream; time the whole body
+                b"".join(response.streaming_content)
+            return response
+
+        def prepare():
+            if options["cold"]:
+                cache.clear()
+            if user is not None and scenario.name == "logout":
+                client.force_login(user)
+
+        # Queries are counted on a cold request: a warm anonymous GET is a
+        # page-cache hit that runs none, which would pass any budget. The
+        # timed requests below only give latency.
+        cache.clear()
+        prepare()
+        with connection.execute_wrapper(count_queries):
+            status = request().status_code
+
+        samples = []
+        for i in range(options["warmup"] + options["repeat"]):
+            prepare()
+            start = time.perf_counter()
+            response = request()
+            elapsed = (time.perf_counter() - start) * 1000
+            status = max(status, response.status_code)
+            if i >= options["warmup"]:
+                samples.append(elapsed)
+
+        # Peak memory from one extra traced request (tracing slows the timed ones)
+        prepare()
+        tracemalloc.start()
+        try:
+            request()
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return self.summarize(samples, status, queries=len(queries), peak_kb=round(peak / 1024))
+
+    # ----- local WSGI server -----
+    def measure_server(self, scenario, options, host):
+        httpd = make_server(
+            "127.0.0.1", 0, get_wsgi_application(), server_class=ThreadingWSGIServer, handler_class=QuietHandler
+        )
+        Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_port}{scenario.path}"
+        if scenario.data:
+            url += "?" + urlencode(scenario.data)
+
+        def fetch(_):
+            start = time.perf_counter()
+            try:
+                with urlopen(Request(url, headers={"Host": host}), timeout=30) as response:
+                    response.read()
+                    status = response.status
+            except HTTPError as exc:
+                status = exc.code
+            return (time.perf_counter() - start) * 1000, status
+
+        try:
+            with ThreadPoolExecutor(options["concurrency"]) as pool:
+                list(pool.map(fetch, range(options["warmup"])))
+                start = time.perf_counter()
+                timings = list(pool.map(fetch, range(options["repeat"])))
+                wall = time.perf_counter() - start
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+        result = self.summarize([ms for ms, _status in timings], max(status for _ms, status in timings))
+        result["rps"] = round(len(timings) / wall, 1)
+        return result
+
+    # ----- reporting -----
+    def summarize(self, samples, status, queries=None, peak_kb=None):
+        return {
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "queries": queries,
+            "peak_kb": peak_kb,
+            "status": status,
+        }
+
+    def report(self, name, result):
+        queries = "-" if result["queries"] is None else result["queries"]
+        peak = "-" if result["peak_kb"] is None else f"{result['peak_kb']}KB"
+        self.stdout.write(
+            f"{name:<22}{result['p50_ms']:>8.1f}ms{result['p95_ms']:>7.1f}ms{result['p99_ms']:>7.1f}ms"
+            f"{queries:>9}{peak:>11}  {result['status']}"
+        )
+
+    def load_budgets(self, path):
+        if path:
+            with open(path) as fh:
+                return json.load(fh)
+        return getattr(settings, "BLOG_BENCHMARK_BUDGETS", {})
@@ -0,0 +1,34 @@
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import assets
+
+
+class Command(BaseCommand):
+    help = "Vendor Bootstrap + Bootstrap Icons into static/, strip unused icons and write the minified bundles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", help="Directory holding already-downloaded vendor files (offline builds)")
+        parser.add_argument("--refresh", action="store_true", help="Fetch vendor files even if they are present")
+        parser.add_argument("--keep-icon", action="append", default=[], help="Icon class built dynamically, e.g. bi-star")
+
+    def handle(self, *args, **options):
+        try:
+            fetched = assets.fetch_vendor_files(options["source"], force=options["refresh"])
+        except (OSError, URLError) as exc:
+            raise CommandError(f"Could not fetch the vendor files ({exc}); download them and pass --source DIR")
+        for path in fetched:
+            self.stdout.write(f"vendored {path}")
+
+        leftovers = assets.font_awesome_classes()
+        if leftovers:
+            self.stderr.write(self.style.WARNING(
+                f"Font Awesome is not bundled but these classes are still used: {', '.join(sorted(leftovers))}"
+            ))
+
+        built = assets.build_bundles(options["keep_icon"])
+        self.stdout.write(f"{len(built['icons'])} icons kept" + ("" if assets.font_subset else " (install fontTools to subset the fonts)"))
+        for path, size in built["sizes"].items():
+            self.stdout.write(f"{path}: {size / 1024:.1f} KB")
+        self.stdout.write(self.style.SUCCESS("Assets built; run collectstatic to hash and compress them"))
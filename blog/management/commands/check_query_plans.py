@@ -0,0 +1,61 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from blog.models import Post, Comment
+from blog.pagination import CursorPaginator
+
+
+# SQLite: "SCAN blog_post" with no index; PostgreSQL: "Seq Scan on blog_post"
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (blog_\w+)\b(?! USING)"),
+    "postgresql": re.compile(r"Seq Scan on (blog_\w+)"),
+}
+
+
+def view_queries():
+    """The main query of each view, built the way the view builds it."""
+    published = Post.objects.filter(is_published=True)
+    now = timezone.now()
+    listing = CursorPaginator(published, 5)
+    category = CursorPaginator(published.filter(category_id=1), 5)
+    return {
+        "post_list (first page)": published.order_by(*listing.ordering)[:6],
+        "post_list (cursor page)": published.filter(listing._seek([now, 1], True)).order_by(*listing.ordering)[:6],
+        "category_posts": published.filter(category_id=1).order_by(*category.ordering)[:6],
+        "category_posts (cursor page)": published.filter(category_id=1)
+            .filter(category._seek([now, 1], True)).order_by(*category.ordering)[:6],
+        "post_detail": published.filter(slug="any-post"),
+        "post_detail comments": Comment.objects.filter(post_id=1, approved=True).order_by("created", "pk"),
+        "sidebar popular posts": published.order_by("-views")[:5],
+    }
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN each view's main query and fail if any of them scans a blog table"
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"No plan checks for database vendor {connection.vendor!r}")
+
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Small tables make seq scans cheapest; ask whether an index *can* be used
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for name, queryset in view_queries().items():
+                plan = queryset.explain()
+                scanned = pattern.findall(plan)
+                status = self.style.ERROR("SEQ SCAN") if scanned else self.style.SUCCESS("index")
+                self.stdout.write(f"{name:<30} {status}")
+                if options["verbosity"] > 1 or scanned:
+                    self.stdout.write("    " + plan.replace("\n", "\n    "))
+                if scanned:
+                    failures.append(name)
+
+        if failures:
+            raise CommandError("Full table scans in: " + ", ".join(failures))
@@ -0,0 +1,102 @@
+import logging
+import time
+import uuid
+from collections import Counter, namedtuple
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+
+from blog.counters import post_views
+from blog.models import Comment, Post
+from blog.ratelimit import limiter
+from blog.routers import REPLICAS, STICKY_COOKIE, health
+
+Step = namedtuple("Step", ["name", "expect"])
+CHECK_EMAIL = "replica-check@example.invalid"
+
+
+class Command(BaseCommand):
+    help = (
+        "Probe every read replica (reachability and lag), then walk one visitor through read -> comment -> read "
+        "and check where each request's queries went. The test comment is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--probe-only", action="store_true", help="Only report replica health")
+        parser.add_argument("--host", help="Host header (default: first ALLOWED_HOSTS entry)")
+
+    def handle(self, *args, **options):
+        if not REPLICAS:
+            raise CommandError("No replicas configured; set DATABASE_REPLICA_URLS")
+
+        self.stdout.write(f"{'replica':<14}{'healthy':>8}{'lag':>8}{'probe':>9}")
+        for alias in REPLICAS:
+            start = time.perf_counter()
+            healthy, lag = health.probe(alias)
+            elapsed = (time.perf_counter() - start) * 1000
+            lag = "-" if lag is None else f"{lag:.1f}s"
+            self.stdout.write(f"{alias:<14}{'yes' if healthy else 'NO':>8}{lag:>8}{elapsed:>7.1f}ms")
+        if options["probe_only"]:
+            return
+        if not any(healthy for healthy, _lag in health.status().values()):
+            raise CommandError("No healthy replica to route reads to")
+
+        post = Post.objects.filter(is_published=True).first()
+        if post is None:
+            raise CommandError("No published posts; run seed_blog first")
+        # Keep view counts buffered so no flush lands in a measured request
+        post_views.flush_interval = 60 * 60
+        logging.getLogger("blog.routers").setLevel(logging.ERROR)
+
+        host = options["host"] or next((h for h in settings.ALLOWED_HOSTS if "*" not in h), "localhost").lstrip(".")
+        failures = []
+        self.stdout.write(f"\n{'step':<26}{'primary':>8}{'replica':>8}  expected")
+        visitor = Client(HTTP_HOST=host)
+        try:
+            with limiter.disabled():
+                failures += self.step(Step("anonymous read", "replica"), lambda: self.read(visitor, post))
+                failures += self.step(Step("comment (POST)", "primary"), lambda: visitor.post(
+                    post.get_absolute_url(), {"content": uuid.uuid4().hex, "name": "Check", "email": CHECK_EMAIL},
+                ))
+                if STICKY_COOKIE not in visitor.cookies:
+                    failures.append("comment (POST): no sticky cookie set")
+                failures += self.step(Step("read after own write", "primary"), lambda: self.read(visitor, post))
+                failures += self.step(Step("other visitor", "replica"), lambda: self.read(Client(HTTP_HOST=host), post))
+                for alias in REPLICAS:
+                    health.mark_down(alias)
+                failures += self.step(Step("all replicas down", "primary"), lambda: self.read(Client(HTTP_HOST=host), post))
+        finally:
+            health.reset()
+            Comment.objects.filter(email=CHECK_EMAIL).delete()
+
+        if failures:
+            raise CommandError("Routing check failed:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Reads on replicas, writes and fresh reads on the primary"))
+
+    def read(self, client, post):
+        # A unique query string misses the page cache
+        return client.get(f"{post.get_absolute_url()}?replica-check={uuid.uuid4().hex}")
+
+    def step(self, step, request):
+        queries = Counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(
+                    lambda execute, sql, params, many, context, alias=alias:
+                        queries.update([alias]) or execute(sql, params, many, context)
+                ))
+            response = request()
+        primary = queries[DEFAULT_DB_ALIAS]
+        replica = sum(count for alias, count in queries.items() if alias in REPLICAS)
+        self.stdout.write(f"{step.name:<26}{primary:>8}{replica:>8}  {step.expect}")
+
+        if response.status_code >= 400:
+            return [f"{step.name}: HTTP {response.status_code}"]
+        if step.expect == "replica" and (replica == 0 or primary):
+            return [f"{step.name}: {primary} queries on the primary, {replica} on replicas (expected replicas only)"]
+        if step.expect == "primary" and (primary == 0 or replica):
+            return [f"{step.name}: {primary} queries on the primary, {replica} on replicas (expected the primary only)"]
+        return []
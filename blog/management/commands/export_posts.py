@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.transfer import DEFAULT_CHUNK_SIZE, MODELS, RowWriter, guess_format, open_stream
+
+
+class Command(BaseCommand):
+    help = "Stream posts, comments or subscribers to JSONL/CSV with chunked iterator() reads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output file, or - for stdout")
+        parser.add_argument("--model", choices=sorted(MODELS), default="posts")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Default: from the file extension")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        fields, _importer, export = MODELS[options["model"]]
+
+        start, count = time.perf_counter(), 0
+        with open_stream(options["path"], "w") as fh:
+            writer = RowWriter(fh, guess_format(options["path"], options["format"]), fields)
+            for row in export(options["chunk_size"]):
+                writer.write(row)
+                count += 1
+        elapsed = time.perf_counter() - start
+        # stderr, so `export_posts -` can be piped
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {count} {options['model']} in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
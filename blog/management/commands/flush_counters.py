@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import all_counters
+
+
+class Command(BaseCommand):
+    help = "Write buffered counter increments (e.g. post views) back to the database"
+
+    def handle(self, *args, **options):
+        for counter in all_counters():
+            flushed = counter.flush_all()
+            self.stdout.write(f"{counter.label}: flushed {flushed} increments")
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.transfer import DEFAULT_CHUNK_SIZE, MODELS, PostImporter, guess_format, open_stream, read_rows
+
+
+class Command(BaseCommand):
+    help = "Stream posts, comments or subscribers from JSONL/CSV into the database in bulk chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or - for stdin")
+        parser.add_argument("--model", choices=sorted(MODELS), default="posts")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Default: from the file extension")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--skip-index", action="store_true", help="Posts: do not rebuild the search index and related posts")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        _fields, importer_class, _exporter = MODELS[options["model"]]
+        if importer_class is PostImporter:
+            importer = PostImporter(options["chunk_size"], rebuild_index=not options["skip_index"])
+        else:
+            importer = importer_class(options["chunk_size"])
+
+        start = time.perf_counter()
+        with open_stream(options["path"], "r") as fh:
+            imported, skipped = importer.run(read_rows(fh, guess_format(options["path"], options["format"])))
+        elapsed = time.perf_counter() - start
+        self.stderr.write(self.style.SUCCESS(
+            f"Imported {imported} {options['model']} ({skipped} skipped) in {elapsed:.1f}s "
+            f"({imported / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
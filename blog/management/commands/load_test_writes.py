@@ -0,0 +1,130 @@
+import logging
+import random
+import time
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from blog.benchmarking import rolled_back
+from blog.counters import comment_likes
+from blog.models import Comment
+from blog.ratelimit import RATE_LIMITS
+
+Attack = namedtuple("Attack", ["name", "scope", "path", "data"])
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+
+class Command(BaseCommand):
+    help = (
+        "Flood the comment, like and subscribe endpoints from one client and check that rate limits keep "
+        "database writes bounded and rejected requests query nothing (all writes are rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per flood")
+        parser.add_argument("--visitors", type=int, default=50, help="Sessions liking one comment in the coalescing run")
+        parser.add_argument("--likes-per-visitor", type=int, default=5)
+        parser.add_argument("--host", help="Host header (default: first ALLOWED_HOSTS entry)")
+
+    def handle(self, *args, **options):
+        self.host = options["host"] or next((h for h in settings.ALLOWED_HOSTS if "*" not in h), "localhost").lstrip(".")
+        comment = Comment.objects.filter(approved=True, post__is_published=True).select_related("post").first()
+        if comment is None:
+            raise CommandError("No approved comments; run seed_blog first")
+        # Keep likes in the buffer until this command flushes them inside its transaction
+        comment_likes.flush_interval = 60 * 60
+        # Every rejected request would log a "Too Many Requests" warning
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+
+        attacks = [
+            Attack("like flood", "like", reverse("like_comment", args=[comment.pk]), lambda i: {}),
+            Attack(
+                "comment flood", "comment", comment.post.get_absolute_url(),
+                lambda i: {"content": f"spam {i}", "name": "Bot", "email": "bot@example.com"},
+            ),
+            Attack("subscribe flood", "subscribe", reverse("subscribe"), lambda i: {"email": f"bot{i}@example.com"}),
+        ]
+        failures = []
+        self.stdout.write(
+            f"{'flood':<18}{'requests':>9}{'accepted':>9}{'bound':>7}{'writes':>8}{'rejected q':>11}{'elapsed':>9}"
+        )
+        for attack in attacks:
+            failures += self.flood(attack, options["requests"])
+        failures += self.coalesce(comment, options["visitors"], options["likes_per_visitor"])
+
+        if failures:
+            raise CommandError("Load test failed:\n" + "\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("Writes bounded under abuse"))
+
+    def client(self):
+        # A new documentation-range address per client, so earlier buckets do not interfere
+        return Client(REMOTE_ADDR=f"198.51.{random.randint(0, 255)}.{random.randint(1, 254)}", HTTP_HOST=self.host)
+
+    def flood(self, attack, requests):
+        client = self.client()
+        capacity, period = RATE_LIMITS[attack.scope]
+        writes, rejected_queries, accepted, errors = [], 0, 0, Counter()
+
+        with rolled_back():
+            start = time.perf_counter()
+            for i in range(requests):
+                queries = []
+                with connection.execute_wrapper(lambda execute, sql, *rest: queries.append(sql) or execute(sql, *rest)):
+                    response = client.post(attack.path, attack.data(i))
+                if response.status_code == 429:
+                    rejected_queries = max(rejected_queries, len(queries))
+                elif response.status_code < 400:
+                    accepted += 1
+                else:
+                    errors[response.status_code] += 1
+                writes += [sql for sql in queries if sql.lstrip().upper().startswith(WRITE_PREFIXES)]
+            elapsed = time.perf_counter() - start
+            flushed = self.flush_likes()
+
+        # The bucket starts full and refills while the flood runs
+        bound = int(capacity + capacity / period * elapsed) + 1
+        self.stdout.write(
+            f"{attack.name:<18}{requests:>9}{accepted:>9}{bound:>7}{len(writes) + flushed:>8}"
+            f"{rejected_queries:>11}{elapsed:>8.1f}s"
+        )
+        failures = [f"{attack.name}: {count} request(s) answered HTTP {status}" for status, count in errors.items()]
+        if accepted > bound:
+            failures.append(f"{attack.name}: {accepted} requests accepted, budget allows {bound}")
+        if rejected_queries:
+            failures.append(f"{attack.name}: a rejected request ran {rejected_queries} queries")
+        return failures
+
+    def coalesce(self, comment, visitors, likes_per_visitor):
+        """Many sessions liking one comment, each several times: one like each, one UPDATE in total."""
+        errors = Counter()
+        with rolled_back():
+            before = Comment.objects.get(pk=comment.pk).likes
+            for visitor in range(visitors):
+                client = self.client()
+                client.cookies[settings.SESSION_COOKIE_NAME] = f"loadtest{random.getrandbits(64):x}{visitor}"
+                for _ in range(likes_per_visitor):
+                    status = client.post(reverse("like_comment", args=[comment.pk])).status_code
+                    if status >= 400:
+                        errors[status] += 1
+            updates = self.flush_likes()
+            added = Comment.objects.get(pk=comment.pk).likes - before
+
+        self.stdout.write(
+            f"like coalescing: {visitors * likes_per_visitor} likes from {visitors} sessions -> "
+            f"+{added} likes in {updates} UPDATE(s)"
+        )
+        failures = [f"like coalescing: {count} like(s) answered HTTP {status}" for status, count in errors.items()]
+        if added != visitors or updates > 1:
+            failures.append(f"like coalescing: +{added} likes in {updates} UPDATEs (expected +{visitors} in 1)")
+        return failures
+
+    def flush_likes(self):
+        """Write the buffered likes now (inside the caller's transaction); returns the UPDATEs run."""
+        updates = []
+        with connection.execute_wrapper(lambda execute, sql, *rest: updates.append(sql) or execute(sql, *rest)):
+            comment_likes.flush()
+        return len(updates)
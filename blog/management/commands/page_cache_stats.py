@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from blog.page_cache import page_cache_stats, reset_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the anonymous page cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Zero the counters afterwards")
+
+    def handle(self, *args, **options):
+        stats = page_cache_stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total * 100 if total else 0.0
+        self.stdout.write(f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.1f}%")
+        if options["reset"]:
+            reset_page_cache_stats()
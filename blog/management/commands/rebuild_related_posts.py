@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.related import RELATED_LIMIT, rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the top related posts of every published post (tags, category and title words)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=RELATED_LIMIT, help="Neighbours stored per post")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        posts, rows = rebuild(options["limit"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} related links for {posts} posts in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for all posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options["database"])
+        with transaction.atomic(using=options["database"]):
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({type(backend).__name__})"))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import PostTag, Tag
+from blog.page_cache import purge_tags
+from blog.sidebar import invalidate_sidebar
+from blog.tags import count_tag_stats, sync_post_tags
+
+
+class Command(BaseCommand):
+    help = "Re-copy post dates/status onto the post-tag rows and recount the per-language tag stats"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            links = sync_post_tags(PostTag.objects.all())
+            stats = count_tag_stats(Tag.objects.all())
+        invalidate_sidebar()
+        purge_tags("listing", "sidebar")
+        self.stdout.write(self.style.SUCCESS(
+            f"{links} post-tag rows and {stats} tag stats in {time.perf_counter() - start:.1f}s"
+        ))
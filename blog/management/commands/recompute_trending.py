@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog import trending
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trending rankings from the view buckets (optionally rolling up and pruning first)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rollup-days", type=int, default=0,
+                            help="Rebuild daily buckets from hourly ones for the last N days")
+        parser.add_argument("--prune", action="store_true", help="Delete buckets past their retention")
+
+    def handle(self, *args, **options):
+        if options["rollup_days"]:
+            since = timezone.now() - timedelta(days=options["rollup_days"])
+            self.stdout.write(f"rolled up {trending.rollup_days(since)} daily buckets")
+        if options["prune"]:
+            self.stdout.write(f"pruned {trending.prune()} buckets")
+        trending.recompute()
+        for window in trending.WINDOWS:
+            self.stdout.write(f"{window}: top {trending.trending_post_ids(window, 5)}")
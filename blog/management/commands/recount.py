@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.models import Category, Post
+from blog.page_cache import purge_tags
+from blog.sidebar import invalidate_sidebar
+from blog.totals import category_count_drift, post_count_drift, recount_categories, recount_posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Post.comment_count/reply_count and Category.published_post_count with the real counts "
+        "and rewrite the rows that drifted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report drift; exit with an error if any")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            post_ids = post_count_drift(Post.objects.all())
+            category_ids = category_count_drift(Category.objects.all())
+            if not options["check"]:
+                # Only the drifted rows are rewritten
+                recount_posts(Post.objects.filter(pk__in=post_ids))
+                recount_categories(Category.objects.filter(pk__in=category_ids))
+        elapsed = time.perf_counter() - start
+
+        summary = f"{len(post_ids)} post(s) and {len(category_ids)} category(s) drifted"
+        if options["check"]:
+            if post_ids or category_ids:
+                raise CommandError(f"{summary} ({elapsed:.1f}s)")
+            self.stdout.write(self.style.SUCCESS(f"No drift ({elapsed:.1f}s)"))
+            return
+
+        if category_ids:
+            invalidate_sidebar()
+            purge_tags("sidebar")
+        purge_tags(*(f"post:{pk}" for pk in post_ids))
+        self.stdout.write(self.style.SUCCESS(f"{summary}, repaired in {elapsed:.1f}s"))
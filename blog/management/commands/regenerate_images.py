@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.images import refresh_featured_image
+from blog.models import Post
+from blog.page_cache import purge_tags
+
+
+def init_worker():
+    # Needed with the "spawn" start method; a no-op after fork
+    django.setup()
+    connections.close_all()
+
+
+def process_post(pk):
+    post = Post.objects.only("pk", "featured_image").get(pk=pk)
+    refresh_featured_image(post)
+    return pk, post.featured_image_width
+
+
+class Command(BaseCommand):
+    help = "Generate responsive derivatives and placeholders for every post's featured image"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--missing", action="store_true", help="Only posts without derivatives yet")
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(featured_image="").exclude(featured_image__isnull=True)
+        if options["missing"]:
+            posts = posts.filter(featured_image_width__isnull=True)
+        pks = list(posts.values_list("pk", flat=True))
+
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=init_worker) as pool:
+            futures = {pool.submit(process_post, pk): pk for pk in pks}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"post {futures[future]}: {exc}")
+
+        if done:
+            # Derivatives are stored with update(), so cached pages still carry the old <img>
+            purge_tags("sidebar")
+        self.stdout.write(self.style.SUCCESS(f"{done} images processed, {failed} failed"))
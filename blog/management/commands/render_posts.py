@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.page_cache import purge_tags
+from blog.rendering import backfill
+
+
+class Command(BaseCommand):
+    help = "Fill the pre-rendered HTML, excerpt and reading time columns of existing posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--missing", action="store_true", help="Only posts that were never rendered")
+
+    def handle(self, *args, **options):
+        def purge(pks):
+            # bulk_update skips the signals, so cached pages would keep the old body
+            purge_tags(*(f"post:{pk}" for pk in pks))
+            self.stdout.write(f"  rendered up to post {pks[-1]}")
+
+        total = backfill(Post, options["chunk_size"], only_missing=options["missing"], on_batch=purge)
+        purge_tags("listing")
+        self.stdout.write(self.style.SUCCESS(f"{total} posts rendered"))
@@ -0,0 +1,77 @@
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.benchmarking import seed_categories, seed_comments, seed_post_tags, seed_posts, seed_tags
+from blog.models import Category, Post, Tag
+from blog.page_cache import purge_tags
+from blog.related import rebuild as rebuild_related
+from blog.search import get_search_backend
+from blog.sidebar import invalidate_sidebar
+from blog.tags import count_tag_stats
+from blog.totals import recount_categories, recount_posts
+
+
+class Command(BaseCommand):
+    help = "Fill the database with synthetic bilingual posts, tags, categories and threaded comments (bulk_create)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--comments", type=int, default=1000000)
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--tags", type=int, default=200)
+        parser.add_argument("--reply-ratio", type=float, default=0.4)
+        parser.add_argument("--paragraphs", type=int, default=3)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="bench", help="Slug prefix, so several datasets can coexist")
+        parser.add_argument(
+            "--skip-index", action="store_true", help="Do not rebuild the search index and related posts afterwards"
+        )
+
+    def handle(self, *args, **options):
+        prefix, seed = options["prefix"], options["seed"]
+
+        with self.step("categories + tags"), transaction.atomic():
+            categories = seed_categories(options["categories"], prefix=prefix)
+            tag_ids = seed_tags(options["tags"], prefix=prefix)
+
+        with self.step(f"{options['posts']} posts"), transaction.atomic():
+            seed_posts(
+                options["posts"], categories=categories, batch_size=options["batch_size"],
+                paragraphs=options["paragraphs"], seed=seed, prefix=prefix,
+            )
+            post_ids = list(
+                Post.objects.filter(slug__startswith=f"{prefix}-{seed}-").order_by("pk").values_list("pk", flat=True)
+            )
+
+        with self.step("post tags"), transaction.atomic():
+            seed_post_tags(post_ids, tag_ids, seed=seed)
+
+        if options["comments"] and post_ids:
+            with self.step(f"{options['comments']} comments"), transaction.atomic():
+                seed_comments(post_ids, options["comments"], reply_ratio=options["reply_ratio"], seed=seed)
+
+        # bulk_create skips the signals that normally keep these in step
+        with self.step("tag stats"):
+            count_tag_stats(Tag.objects.all())
+        with self.step("comment and post counts"), transaction.atomic():
+            recount_posts(Post.objects.filter(slug__startswith=f"{prefix}-{seed}-"))
+            recount_categories(Category.objects.all())
+        if not options["skip_index"]:
+            with self.step("search index"), transaction.atomic():
+                get_search_backend().rebuild()
+            with self.step("related posts"):
+                rebuild_related()
+        invalidate_sidebar()
+        purge_tags("listing", "sidebar")
+
+    @contextmanager
+    def step(self, label):
+        self.stdout.write(f"seeding {label} ...", ending="")
+        self.stdout.flush()
+        start = time.perf_counter()
+        yield
+        self.stdout.write(f" {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import NewsletterDispatch, Post
+from blog.newsletter import BATCH_SIZE, WORKERS, DeliveryStopped, NewsletterSender, dispatch_for
+
+
+class Command(BaseCommand):
+    help = "Email a post to every subscriber in batches, resuming an interrupted run where it stopped"
+
+    def add_arguments(self, parser):
+        parser.add_argument("slug", nargs="?", help="Post to send (omit with --pending)")
+        parser.add_argument("--pending", action="store_true", help="Send every dispatch queued from the admin")
+        parser.add_argument("--resend", action="store_true", help="Send again although the post went out before")
+        parser.add_argument("--workers", type=int, default=WORKERS)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["pending"]:
+            dispatches = list(NewsletterDispatch.objects.exclude(status=NewsletterDispatch.DONE).select_related("post"))
+        elif options["slug"]:
+            post = Post.objects.filter(slug=options["slug"], is_published=True).first()
+            if post is None:
+                raise CommandError(f"No published post with slug {options['slug']!r}")
+            dispatch = dispatch_for(post, resend=options["resend"])
+            if dispatch is None:
+                raise CommandError("This post was already sent; use --resend to send it again")
+            dispatches = [dispatch]
+        else:
+            raise CommandError("Give a post slug or --pending")
+
+        for dispatch in dispatches:
+            if dispatch.last_subscriber_id:
+                self.stdout.write(f"Resuming {dispatch.post} after subscriber {dispatch.last_subscriber_id}")
+            try:
+                stats = NewsletterSender(dispatch, options["workers"], options["batch_size"]).run()
+            except DeliveryStopped as exc:
+                dispatch.refresh_from_db()
+                raise CommandError(
+                    f"{dispatch.post}: stopped after subscriber {dispatch.last_subscriber_id} "
+                    f"({dispatch.sent} sent in total): {exc.__cause__!r}. Run again to resume."
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"{dispatch.post}: {stats['sent']} sent, {stats['failed']} failed in {stats['seconds']:.1f}s "
+                f"({stats['per_second']:.0f} emails/s; {dispatch.sent} sent in total)"
+            ))
@@ -0,0 +1,58 @@
+import sys
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+
+from blog import urls as blog_urls
+from blog.benchmarking import percentile
+from blog.profiling import parse_log_line
+
+
+class Command(BaseCommand):
+    help = "Summarise slow-request log lines (from blog.profiling) by blog view name"
+
+    def add_arguments(self, parser):
+        parser.add_argument("logs", nargs="*", help="Log files (default: stdin)")
+        parser.add_argument("--top", type=int, default=3, help="Duplicate query fingerprints shown per view")
+
+    def handle(self, *args, **options):
+        views = {pattern.name for pattern in blog_urls.urlpatterns}
+        groups = defaultdict(list)
+        for line in self.lines(options["logs"]):
+            record = parse_log_line(line)
+            if record is not None:
+                groups[record["view"] if record["view"] in views else "(other)"].append(record)
+
+        if not groups:
+            self.stdout.write("No slow-request records found")
+            return
+
+        self.stdout.write(
+            f"{'view':<18}{'count':>7}{'p50':>10}{'p95':>10}{'sql':>9}{'queries':>9}{'tpl':>9}"
+        )
+        # Worst total time first
+        for view, records in sorted(groups.items(), key=lambda item: -sum(r["total_ms"] for r in item[1])):
+            totals = [r["total_ms"] for r in records]
+            self.stdout.write(
+                f"{view:<18}{len(records):>7}"
+                f"{percentile(totals, 50):>8.0f}ms{percentile(totals, 95):>8.0f}ms"
+                f"{self.mean(records, 'sql_ms'):>7.0f}ms{self.mean(records, 'queries'):>9.1f}"
+                f"{self.mean(records, 'template_ms'):>7.0f}ms"
+            )
+            duplicates = Counter()
+            for record in records:
+                for duplicate in record.get("duplicates", ()):
+                    duplicates[duplicate["fingerprint"]] += duplicate["count"]
+            for fp, count in duplicates.most_common(options["top"]):
+                self.stdout.write(f"    {count:>6}x  {fp[:120]}")
+
+    def lines(self, paths):
+        if not paths:
+            yield from sys.stdin
+            return
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as fh:
+                yield from fh
+
+    def mean(self, records, key):
+        return sum(r.get(key) or 0 for r in records) / len(records)
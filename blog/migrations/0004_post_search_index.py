@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5("
+    "title_en, title_sw, content_en, content_sw, tokenize = 'unicode61 remove_diacritics 2')",
+    "INSERT INTO blog_post_fts (rowid, title_en, title_sw, content_en, content_sw) "
+    "SELECT id, title_en, COALESCE(title_sw, ''), content_en, COALESCE(content_sw, '') FROM blog_post",
+]
+SQLITE_DROP = ["DROP TABLE IF EXISTS blog_post_fts"]
+
+POSTGRES_DOCUMENTS = (
+    "setweight(to_tsvector('english', COALESCE(title_en, '')), 'A') || "
+    "setweight(to_tsvector('english', COALESCE(content_en, '')), 'B'), "
+    "setweight(to_tsvector('simple', COALESCE(title_sw, '')), 'A') || "
+    "setweight(to_tsvector('simple', COALESCE(content_sw, '')), 'B')"
+)
+POSTGRES_CREATE = [
+    "CREATE TABLE IF NOT EXISTS blog_post_search ("
+    "post_id bigint PRIMARY KEY REFERENCES blog_post (id) ON DELETE CASCADE, "
+    "document_en tsvector NOT NULL, "
+    "document_sw tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS blog_post_search_en_gin ON blog_post_search USING gin (document_en)",
+    "CREATE INDEX IF NOT EXISTS blog_post_search_sw_gin ON blog_post_search USING gin (document_sw)",
+    f"INSERT INTO blog_post_search (post_id, document_en, document_sw) "
+    f"SELECT id, {POSTGRES_DOCUMENTS} FROM blog_post",
+]
+POSTGRES_DROP = ["DROP TABLE IF EXISTS blog_post_search"]
+
+
+def run(statements_by_vendor):
+    def forwards(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return forwards
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_delete_contactmessage_alter_category_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"sqlite": SQLITE_CREATE, "postgresql": POSTGRES_CREATE}),
+            run({"sqlite": SQLITE_DROP, "postgresql": POSTGRES_DROP}),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_featured_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('h', 'Hour'), ('d', 'Day')], max_length=1)),
+                ('start', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='blog.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'start'], name='postviewbucket_window_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'period', 'start'), name='postviewbucket_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_postviewbucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriber',
+            name='language',
+            field=models.CharField(choices=[('en', 'English'), ('sw', 'Swahili')], default='en', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='NewsletterDispatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done')], default='pending', max_length=10)),
+                ('last_subscriber_id', models.BigIntegerField(default=0)),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='newsletter_dispatches', to='blog.post')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:28
+
+import math
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+# A frozen copy of blog.rendering as of this migration, so later changes
+# to the app code cannot change what it writes
+def render_existing_posts(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    last_pk = 0
+    while True:
+        batch = list(Post.objects.order_by("pk").filter(pk__gt=last_pk).only("pk", "content_en", "content_sw")[:500])
+        if not batch:
+            return
+        for post in batch:
+            post.content_html_en = linebreaks(post.content_en or "", autoescape=True)
+            post.content_html_sw = linebreaks(post.content_sw or "", autoescape=True)
+            post.excerpt_en = Truncator(" ".join((post.content_en or "")[:640].split())).chars(160)
+            post.excerpt_sw = Truncator(" ".join((post.content_sw or "")[:640].split())).chars(160)
+            words = len((post.content_en or "").split())
+            post.reading_time = max(1, math.ceil(words / 200)) if words else 0
+        Post.objects.bulk_update(
+            batch, ["content_html_en", "content_html_sw", "excerpt_en", "excerpt_sw", "reading_time"]
+        )
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_newsletter_dispatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html_en',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='content_html_sw',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_en',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_sw',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_rendered_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='blog.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='blog.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['post', 'rank'], name='relatedpost_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'related'), name='relatedpost_unique')],
+            },
+        ),
+    ]
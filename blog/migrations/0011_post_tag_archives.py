@@ -0,0 +1,107 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+# A frozen copy of blog.tags as of this migration, so later changes to the
+# app code cannot change what it writes
+def fill_tag_columns(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    PostTag = apps.get_model("blog", "PostTag")
+    Tag = apps.get_model("blog", "Tag")
+    TagStat = apps.get_model("blog", "TagStat")
+
+    post = Post.objects.filter(pk=models.OuterRef("post_id"))
+    PostTag.objects.update(
+        post_created=models.Subquery(post.values("created")[:1]),
+        is_published=models.Subquery(post.values("is_published")[:1]),
+    )
+
+    languages = [code for code, _name in settings.LANGUAGES]
+    filters = {}
+    for code in languages:
+        filters[code] = models.Q(post_links__is_published=True)
+        if code != settings.LANGUAGE_CODE:
+            filters[code] &= models.Q(**{f"post_links__post__title_{code}__gt": ""})
+    counts = Tag.objects.order_by().annotate(
+        **{f"count_{code}": models.Count("post_links", filter=filters[code]) for code in languages}
+    ).values_list("pk", *(f"count_{code}" for code in languages))
+    TagStat.objects.bulk_create(
+        [
+            TagStat(tag_id=row[0], language=code, post_count=count)
+            for row in counts
+            for code, count in zip(languages, row[1:])
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['name']},
+        ),
+        # Post.tags keeps its table: only the state learns about the through model
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PostTag',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='blog.post')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='blog.tag')),
+                    ],
+                    options={
+                        'db_table': 'blog_post_tags',
+                        'unique_together': {('post', 'tag')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='post',
+                    name='tags',
+                    field=models.ManyToManyField(blank=True, through='blog.PostTag', to='blog.tag'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='posttag',
+            name='post_created',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='posttag',
+            name='is_published',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=10)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='blog.tag')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='tagstat',
+            constraint=models.UniqueConstraint(fields=('tag', 'language'), name='tagstat_unique'),
+        ),
+        migrations.RunPython(fill_tag_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['tag', '-post_created', '-post'], name='posttag_pub_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tagstat',
+            index=models.Index(fields=['language', '-post_count'], name='tagstat_count_idx'),
+        ),
+    ]
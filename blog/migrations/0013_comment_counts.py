@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:10
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+# A frozen copy of blog.totals as of this migration, so later changes to
+# the app code cannot change what it writes
+def fill_counts(apps, schema_editor):
+    Category = apps.get_model("blog", "Category")
+    Comment = apps.get_model("blog", "Comment")
+    Post = apps.get_model("blog", "Post")
+
+    def count(queryset):
+        return Coalesce(models.Subquery(queryset.annotate(n=models.Count("pk")).values("n")), 0)
+
+    approved = Comment.objects.filter(post=models.OuterRef("pk"), approved=True).order_by().values("post")
+    Post.objects.update(
+        comment_count=count(approved),
+        reply_count=count(approved.filter(parent__isnull=False)),
+    )
+    published = Post.objects.filter(category=models.OuterRef("pk"), is_published=True).order_by().values("category")
+    Category.objects.update(published_post_count=count(published))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 23:40
+
+import blog.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_table(apps, schema_editor):
+    # PostgreSQL has had blog_post_search since 0004; elsewhere the model still needs a table
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.create_model(apps.get_model("blog", "PostSearchDocument"))
+
+
+def drop_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        schema_editor.delete_model(apps.get_model("blog", "PostSearchDocument"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_comment_counts'),
+    ]
+
+    operations = [
+        # The table already exists on PostgreSQL: only the state learns about the model
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PostSearchDocument',
+                    fields=[
+                        ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='blog.post')),
+                        ('document_en', blog.models.SearchVectorField()),
+                        ('document_sw', blog.models.SearchVectorField()),
+                    ],
+                    options={
+                        'db_table': 'blog_post_search',
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_table, drop_table),
+    ]
@@ -1,7 +1,31 @@
 
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Left, NullIf, Upper
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
+
+from .rendering import EXCERPT_CHARS, RENDERED_FIELDS, rendered_values
+
+# ==============================
+# DENORMALISED COUNT COLUMNS
+# ==============================
+def without_counts(instance, save_kwargs, count_fields):
+    """
+    Turn a full save() of an existing row into one that leaves
+    ``count_fields`` alone: they only move through F() updates
+    (blog/totals.py), and the copy in memory may be stale.
+    """
+    if save_kwargs.get("update_fields") is not None or instance._state.adding or save_kwargs.get("force_insert"):
+        return save_kwargs
+    deferred = instance.get_deferred_fields()
+    save_kwargs["update_fields"] = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.attname not in deferred and field.name not in count_fields
+    ]
+    return save_kwargs
+
 
 # ==============================
 # CATEGORY MODEL
@@ -10,10 +34,15 @@ class Category(models.Model):
     name_en = models.CharField(max_length=200)
     name_sw = models.CharField(max_length=200, blank=True, null=True)
     slug = models.SlugField(unique=True)
+    # Kept by blog/signals.py (see blog/totals.py)
+    published_post_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name_en
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **without_counts(self, kwargs, {"published_post_count"}))
+
     def get_absolute_url(self):
         return reverse("category_posts", args=[self.slug])
 
@@ -25,9 +54,55 @@ class Tag(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
 
+    class Meta:
+        ordering = ["name"]
+
     def __str__(self):
         return self.name
 
+    def get_absolute_url(self):
+        return reverse("tag_posts", args=[self.slug])
+
+
+# ==============================
+# POST QUERYSET (Language-aware listings)
+# ==============================
+def translated(*columns, output_field=None):
+    """The first of ``columns`` that is neither NULL nor blank (the last one as is)."""
+    *preferred, fallback = columns
+    return Coalesce(*(NullIf(column, Value("")) for column in preferred), fallback, output_field=output_field)
+
+
+class PostQuerySet(models.QuerySet):
+    # What a post card reads besides the annotations; the bodies stay in the database
+    LISTING_FIELDS = (
+        "slug", "category", "created", "views", "is_published", "featured_image",
+        "featured_image_width", "featured_image_height", "featured_image_placeholder",
+    )
+
+    def for_language(self, lang):
+        """Annotate ``title``, ``excerpt`` and ``category_name`` in ``lang``, English where untranslated."""
+        if lang == "sw":
+            title = translated("title_sw", "title_en")
+            summary = translated(
+                "meta_description_sw", "excerpt_sw", "meta_description_en", "excerpt_en",
+                output_field=models.TextField(),
+            )
+            category_name = translated("category__name_sw", "category__name_en")
+        else:
+            title = F("title_en")
+            summary = translated("meta_description_en", "excerpt_en", output_field=models.TextField())
+            category_name = F("category__name_en")
+        # One character more than templates show, so |truncatechars still adds the ellipsis
+        return self.annotate(title=title, excerpt=Left(summary, EXCERPT_CHARS + 1), category_name=category_name)
+
+    def listing(self):
+        return self.only(*self.LISTING_FIELDS, "category__slug").select_related("category")
+
+    def with_tags(self):
+        """The tags of every post on the page in one extra query."""
+        return self.prefetch_related(models.Prefetch("tags", queryset=Tag.objects.only("name", "slug")))
+
 
 # ==============================
 # POST MODEL (Bilingual + Dynamic Monetization)
@@ -62,13 +137,29 @@ class Post(models.Model):
     meta_description_en = models.TextField(blank=True, null=True)
     meta_description_sw = models.TextField(blank=True, null=True)
 
+    # Derived from content_en/content_sw on save (see blog/rendering.py)
+    content_html_en = models.TextField(blank=True, default="", editable=False)
+    content_html_sw = models.TextField(blank=True, default="", editable=False)
+    excerpt_en = models.CharField(max_length=255, blank=True, default="", editable=False)
+    excerpt_sw = models.CharField(max_length=255, blank=True, default="", editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False)
+
     category = models.ForeignKey(Category, related_name="posts", on_delete=models.CASCADE)
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 
     featured_image = models.ImageField(upload_to="posts/", blank=True, null=True)
-    tags = models.ManyToManyField(Tag, blank=True)
+    # Filled by blog/images.py when derivatives are generated (not width_field/
+    # height_field, which would open the file on every model load)
+    featured_image_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    featured_image_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    featured_image_placeholder = models.TextField(blank=True, default="", editable=False)
+    tags = models.ManyToManyField(Tag, through="PostTag", blank=True)
 
     views = models.PositiveIntegerField(default=0)
+    # Approved comments (replies included) and approved replies, kept by
+    # blog/signals.py (see blog/totals.py)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
     is_published = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
 
@@ -82,12 +173,134 @@ class Post(models.Model):
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Home listing / keyset pagination: published, newest first
+            models.Index(
+                fields=["-created", "-id"],
+                condition=models.Q(is_published=True),
+                name="post_pub_created_idx",
+            ),
+            # Popular posts
+            models.Index(
+                fields=["-views"],
+                condition=models.Q(is_published=True),
+                name="post_pub_views_idx",
+            ),
+            # Category pages
+            models.Index(
+                fields=["category", "-created", "-id"],
+                condition=models.Q(is_published=True),
+                name="post_cat_pub_created_idx",
+            ),
+            # Admin changelist and date drill-down (drafts included)
+            models.Index(fields=["-created", "-id"], name="post_created_idx"),
+        ]
+
     def __str__(self):
         return self.title_en
 
     def get_absolute_url(self):
         return reverse("post_detail", args=[self.slug])
 
+    def render_content(self, fields=None):
+        """Refresh the pre-rendered columns of ``fields`` (default: both contents); returns the columns set."""
+        fields = RENDERED_FIELDS.keys() if fields is None else fields
+        values = rendered_values(
+            content_en=self.content_en if "content_en" in fields else None,
+            content_sw=(self.content_sw or "") if "content_sw" in fields else None,
+        )
+        for name, value in values.items():
+            setattr(self, name, value)
+        return list(values)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.render_content()
+            kwargs = without_counts(self, kwargs, {"comment_count", "reply_count"})
+        else:
+            rendered = self.render_content(set(update_fields) & RENDERED_FIELDS.keys())
+            kwargs["update_fields"] = {*update_fields, *rendered}
+        super().save(*args, **kwargs)
+
+
+# ==============================
+# POST TAGS (m2m rows + denormalised counts, see blog/tags.py)
+# ==============================
+class PostTag(models.Model):
+    """A row of Post.tags, carrying a copy of its post's date and status for tag archives."""
+
+    post = models.ForeignKey(Post, related_name="tag_links", on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, related_name="post_links", on_delete=models.CASCADE)
+    # Copied from the post by blog.tags.sync_post_tags() (signals, imports, seeding)
+    post_created = models.DateTimeField(default=timezone.now)
+    is_published = models.BooleanField(default=True)
+
+    class Meta:
+        # The table Django created for the plain ManyToManyField
+        db_table = "blog_post_tags"
+        unique_together = [("post", "tag")]
+        indexes = [
+            # Tag archives: published posts of one tag, newest first
+            models.Index(
+                fields=["tag", "-post_created", "-post"],
+                condition=models.Q(is_published=True),
+                name="posttag_pub_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} #{self.tag_id}"
+
+
+class TagStat(models.Model):
+    """Published posts of a tag that read in ``language``; kept up to date by blog/signals.py."""
+
+    tag = models.ForeignKey(Tag, related_name="stats", on_delete=models.CASCADE)
+    language = models.CharField(max_length=10)
+    post_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["tag", "language"], name="tagstat_unique"),
+        ]
+        indexes = [
+            # Tag cloud: the biggest tags of one language
+            models.Index(fields=["language", "-post_count"], name="tagstat_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tag_id} [{self.language}] {self.post_count}"
+
+
+# ==============================
+# SEARCH DOCUMENTS (PostgreSQL full-text index, see blog/search.py)
+# ==============================
+class SearchVectorField(models.Field):
+    """tsvector on PostgreSQL; text elsewhere, where the table stays empty."""
+
+    def db_type(self, connection):
+        return "tsvector" if connection.vendor == "postgresql" else "text"
+
+
+class PostSearchDocument(models.Model):
+    """A post's weighted tsvectors, written in SQL by PostgresSearchBackend."""
+
+    post = models.OneToOneField(Post, primary_key=True, related_name="search_document", on_delete=models.CASCADE)
+    document_en = SearchVectorField()
+    document_sw = SearchVectorField()
+
+    class Meta:
+        # Created on PostgreSQL by migration 0004; as a model it is truncated
+        # together with blog_post by flush (and so by TransactionTestCase)
+        db_table = "blog_post_search"
+
+    def __str__(self):
+        return str(self.post_id)
+
 
 # ==============================
 # COMMENT MODEL (Replies Supported)
@@ -117,6 +330,27 @@ class Comment(models.Model):
     approved = models.BooleanField(default=True)
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Comment threads of a post (approved only, oldest first)
+            models.Index(
+                fields=["post", "created", "id"],
+                condition=models.Q(approved=True),
+                name="comment_thread_idx",
+            ),
+            # Admin changelist and date drill-down, newest first
+            models.Index(fields=["-created", "-id"], name="comment_created_idx"),
+            # Moderation queue
+            models.Index(
+                fields=["-created", "-id"],
+                condition=models.Q(approved=False),
+                name="comment_pending_idx",
+            ),
+            # Admin search: exact e-mail or guest name (iexact compares UPPER())
+            models.Index(Upper("email"), name="comment_email_upper_idx"),
+            models.Index(Upper("name"), name="comment_name_upper_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name or self.user} - {self.post}"
 
@@ -125,8 +359,87 @@ class Comment(models.Model):
 # SUBSCRIBER MODEL
 # ==============================
 class Subscriber(models.Model):
+    LANGUAGE_CHOICES = [("en", "English"), ("sw", "Swahili")]
+
     email = models.EmailField(unique=True)
+    language = models.CharField(max_length=10, choices=LANGUAGE_CHOICES, default="en")
     subscribed_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.email
+
+
+# ==============================
+# POST VIEW BUCKETS (Trending)
+# ==============================
+class PostViewBucket(models.Model):
+    HOUR = "h"
+    DAY = "d"
+    PERIOD_CHOICES = [(HOUR, "Hour"), (DAY, "Day")]
+
+    post = models.ForeignKey(Post, related_name="view_buckets", on_delete=models.CASCADE)
+    period = models.CharField(max_length=1, choices=PERIOD_CHOICES)
+    start = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "period", "start"], name="postviewbucket_unique"),
+        ]
+        indexes = [
+            # Window scans: all buckets of a period since a point in time
+            models.Index(fields=["period", "start"], name="postviewbucket_window_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} {self.period} {self.start:%Y-%m-%d %H:00}: {self.views}"
+
+
+# ==============================
+# NEWSLETTER DISPATCH (Resumable fan-out)
+# ==============================
+class NewsletterDispatch(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"), (DONE, "Done")]
+
+    post = models.ForeignKey(Post, related_name="newsletter_dispatches", on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+
+    # Every subscriber with id <= this has been handled (sent or failed)
+    last_subscriber_id = models.BigIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created"]
+
+    def __str__(self):
+        return f"{self.post} ({self.status}, {self.sent} sent)"
+
+
+# ==============================
+# RELATED POSTS (Top-K neighbours, see blog/related.py)
+# ==============================
+class RelatedPost(models.Model):
+    post = models.ForeignKey(Post, related_name="related_links", on_delete=models.CASCADE)
+    related = models.ForeignKey(Post, related_name="neighbour_of", on_delete=models.CASCADE)
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["post", "related"], name="relatedpost_unique"),
+        ]
+        indexes = [
+            # post_detail: the neighbours of one post, best first
+            models.Index(fields=["post", "rank"], name="relatedpost_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.score:.3f})"
@@ -0,0 +1,239 @@
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+
+from .models import NewsletterDispatch, Subscriber
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# NEWSLETTER FAN-OUT (batched, threaded, resumable)
+# ==================================================
+# The email is rendered once per language. Subscribers are read in id
+# order in keyset batches by the calling thread; a bounded pool of
+# workers sends each batch, one message at a time, over that worker's
+# own SMTP connection, which stays open for the whole run. Progress is
+# checkpointed only up to the last batch before which everything has
+# finished, so a crashed run resumes without skipping anyone (a few
+# messages may go out twice). Only a refused recipient fails a single
+# message; a lost connection that a reconnect does not fix, or any other
+# SMTP error, stops the whole run with the checkpoint at the last
+# subscriber handled before it, and the dispatch stays unfinished.
+BATCH_SIZE = getattr(settings, "BLOG_NEWSLETTER_BATCH_SIZE", 100)
+WORKERS = getattr(settings, "BLOG_NEWSLETTER_WORKERS", 4)
+SITE_URL = getattr(settings, "BLOG_SITE_URL", "")
+
+
+def render_newsletter(post, language):
+    """(subject, text body, html body) for one language."""
+    with translation.override(language):
+        if language == "sw" and post.title_sw:
+            title, excerpt, summary = post.title_sw, post.excerpt_sw or post.excerpt_en, post.meta_description_sw
+        else:
+            title, excerpt, summary = post.title_en, post.excerpt_en, post.meta_description_en
+        context = {
+            "post": post,
+            "title": title,
+            "summary": summary or excerpt,
+            "url": SITE_URL.rstrip("/") + post.get_absolute_url(),
+            "language": language,
+        }
+        return (
+            title,
+            render_to_string("emails/newsletter.txt", context),
+            render_to_string("emails/newsletter.html", context),
+        )
+
+
+def subscriber_batches(after_id=0, batch_size=BATCH_SIZE):
+    """Keyset pagination over (id, email, language): no OFFSET, no open cursor."""
+    while True:
+        batch = list(
+            Subscriber.objects.filter(pk__gt=after_id)
+            .order_by("pk")
+            .values_list("pk", "email", "language")[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        after_id = batch[-1][0]
+
+
+def dispatch_for(post, resend=False):
+    """The unfinished dispatch of ``post`` to resume, or a new one (None if already sent)."""
+    dispatch = post.newsletter_dispatches.exclude(status=NewsletterDispatch.DONE).first()
+    if dispatch is not None:
+        return dispatch
+    if not resend and post.newsletter_dispatches.exists():
+        return None
+    return NewsletterDispatch.objects.create(post=post)
+
+
+class DeliveryStopped(Exception):
+    """A batch stopped on an SMTP or connection error after subscriber ``last_id`` (None: before its first)."""
+
+    def __init__(self, last_id=None, sent=0, failed=0):
+        super().__init__(last_id, sent, failed)
+        self.last_id = last_id
+        self.sent = sent
+        self.failed = failed
+
+
+class NewsletterSender:
+    def __init__(self, dispatch, workers=WORKERS, batch_size=BATCH_SIZE, from_email=None):
+        self.dispatch = dispatch
+        self.workers = workers
+        self.batch_size = batch_size
+        self.from_email = from_email or settings.DEFAULT_FROM_EMAIL
+        self.emails = {}
+        self.sent = 0
+        self.failed = 0
+        self._local = threading.local()
+        self._stopped = threading.Event()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    # ----- per-worker SMTP connection -----
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def drop_connection(self):
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def send_batch(self, batch):
+        """Runs in a worker thread; returns (sent, failed) or raises DeliveryStopped."""
+        sent = failed = 0
+        last_id = None
+        for pk, email, language in batch:
+            if self._stopped.is_set():
+                # Another worker hit an error that stops the run
+                raise DeliveryStopped(last_id, sent, failed)
+            subject, text, html = self.emails.get(language) or self.emails[settings.LANGUAGE_CODE]
+            message = EmailMultiAlternatives(subject, text, self.from_email, [email])
+            message.attach_alternative(html, "text/html")
+            try:
+                delivered = self.send_message(message)
+            except Exception as exc:
+                self._stopped.set()
+                raise DeliveryStopped(last_id, sent, failed) from exc
+            sent += delivered
+            failed += 1 - delivered
+            last_id = pk
+        return sent, failed
+
+    def send_message(self, message):
+        """
+        One message over the worker's connection; returns 1 if it went out,
+        0 if its recipient was refused, and raises on any other error.
+        Sending one at a time means a refused address fails only its own
+        message and a retry after a dropped session resends only that one.
+        """
+        for attempt in (1, 2):
+            try:
+                return self.connection().send_messages([message]) or 0
+            except smtplib.SMTPRecipientsRefused as exc:
+                # The server refused this address; the session is fine
+                logger.warning("Newsletter to %s refused: %s", ", ".join(message.to), exc)
+                return 0
+            except smtplib.SMTPResponseException:
+                # Any other answer (shutting down, sender or auth refused) would fail every message
+                raise
+            except OSError:
+                # A dropped session (smtplib errors are OSErrors too): reconnect and retry once
+                self.drop_connection()
+                if attempt == 2:
+                    raise
+
+    # ----- main loop -----
+    def run(self):
+        post = self.dispatch.post
+        self.emails = {code: render_newsletter(post, code) for code, _name in settings.LANGUAGES}
+        NewsletterDispatch.objects.filter(pk=self.dispatch.pk).update(
+            status=NewsletterDispatch.RUNNING, started=self.dispatch.started or timezone.now()
+        )
+
+        start = time.perf_counter()
+        pending = deque()  # (last subscriber id, future) in id order
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="newsletter") as pool:
+                try:
+                    for batch in subscriber_batches(self.dispatch.last_subscriber_id, self.batch_size):
+                        pending.append((batch[-1][0], pool.submit(self.send_batch, batch)))
+                        # Bounded read-ahead: never more than two batches per worker in memory
+                        self.checkpoint(pending, wait=len(pending) >= self.workers * 2)
+                    while pending:
+                        self.checkpoint(pending, wait=True)
+                except BaseException:
+                    # Queued batches must not start and running ones stop at their next message
+                    self._stopped.set()
+                    raise
+        finally:
+            self.close_connections()
+
+        NewsletterDispatch.objects.filter(pk=self.dispatch.pk).update(
+            status=NewsletterDispatch.DONE, finished=timezone.now()
+        )
+        self.dispatch.refresh_from_db()
+        elapsed = time.perf_counter() - start
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "seconds": elapsed,
+            "per_second": self.sent / elapsed if elapsed else 0.0,
+        }
+
+    def checkpoint(self, pending, wait=False):
+        """Record every finished batch at the head of ``pending`` in one UPDATE."""
+        last_id, sent, failed, stopped = None, 0, 0, None
+        while pending and (pending[0][1].done() or wait):
+            batch_last_id, future = pending.popleft()
+            try:
+                batch_sent, batch_failed = future.result()
+            except DeliveryStopped as exc:
+                # Keep what the batch got through before the error, and nothing after it
+                stopped = exc
+                batch_last_id, batch_sent, batch_failed = exc.last_id or last_id, exc.sent, exc.failed
+            last_id = batch_last_id
+            sent += batch_sent
+            failed += batch_failed
+            if stopped is not None:
+                break
+            wait = False  # only block for the oldest batch
+        if last_id is not None:
+            NewsletterDispatch.objects.filter(pk=self.dispatch.pk).update(
+                last_subscriber_id=last_id, sent=F("sent") + sent, failed=F("failed") + failed
+            )
+            self.sent += sent
+            self.failed += failed
+        if stopped is not None:
+            raise stopped
+
+    def close_connections(self):
+        for connection in self._connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
@@ -0,0 +1,150 @@
+import hashlib
+import re
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+
+# ==================================================
+# FULL-PAGE CACHE FOR ANONYMOUS VISITORS
+# ==================================================
+# Pages are stored per language + URL together with the versions of the
+# dependency tags they were rendered from ("post:12", "category:3",
+# "listing", "sidebar"). Purging a tag bumps its version, which makes every
+# page that depends on it stale at once (see blog/signals.py).
+PAGE_CACHE_TIMEOUT = getattr(settings, "BLOG_PAGE_CACHE_TIMEOUT", 600)
+PAGE_KEY = "blog:page:{lang}:{digest}"
+TAG_KEY = "blog:pagetag:{tag}"
+STATS_KEY = "blog:pagecache:{name}"
+
+# CSRF tokens are per visitor, so they are cut out before storing and a
+# fresh one is put back on every hit
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = "__blog_csrf_token__"
+
+
+def tag_page(request, *tags):
+    """
+    Declare extra dependency tags for the page being rendered. Their
+    versions are taken now, before the rest of the page reads its data, so
+    a purge that lands mid-render leaves the stored page already stale.
+    """
+    versions = getattr(request, "_page_cache_tags", None)
+    if versions is None:
+        return  # not a request the page cache stores
+    new = [tag for tag in tags if tag not in versions]
+    if new:
+        versions.update(tag_versions(new))
+
+
+def purge_tags(*tags):
+    cache.set_many({TAG_KEY.format(tag=tag): uuid.uuid4().hex for tag in tags}, timeout=None)
+
+
+def tag_versions(tags):
+    keys = {TAG_KEY.format(tag=tag): tag for tag in tags}
+    versions = cache.get_many(list(keys))
+    for key, tag in keys.items():
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def is_fresh(entry):
+    keys = [TAG_KEY.format(tag=tag) for tag in entry["tags"]]
+    current = cache.get_many(keys)
+    return all(current.get(TAG_KEY.format(tag=tag)) == version for tag, version in entry["tags"].items())
+
+
+def page_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_KEY.format(lang=get_language(), digest=digest)
+
+
+def count(name):
+    key = STATS_KEY.format(name=name)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def page_cache_stats():
+    names = ("hits", "misses")
+    values = cache.get_many([STATS_KEY.format(name=name) for name in names])
+    return {name: values.get(STATS_KEY.format(name=name), 0) for name in names}
+
+
+def reset_page_cache_stats():
+    cache.delete_many([STATS_KEY.format(name=name) for name in ("hits", "misses")])
+
+
+def has_pending_messages(request):
+    return len(messages.get_messages(request)) > 0
+
+
+def is_cacheable_request(request):
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not has_pending_messages(request)
+    )
+
+
+def is_cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not has_pending_messages(request)
+    )
+
+
+def cache_anonymous_page(tags=(), on_hit=None):
+    """
+    Serve the view from the page cache for anonymous GETs. ``tags`` are the
+    view's fixed dependencies; views add per-object ones with tag_page().
+    ``on_hit(request, tags, *args, **kwargs)`` runs for side effects that
+    must still happen when the view itself is skipped.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            key = page_key(request)
+            entry = cache.get(key)
+            if entry is not None and is_fresh(entry):
+                count("hits")
+                if on_hit is not None:
+                    on_hit(request, entry["tags"], *args, **kwargs)
+                content = entry["content"].replace(CSRF_PLACEHOLDER, get_token(request))
+                response = HttpResponse(content, content_type=entry["content_type"])
+                response["X-Page-Cache"] = "HIT"
+                return response
+
+            count("misses")
+            # Versions as of before the view reads anything (see tag_page)
+            request._page_cache_tags = tag_versions(tags) if tags else {}
+            response = view(request, *args, **kwargs)
+            if is_cacheable_response(request, response):
+                response["X-Page-Cache"] = "MISS"
+                content = CSRF_INPUT_RE.sub(
+                    r"\g<1>%s\g<2>" % CSRF_PLACEHOLDER, response.content.decode(response.charset)
+                )
+                cache.set(key, {
+                    "content": content,
+                    "content_type": response["Content-Type"],
+                    "tags": request._page_cache_tags,
+                }, PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
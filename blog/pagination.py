@@ -0,0 +1,198 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# ==================================================
+# KEYSET (CURSOR) PAGINATION
+# ==================================================
+# Pages are addressed by the (created, id) of their boundary rows instead of
+# an OFFSET, and no COUNT(*) is run, so every page costs the same no matter
+# how deep it is. Legacy ?page=N links still resolve (with one OFFSET query)
+# and hand out cursors from there on.
+NEXT, PREVIOUS = "n", "p"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPage(Sequence):
+    """Page-compatible object: iterate it and use has_next/has_previous in templates."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous, number=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.number = number
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[-1], NEXT)
+        return ""
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self.paginator.encode_cursor(self.object_list[0], PREVIOUS)
+        return ""
+
+
+class CursorPaginator:
+    def __init__(self, queryset, per_page, ordering=("-created", "-pk")):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        self.descending = ordering[0].startswith("-")
+        self.fields = [name.lstrip("-") for name in ordering]
+
+    # ----- cursor encoding -----
+    def encode_cursor(self, obj, direction):
+        # Full isoformat keeps microseconds, which the (created, id) seek relies on
+        values = [getattr(obj, name) for name in self.fields]
+        values = [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+        payload = json.dumps({"v": values, "d": direction})
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values, direction = payload["v"], payload["d"]
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor(cursor)
+        if direction not in (NEXT, PREVIOUS) or len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        model = self.queryset.model
+        try:
+            values = [
+                model._meta.pk.to_python(value) if name == "pk" else model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise InvalidCursor(cursor)
+        return values, direction
+
+    # ----- queries -----
+    def _seek(self, values, forward):
+        # (a, b) < (x, y)  ==  a < x OR (a = x AND b < y), for any number of keys
+        lookup = "lt" if forward == self.descending else "gt"
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            term = Q(**{f"{name}__{lookup}": values[i]})
+            for previous_name, previous_value in zip(self.fields[:i], values[:i]):
+                term &= Q(**{previous_name: previous_value})
+            condition |= term
+        # Redundant bound on the leading key lets the planner range-scan the index
+        return Q(**{f"{self.fields[0]}__{lookup}e": values[0]}) & condition
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering]
+
+    def first_page(self):
+        rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page], self, len(rows) > self.per_page, False, number=1)
+
+    def page_after(self, values):
+        rows = list(self.queryset.filter(self._seek(values, True)).order_by(*self.ordering)[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page], self, len(rows) > self.per_page, True)
+
+    def page_before(self, values):
+        rows = list(
+            self.queryset.filter(self._seek(values, False)).order_by(*self._reversed_ordering())[:self.per_page + 1]
+        )
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return CursorPage(rows, self, True, has_previous)
+
+    def numbered_page(self, number):
+        # Legacy ?page=N: one OFFSET query, no COUNT
+        offset = (number - 1) * self.per_page
+        rows = list(self.queryset.order_by(*self.ordering)[offset:offset + self.per_page + 1])
+        if not rows and number > 1:
+            return self.first_page()
+        return CursorPage(rows[:self.per_page], self, len(rows) > self.per_page, number > 1, number=number)
+
+    def get_page(self, cursor=None, page=None):
+        if cursor:
+            try:
+                values, direction = self.decode_cursor(cursor)
+            except InvalidCursor:
+                return self.first_page()
+            if direction == PREVIOUS:
+                return self.page_before(values)
+            return self.page_after(values)
+        try:
+            number = int(page)
+        except (TypeError, ValueError):
+            number = 1
+        if number > 1:
+            return self.numbered_page(number)
+        return self.first_page()
+
+
+def cursor_paginate(request, queryset, per_page, ordering=("-created", "-pk")):
+    paginator = CursorPaginator(queryset, per_page, ordering)
+    return paginator.get_page(cursor=request.GET.get("cursor"), page=request.GET.get("page"))
+
+
+# ==================================================
+# ESTIMATED COUNTS (admin changelists on big tables)
+# ==================================================
+# The admin paginator runs an exact COUNT(*) on every changelist, which
+# reads the whole table on PostgreSQL. An unfiltered list uses the
+# planner's row estimate instead; a filtered one counts at most
+# EXACT_COUNT_LIMIT rows, and deeper pages are reached by narrowing the
+# filters or the date drill-down rather than by paging.
+EXACT_COUNT_LIMIT = getattr(settings, "BLOG_ADMIN_EXACT_COUNT_LIMIT", 10000)
+
+
+def estimated_count(model, using="default"):
+    """The planner's row estimate for ``model``'s table, or None where there is none."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 until the table has been vacuumed/analyzed once
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > EXACT_COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:EXACT_COUNT_LIMIT].count()
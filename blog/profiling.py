@@ -0,0 +1,179 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoBackendTemplate
+from django.utils.functional import empty
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# REQUEST PROFILING (SQL, duplicates, templates -> Server-Timing + slow logs)
+# ==================================================
+# A sampled request gets a RequestProfile in a context variable. A DB
+# execute wrapper (on every connection) and the patched template backend
+# add to it, and the middleware turns it into a Server-Timing header and,
+# for slow requests, one JSON log line. Unsampled requests only pay for
+# a random() call.
+SAMPLE_RATE = getattr(settings, "BLOG_PROFILING_SAMPLE_RATE", 0.05)
+SLOW_MS = getattr(settings, "BLOG_PROFILING_SLOW_MS", 500)
+SERVER_TIMING = getattr(settings, "BLOG_PROFILING_SERVER_TIMING", settings.DEBUG)
+DUPLICATE_THRESHOLD = 2
+LOG_PREFIX = "slow-request "
+
+_profile = ContextVar("blog_request_profile", default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.fingerprints = Counter()
+        self._template_depth = 0
+
+    def duplicates(self, limit=5):
+        return [
+            {"fingerprint": fp, "count": count}
+            for fp, count in self.fingerprints.most_common(limit)
+            if count >= DUPLICATE_THRESHOLD
+        ]
+
+
+# ----- SQL fingerprints -----
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?|\$\d+)\s*,)+\s*(?:%s|\?|\$\d+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Same query shape, different values -> same string (how N+1 loops show up)."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def record_query(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.sql_ms += (time.perf_counter() - start) * 1000
+        profile.queries += 1
+        profile.fingerprints[fingerprint(sql)] += 1
+
+
+# ----- template render time -----
+_original_render = DjangoBackendTemplate.render
+
+
+def _timed_render(self, context=None, request=None):
+    profile = _profile.get()
+    if profile is None:
+        return _original_render(self, context, request)
+    # render_to_string() inside a render would be counted twice; only time the outermost
+    profile._template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        profile._template_depth -= 1
+        if not profile._template_depth:
+            profile.template_ms += (time.perf_counter() - start) * 1000
+
+
+def install_template_timing():
+    DjangoBackendTemplate.render = _timed_render
+
+
+# ----- middleware -----
+class RequestProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timing()
+
+    def __call__(self, request):
+        if random.random() >= SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        if SERVER_TIMING or is_staff(request):
+            response["Server-Timing"] = server_timing(profile, total_ms)
+        if total_ms >= SLOW_MS:
+            logger.warning(LOG_PREFIX + "%s", json.dumps(log_record(request, response, profile, total_ms)))
+        return response
+
+
+def is_staff(request):
+    """
+    Whether the visitor is staff, without loading a session or user the
+    view never touched: no session cookie and an unresolved lazy user means
+    anonymous. ``request.user`` is missing on requests rejected before
+    AuthenticationMiddleware (e.g. a DisallowedHost 400).
+    """
+    user = getattr(request, "user", None)
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES and getattr(user, "_wrapped", None) is empty:
+        return False
+    return getattr(user, "is_staff", False)
+
+
+def server_timing(profile, total_ms):
+    duplicated = sum(count - 1 for count in profile.fingerprints.values() if count >= DUPLICATE_THRESHOLD)
+    return ", ".join([
+        f'db;dur={profile.sql_ms:.1f};desc="{profile.queries} queries"',
+        f'dup;desc="{duplicated} duplicated queries"',
+        f"tpl;dur={profile.template_ms:.1f}",
+        f"total;dur={total_ms:.1f}",
+    ])
+
+
+def log_record(request, response, profile, total_ms):
+    match = request.resolver_match
+    return {
+        "view": match.url_name if match else None,
+        "method": request.method,
+        "path": request.path,
+        "status": response.status_code,
+        "total_ms": round(total_ms, 1),
+        "sql_ms": round(profile.sql_ms, 1),
+        "queries": profile.queries,
+        "template_ms": round(profile.template_ms, 1),
+        "duplicates": profile.duplicates(),
+        "context": sorted(getattr(request, "blog_context_evaluated", ())),
+        "page_cache": response.get("X-Page-Cache"),
+    }
+
+
+def parse_log_line(line):
+    """The JSON record of a slow-request line, whatever the formatter put in front."""
+    _before, marker, record = line.partition(LOG_PREFIX)
+    if not marker:
+        return None
+    try:
+        return json.loads(record)
+    except ValueError:
+        return None
@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.translation import gettext as _
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# RATE LIMITING (token buckets on the write endpoints)
+# ==================================================
+# Every scope (comment, like, subscribe) has a budget of ``capacity``
+# requests that refills evenly over ``period`` seconds. A request spends
+# one token from the bucket of its IP and one from the bucket of its
+# session cookie, if it sends one (logged-in users always do); either
+# bucket running dry rejects it with a 429 before the view, the session or
+# the user is loaded, so a rejected request costs no database query.
+# Buckets live in the default cache so all workers share them; a cache
+# read/modify/write can race and let a burst through by a token or two,
+# which is fine for shedding load. If the cache errors, buckets fall back
+# to this process's memory until it answers again.
+RATE_LIMITS = getattr(settings, "BLOG_RATE_LIMITS", {
+    "comment": (5, 60),
+    "like": (30, 60),
+    "subscribe": (3, 600),
+})
+# META key of the client address set by a trusted reverse proxy, e.g. "HTTP_X_FORWARDED_FOR"
+CLIENT_IP_HEADER = getattr(settings, "BLOG_CLIENT_IP_HEADER", None)
+LIKE_DEDUP_TIMEOUT = getattr(settings, "BLOG_LIKE_DEDUP_TIMEOUT", 60 * 60 * 24)
+BUCKET_KEY = "blog:ratelimit:{scope}:{client}"
+LIKE_KEY = "blog:liked:{client}:{comment}"
+MEMORY_MAX_KEYS = 10000
+
+
+class TokenBucket:
+    """``capacity`` requests at once, refilled at ``capacity / period`` tokens per second."""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+
+    def take(self, state, now):
+        """(allowed, new state, seconds until a token is back) from the stored ``(tokens, at)`` state."""
+        tokens, at = state or (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - at) * self.rate)
+        if tokens >= 1:
+            return True, (tokens - 1, now), 0
+        return False, (tokens, now), (1 - tokens) / self.rate
+
+
+class MemoryStore:
+    """Per-process fallback: bucket states and seen keys in a bounded LRU dict."""
+
+    def __init__(self, max_keys=MEMORY_MAX_KEYS):
+        self.max_keys = max_keys
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _set(self, key, value, expires):
+        self._values[key] = (value, expires)
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_keys:
+            self._values.popitem(last=False)
+
+    def _get(self, key, now):
+        value, expires = self._values.get(key, (None, 0))
+        return value if expires > now else None
+
+    def consume(self, key, bucket, now):
+        with self._lock:
+            allowed, state, wait = bucket.take(self._get(key, now), now)
+            self._set(key, state, now + bucket.period)
+        return allowed, wait
+
+    def add(self, key, timeout):
+        now = time.time()
+        with self._lock:
+            if self._get(key, now) is not None:
+                return False
+            self._set(key, True, now + timeout)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class CacheStore:
+    """Buckets shared by every worker through the default cache."""
+
+    def consume(self, key, bucket, now):
+        allowed, state, wait = bucket.take(cache.get(key), now)
+        cache.set(key, state, math.ceil(bucket.period))
+        return allowed, wait
+
+    def add(self, key, timeout):
+        return cache.add(key, True, timeout)
+
+
+class RateLimiter:
+    def __init__(self, limits=None):
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.cache_store = CacheStore()
+        self.memory_store = MemoryStore()
+        self.enabled = True
+
+    def _call(self, method, *args):
+        try:
+            return getattr(self.cache_store, method)(*args)
+        except Exception:
+            logger.warning("Rate limit cache unavailable, using process memory", exc_info=True)
+            return getattr(self.memory_store, method)(*args)
+
+    def check(self, request, scope):
+        """Spend a token of ``scope`` for ``request``; returns 0, or the seconds to wait when rejected."""
+        if not self.enabled or self.limits.get(scope) is None:
+            return 0
+        bucket = TokenBucket(*self.limits[scope])
+        now = time.time()
+        wait = 0
+        for client in client_keys(request):
+            allowed, client_wait = self._call("consume", BUCKET_KEY.format(scope=scope, client=client), bucket, now)
+            if not allowed:
+                wait = max(wait, client_wait)
+        return wait
+
+    def first_time(self, key, timeout):
+        """True the first time ``key`` is seen within ``timeout`` seconds."""
+        return self._call("add", key, timeout)
+
+    @contextmanager
+    def disabled(self):
+        # For benchmarks that replay one client far past any budget
+        enabled, self.enabled = self.enabled, False
+        try:
+            yield
+        finally:
+            self.enabled = enabled
+
+
+limiter = RateLimiter()
+
+
+def client_ip(request):
+    if CLIENT_IP_HEADER and request.META.get(CLIENT_IP_HEADER):
+        # The first address is the client; proxies append theirs
+        return request.META[CLIENT_IP_HEADER].split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def client_keys(request):
+    """The client's IP, plus its session cookie (hashed) when it sends one; read without any query."""
+    keys = [f"ip:{client_ip(request)}"]
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session:
+        keys.append("session:" + hashlib.md5(session.encode()).hexdigest())
+    return keys
+
+
+def too_many_requests(wait):
+    response = HttpResponse(
+        _("Too many requests. Please try again in a moment."), status=429, content_type="text/plain; charset=utf-8"
+    )
+    response["Retry-After"] = str(max(1, math.ceil(wait)))
+    return response
+
+
+def rate_limit(scope, methods=("POST",)):
+    """Reject ``methods`` requests over the ``scope`` budget before the view (or any decorator below it) runs."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                wait = limiter.check(request, scope)
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def first_like(request, comment_id):
+    """True once per comment per session (or per IP without a session cookie) within LIKE_DEDUP_TIMEOUT."""
+    client = client_keys(request)[-1]
+    return limiter.first_time(LIKE_KEY.format(client=client, comment=comment_id), LIKE_DEDUP_TIMEOUT)
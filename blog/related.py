@@ -0,0 +1,270 @@
+import heapq
+import math
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Post, RelatedPost
+from .page_cache import purge_tags
+
+
+# ==================================================
+# RELATED POSTS (sparse tag/category/title similarity, top-K table)
+# ==================================================
+# score(p, q) = cosine of the idf-weighted tag vectors of p and q
+#             + CATEGORY_WEIGHT if they share a category
+#             + TITLE_WEIGHT * Jaccard overlap of their title words
+# The candidates of p are the posts sharing an informative tag with it
+# (found through the tag -> posts inverted index, never a pairwise scan)
+# plus the newest posts of its category, so small or untagged posts still
+# get neighbours. The score is symmetric, which is what lets one post's
+# change be pushed into its neighbours' lists without rescoring them.
+RELATED_LIMIT = getattr(settings, "BLOG_RELATED_POSTS", 5)
+CATEGORY_WEIGHT = 0.3
+TITLE_WEIGHT = getattr(settings, "BLOG_RELATED_TITLE_WEIGHT", 0.2)
+# Tags on more posts than this say little and would make scoring quadratic
+MAX_TAG_POSTS = getattr(settings, "BLOG_RELATED_MAX_TAG_POSTS", 5000)
+# Incremental updates offer the changed post to this many of its best candidates
+REVERSE_LIMIT = 200
+# One change touching more posts than this (tag.post_set.add(...)) rebuilds everything instead
+REBUILD_AFTER = getattr(settings, "BLOG_RELATED_REBUILD_AFTER", 100)
+BATCH_SIZE = 5000
+
+WORD_RE = re.compile(r"\w{3,}")
+STOP_WORDS = frozenset(
+    "the and for with how you your are from this that what why into kwa na ya wa za la cha vya ni katika".split()
+)
+
+
+def title_terms(*titles):
+    return frozenset(
+        word for title in titles if title for word in WORD_RE.findall(title.lower()) if word not in STOP_WORDS
+    )
+
+
+class Features:
+    """Tags, category and title words of a set of posts, plus tag document frequencies."""
+
+    def __init__(self, total):
+        self.total = total
+        self.tags = defaultdict(set)
+        self.category = {}
+        self.terms = {}
+        self.df = {}
+        self._norms = {}
+
+    def add_post(self, pk, category_id, title_en, title_sw):
+        self.category[pk] = category_id
+        self.terms[pk] = title_terms(title_en, title_sw) if TITLE_WEIGHT else frozenset()
+
+    def informative(self, tag):
+        return 1 < self.df.get(tag, 0) <= MAX_TAG_POSTS
+
+    def weight(self, tag):
+        """Squared idf: what one shared tag adds to the dot product."""
+        return math.log((1 + self.total) / self.df[tag]) ** 2
+
+    def norm(self, pk):
+        if pk not in self._norms:
+            self._norms[pk] = math.sqrt(sum(self.weight(tag) for tag in self.tags[pk] if self.informative(tag)))
+        return self._norms[pk]
+
+    def inverse_norm(self, pk):
+        norm = self.norm(pk)
+        return 1 / norm if norm else 0.0
+
+    def title_overlap(self, p, q):
+        if not (self.terms[p] and self.terms[q]):
+            return 0.0
+        return len(self.terms[p] & self.terms[q]) / len(self.terms[p] | self.terms[q])
+
+    def rank(self, pk, cosines, limit=None):
+        """[(score, q)] best first; ``cosines`` maps every candidate q to its tag cosine with pk."""
+        category, categories = self.category[pk], self.category
+        scored = [
+            (cosine + CATEGORY_WEIGHT, q) if categories[q] == category else (cosine, q)
+            for q, cosine in cosines.items()
+            if q != pk
+        ]
+        if TITLE_WEIGHT and self.terms[pk]:
+            if limit and len(scored) > limit:
+                # Title words add at most TITLE_WEIGHT, so anything further behind cannot make the list
+                cutoff = heapq.nlargest(limit, scored)[-1][0] - TITLE_WEIGHT
+                scored = [(score, q) for score, q in scored if score >= cutoff]
+            scored = [(score + TITLE_WEIGHT * self.title_overlap(pk, q), q) for score, q in scored]
+        scored = [(score, q) for score, q in scored if score > 0]
+        # Ties go to the newer post (higher id)
+        return heapq.nlargest(limit, scored) if limit else sorted(scored, reverse=True)
+
+    def cosines(self, pk, shared):
+        """{q: cosine} from ``shared`` (q, tag) pairs of informative tags pk and q have in common."""
+        inverse = self.inverse_norm(pk)
+        cosines = defaultdict(float)
+        for q, tag in shared:
+            cosines[q] += self.weight(tag) * inverse * self.inverse_norm(q)
+        return cosines
+
+
+def links(pk, ranked):
+    return [RelatedPost(post_id=pk, related_id=q, score=score, rank=rank) for rank, (score, q) in enumerate(ranked)]
+
+
+# ==================================================
+# BULK REBUILD (whole corpus in memory)
+# ==================================================
+def rebuild(limit=RELATED_LIMIT):
+    """Recompute every list from scratch; returns (posts, rows written)."""
+    published = Post.objects.filter(is_published=True)
+    features = Features(published.count())
+    newest_in_category = defaultdict(list)
+    for pk, category_id, title_en, title_sw in (
+        published.order_by("-pk").values_list("pk", "category_id", "title_en", "title_sw").iterator(chunk_size=BATCH_SIZE)
+    ):
+        features.add_post(pk, category_id, title_en, title_sw)
+        if len(newest_in_category[category_id]) <= limit:
+            newest_in_category[category_id].append(pk)
+
+    # Inverted index: tag -> posts
+    postings = defaultdict(list)
+    through = Post.tags.through
+    pairs = through.objects.filter(post__is_published=True).values_list("post_id", "tag_id")
+    for post_id, tag_id in pairs.iterator(chunk_size=BATCH_SIZE):
+        postings[tag_id].append(post_id)
+        features.tags[post_id].add(tag_id)
+    features.df = {tag: len(posts) for tag, posts in postings.items()}
+    weights = {tag: features.weight(tag) for tag in postings if features.informative(tag)}
+
+    # Each posting carries w(tag) / |q|, so one pass of additions gives |p| * cosine
+    weighted = {
+        tag: [(q, weight * features.inverse_norm(q)) for q in postings[tag]] for tag, weight in weights.items()
+    }
+
+    written = 0
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        batch = []
+        for pk in features.category:
+            # Sparse dot products: walk the postings of p's tags only
+            cosines = defaultdict(float)
+            for tag in features.tags[pk]:
+                for q, value in weighted.get(tag, ()):
+                    cosines[q] += value
+            inverse = features.inverse_norm(pk)
+            cosines = {q: value * inverse for q, value in cosines.items()}
+            for q in newest_in_category[features.category[pk]]:
+                cosines.setdefault(q, 0.0)
+            batch += links(pk, features.rank(pk, cosines, limit))
+            if len(batch) >= BATCH_SIZE:
+                RelatedPost.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        RelatedPost.objects.bulk_create(batch)
+        written += len(batch)
+    purge_tags("related")
+    return len(features.category), written
+
+
+# ==================================================
+# INCREMENTAL UPDATE (one post's tags/category/title changed)
+# ==================================================
+def refresh_post(pk, limit=RELATED_LIMIT):
+    """
+    Recompute the list of post ``pk`` and offer it to the lists of its best
+    candidates (and drop it from lists where it no longer belongs). Other
+    lists are not rescored, so they can drift a little until the next
+    rebuild_related_posts run.
+    """
+    post = Post.objects.filter(pk=pk, is_published=True).values_list("category_id", "title_en", "title_sw").first()
+    listed_by = set(RelatedPost.objects.filter(related_id=pk).values_list("post_id", flat=True))
+    if post is None:
+        with transaction.atomic():
+            RelatedPost.objects.filter(Q(post_id=pk) | Q(related_id=pk)).delete()
+        purge_tags(*(f"post:{q}" for q in listed_by | {pk}))
+        return []
+
+    through = Post.tags.through
+    published_tags = through.objects.filter(post__is_published=True)
+    features = Features(Post.objects.filter(is_published=True).count())
+
+    own_tags = set(through.objects.filter(post_id=pk).values_list("tag_id", flat=True))
+    features.df = dict(published_tags.filter(tag_id__in=own_tags).values_list("tag_id").annotate(n=Count("pk")))
+    shared = list(
+        published_tags.filter(tag_id__in=[tag for tag in own_tags if features.informative(tag)])
+        .exclude(post_id=pk).values_list("post_id", "tag_id")
+    )
+    newest = (
+        Post.objects.filter(is_published=True, category_id=post[0]).exclude(pk=pk)
+        .order_by("-pk").values_list("pk", flat=True)[:limit]
+    )
+
+    # The candidates' own tags (for their norms) and categories/titles
+    candidates = {q for q, _tag in shared} | set(newest) | listed_by
+    features.add_post(pk, *post)
+    features.tags[pk] = own_tags
+    for q, tag in published_tags.filter(post_id__in=candidates).values_list("post_id", "tag_id"):
+        features.tags[q].add(tag)
+    other_tags = {tag for q in candidates for tag in features.tags[q]} - features.df.keys()
+    features.df.update(published_tags.filter(tag_id__in=other_tags).values_list("tag_id").annotate(n=Count("pk")))
+    for q, category_id, title_en, title_sw in (
+        Post.objects.filter(pk__in=candidates, is_published=True).values_list("pk", "category_id", "title_en", "title_sw")
+    ):
+        features.add_post(q, category_id, title_en, title_sw)
+
+    cosines = features.cosines(pk, shared)
+    for q in candidates:
+        if q in features.category:  # published
+            cosines.setdefault(q, 0.0)
+    ranked = features.rank(pk, cosines)
+    scores = {q: score for score, q in ranked}
+    offered = {q for _score, q in ranked[:REVERSE_LIMIT]}
+    changed = {pk}
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id=pk).delete()
+        RelatedPost.objects.bulk_create(links(pk, ranked[:limit]))
+
+        # Push pk into (or out of) the lists of its neighbours
+        affected = offered | listed_by
+        current = defaultdict(list)
+        for row in RelatedPost.objects.filter(post_id__in=affected).exclude(related_id=pk).values_list(
+            "post_id", "related_id", "score"
+        ):
+            current[row[0]].append((row[2], row[1]))
+        rewritten = []
+        for q in affected:
+            entries = current[q]
+            if q in offered:
+                entries = entries + [(scores[q], pk)]
+            entries = heapq.nlargest(limit, entries)
+            was_listed, now_listed = q in listed_by, any(related == pk for _score, related in entries)
+            if was_listed or now_listed:
+                rewritten.append(q)
+                current[q] = entries
+        RelatedPost.objects.filter(post_id__in=rewritten).delete()
+        RelatedPost.objects.bulk_create([link for q in rewritten for link in links(q, current[q])])
+        changed.update(rewritten)
+
+    purge_tags(*(f"post:{q}" for q in changed))
+    return ranked[:limit]
+
+
+def refresh_posts(pks, limit=RELATED_LIMIT):
+    """refresh_post() each of ``pks`` once, or one rebuild() when there are more than REBUILD_AFTER."""
+    pks = sorted(set(pks))
+    if len(pks) > REBUILD_AFTER:
+        rebuild(limit)
+        return
+    for pk in pks:
+        refresh_post(pk, limit)
+
+
+def related_posts(post, lang, limit=RELATED_LIMIT):
+    """The stored neighbours of ``post``: one query on (post, rank)."""
+    return list(
+        Post.objects.for_language(lang).listing()
+        .filter(neighbour_of__post=post, is_published=True)
+        .order_by("neighbour_of__rank")[:limit]
+    )
@@ -0,0 +1,80 @@
+import math
+
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+
+# ==================================================
+# PRE-RENDERED POST BODIES (HTML, excerpt, reading time)
+# ==================================================
+# The body HTML used to be produced by ``{{ content|linebreaks }}`` on every
+# page view. It only changes when the content does, so Post.save() renders
+# it once into dedicated columns; bulk writers (imports, seeding) call
+# Post.render_content() themselves and render_posts backfills old rows.
+EXCERPT_CHARS = 160
+WORDS_PER_MINUTE = 200
+
+# content field -> the columns derived from it
+RENDERED_FIELDS = {
+    "content_en": ("content_html_en", "excerpt_en", "reading_time"),
+    "content_sw": ("content_html_sw", "excerpt_sw"),
+}
+
+
+def render_body(text):
+    """Exactly what ``{{ text|linebreaks }}`` outputs with autoescaping on."""
+    return linebreaks(text or "", autoescape=True)
+
+
+def make_excerpt(text, chars=EXCERPT_CHARS):
+    """Plain text, whitespace collapsed, cut at ``chars`` characters."""
+    # Only the head matters: collapsing a whole 50 KB body costs as much as rendering it
+    return Truncator(" ".join((text or "")[:chars * 4].split())).chars(chars)
+
+
+def reading_minutes(text, words_per_minute=WORDS_PER_MINUTE):
+    words = len((text or "").split())
+    return max(1, math.ceil(words / words_per_minute)) if words else 0
+
+
+def rendered_values(content_en=None, content_sw=None):
+    """Column values derived from whichever content fields are given."""
+    values = {}
+    if content_en is not None:
+        values.update(
+            content_html_en=render_body(content_en),
+            excerpt_en=make_excerpt(content_en),
+            reading_time=reading_minutes(content_en),
+        )
+    if content_sw is not None:
+        values.update(
+            content_html_sw=render_body(content_sw),
+            excerpt_sw=make_excerpt(content_sw),
+        )
+    return values
+
+
+def backfill(model, chunk_size=500, only_missing=False, on_batch=None):
+    """
+    Re-render every post of ``model`` in pk order with bulk_update;
+    ``on_batch`` gets the pks of each written batch. Returns the rows written.
+    """
+    fields = [name for columns in RENDERED_FIELDS.values() for name in columns]
+    queryset = model.objects.order_by("pk")
+    if only_missing:
+        queryset = queryset.filter(content_html_en="")
+    total = 0
+    last_pk = 0
+    while True:
+        # Keyset batches, so rows written in one batch never shift the next
+        batch = list(queryset.filter(pk__gt=last_pk).only("pk", "content_en", "content_sw")[:chunk_size])
+        if not batch:
+            return total
+        for post in batch:
+            for name, value in rendered_values(post.content_en, post.content_sw or "").items():
+                setattr(post, name, value)
+        model.objects.bulk_update(batch, fields)
+        if on_batch is not None:
+            on_batch([post.pk for post in batch])
+        total += len(batch)
+        last_pk = batch[-1].pk
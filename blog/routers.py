@@ -0,0 +1,188 @@
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+
+# ==================================================
+# READ REPLICAS (primary/replica routing with read-your-writes stickiness)
+# ==================================================
+# Reads of blog models during a web request go to one healthy replica
+# (picked once per request); every write, and every read of the other
+# apps (sessions, users, admin log), goes to the primary ("default").
+# A request is pinned to the primary for the rest of its life once it
+# writes, when it is a POST/PUT/PATCH/DELETE, or while a transaction is
+# open on the primary. A request that wrote answers with a short-lived
+# cookie that pins that visitor's next requests too, until the replicas
+# have caught up with what they just posted. Outside a request (management
+# commands, the counter flusher thread) everything uses the primary.
+#
+# Replicas are probed at most every CHECK_INTERVAL seconds per process: one
+# that cannot be reached or lags more than MAX_LAG is skipped until a later
+# probe finds it back; with none left, reads fall back to the primary.
+# Locally: DATABASE_URL=sqlite:///primary.sqlite3 and
+# DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3, where the replica is a
+# copy of the primary file, then `manage.py check_replicas`.
+REPLICAS = getattr(settings, "BLOG_DATABASE_REPLICAS", [])
+READ_APPS = {"blog"}
+STICKY_SECONDS = getattr(settings, "BLOG_REPLICA_STICKY_SECONDS", 15)
+STICKY_COOKIE = "blog_primary"
+MAX_LAG = getattr(settings, "BLOG_REPLICA_MAX_LAG", 5)
+CHECK_INTERVAL = getattr(settings, "BLOG_REPLICA_CHECK_INTERVAL", 10)
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Seconds the replica is behind, 0 when it has replayed everything it received
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class RoutingState:
+    """Where the current request reads from."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+
+_state = ContextVar("blog_db_routing", default=None)
+
+
+# ----- replica health -----
+class ReplicaHealth:
+    """Per-process probe results: alias -> (healthy, lag seconds, checked at)."""
+
+    def __init__(self, check_interval=CHECK_INTERVAL, max_lag=MAX_LAG):
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        with self._lock:
+            healthy, lag, checked = self._results.get(alias, (None, None, 0))
+            if time.monotonic() - checked < self.check_interval:
+                return healthy
+            # Other threads keep the old answer while this one probes
+            self._results[alias] = (healthy, lag, time.monotonic())
+        return self.probe(alias)[0]
+
+    def probe(self, alias):
+        """Connect to ``alias`` and measure its lag now; returns (healthy, lag)."""
+        try:
+            lag = replication_lag(connections[alias])
+            healthy = lag <= self.max_lag
+        except Exception:
+            logger.warning("Replica %s unreachable", alias, exc_info=True)
+            healthy, lag = False, None
+        with self._lock:
+            was_healthy = self._results.get(alias, (None,))[0]
+            self._results[alias] = (healthy, lag, time.monotonic())
+        if was_healthy and not healthy and lag is not None:
+            logger.warning("Replica %s is %.1fs behind, reading from elsewhere", alias, lag)
+        elif was_healthy is False and healthy:
+            logger.info("Replica %s is back", alias)
+        return healthy, lag
+
+    def mark_down(self, alias):
+        """Skip ``alias`` until its next probe is due."""
+        with self._lock:
+            self._results[alias] = (False, None, time.monotonic())
+
+    def status(self):
+        with self._lock:
+            return {alias: result[:2] for alias, result in self._results.items()}
+
+    def reset(self):
+        with self._lock:
+            self._results.clear()
+
+
+def replication_lag(connection):
+    """Seconds ``connection`` is behind its primary (0 where the backend cannot tell)."""
+    connection.ensure_connection()
+    if connection.vendor != "postgresql":
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        return float(cursor.fetchone()[0] or 0)
+
+
+health = ReplicaHealth()
+
+
+def healthy_replicas():
+    return [alias for alias in REPLICAS if health.is_healthy(alias)]
+
+
+# ----- router -----
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or state.pinned
+            or model._meta.app_label not in READ_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        if state.replica is None:
+            replicas = healthy_replicas()
+            state.replica = random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        pool = {DEFAULT_DB_ALIAS, *REPLICAS}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in REPLICAS
+
+
+# ----- middleware -----
+def sticky_until(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0))
+    except ValueError:
+        return 0
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = request.method in UNSAFE_METHODS or sticky_until(request) > time.time()
+        state = RoutingState(pinned=pinned)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and request.method in UNSAFE_METHODS:
+            response.set_cookie(
+                STICKY_COOKIE, str(int(time.time() + STICKY_SECONDS)),
+                max_age=STICKY_SECONDS, httponly=True, samesite="Lax",
+            )
+        return response
@@ -0,0 +1,185 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+
+# ==================================================
+# SEARCH BACKENDS
+# ==================================================
+# Every backend returns the ids of matching published posts, best match
+# first (drafts too with published_only=False, for the admin). Titles weigh
+# more than bodies. The index lives next to blog_post and is created by
+# migration 0004 (on PostgreSQL it is the PostSearchDocument model's
+# table, so flush truncates it with blog_post); signals keep it in sync on
+# save/delete.
+MAX_RESULTS = getattr(settings, "BLOG_SEARCH_MAX_RESULTS", 500)
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class BaseSearchBackend:
+    def __init__(self, using="default"):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def search(self, query, limit=MAX_RESULTS, published_only=True):
+        raise NotImplementedError
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """Fallback for databases without a full-text engine: unranked icontains scan."""
+
+    def search(self, query, limit=MAX_RESULTS, published_only=True):
+        posts = Post.objects.using(self.using)
+        if published_only:
+            posts = posts.filter(is_published=True)
+        return list(
+            posts.filter(
+                Q(title_en__icontains=query) |
+                Q(title_sw__icontains=query) |
+                Q(content_en__icontains=query) |
+                Q(content_sw__icontains=query)
+            )
+            .order_by("-created")
+            .values_list("pk", flat=True)[:limit]
+        )
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    # bm25 weights follow the column order: title_en, title_sw, content_en, content_sw
+    RANK = "bm25(blog_post_fts, 10.0, 10.0, 1.0, 1.0)"
+
+    @staticmethod
+    def match_expression(query):
+        # Quote every word so user input can never be parsed as FTS5 syntax
+        words = WORD_RE.findall(query)
+        return " ".join('"%s"*' % word.replace('"', '""') for word in words)
+
+    def search(self, query, limit=MAX_RESULTS, published_only=True):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        published = "AND blog_post.is_published" if published_only else ""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT blog_post_fts.rowid FROM blog_post_fts
+                JOIN blog_post ON blog_post.id = blog_post_fts.rowid
+                WHERE blog_post_fts MATCH %s {published}
+                ORDER BY {self.RANK}, blog_post.created DESC
+                LIMIT %s
+                """,
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index(self, post):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM blog_post_fts WHERE rowid = %s", [post.pk])
+            cursor.execute(
+                "INSERT INTO blog_post_fts (rowid, title_en, title_sw, content_en, content_sw) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [post.pk, post.title_en, post.title_sw or "", post.content_en, post.content_sw or ""],
+            )
+
+    def remove(self, post_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM blog_post_fts WHERE rowid = %s", [post_id])
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM blog_post_fts")
+            cursor.execute(
+                "INSERT INTO blog_post_fts (rowid, title_en, title_sw, content_en, content_sw) "
+                "SELECT id, title_en, COALESCE(title_sw, ''), content_en, COALESCE(content_sw, '') "
+                "FROM blog_post"
+            )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    # Postgres ships no Swahili dictionary, so Swahili text is only lower-cased/split
+    CONFIGS = getattr(settings, "BLOG_SEARCH_CONFIGS", {"en": "english", "sw": "simple"})
+
+    def documents_sql(self):
+        en, sw = self.CONFIGS["en"], self.CONFIGS["sw"]
+        return (
+            f"setweight(to_tsvector('{en}', COALESCE(title_en, '')), 'A') || "
+            f"setweight(to_tsvector('{en}', COALESCE(content_en, '')), 'B'), "
+            f"setweight(to_tsvector('{sw}', COALESCE(title_sw, '')), 'A') || "
+            f"setweight(to_tsvector('{sw}', COALESCE(content_sw, '')), 'B')"
+        )
+
+    def search(self, query, limit=MAX_RESULTS, published_only=True):
+        en, sw = self.CONFIGS["en"], self.CONFIGS["sw"]
+        published = "p.is_published AND" if published_only else ""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT s.post_id
+                FROM blog_post_search s
+                JOIN blog_post p ON p.id = s.post_id,
+                     websearch_to_tsquery('{en}', %s) q_en,
+                     websearch_to_tsquery('{sw}', %s) q_sw
+                WHERE {published} (s.document_en @@ q_en OR s.document_sw @@ q_sw)
+                ORDER BY GREATEST(ts_rank(s.document_en, q_en), ts_rank(s.document_sw, q_sw)) DESC,
+                         p.created DESC
+                LIMIT %s
+                """,
+                [query, query, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index(self, post):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO blog_post_search (post_id, document_en, document_sw)
+                SELECT id, {self.documents_sql()} FROM blog_post WHERE id = %s
+                ON CONFLICT (post_id) DO UPDATE
+                SET document_en = EXCLUDED.document_en, document_sw = EXCLUDED.document_sw
+                """,
+                [post.pk],
+            )
+
+    def remove(self, post_id):
+        # PostSearchDocument's row is deleted with the post (CASCADE); nothing else to do
+        pass
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("TRUNCATE blog_post_search")
+            cursor.execute(
+                f"INSERT INTO blog_post_search (post_id, document_en, document_sw) "
+                f"SELECT id, {self.documents_sql()} FROM blog_post"
+            )
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTS5SearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(using="default"):
+    path = getattr(settings, "BLOG_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)(using)
+    backend = VENDOR_BACKENDS.get(connections[using].vendor, ContainsSearchBackend)
+    return backend(using)
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .models import Post, Category
+from .tags import tag_cloud
+from .trending import trending_posts
+
+
+# ==================================================
+# SIDEBAR SNAPSHOT (Categories + Popular Posts)
+# ==================================================
+# The sidebar is rendered on nearly every page, so it is computed in a
+# fixed number of queries and kept in the cache per language until a
+# Post, Category or Tag changes (see blog/signals.py).
+SIDEBAR_CACHE_KEY = "blog:sidebar:{lang}"
+SIDEBAR_CACHE_TIMEOUT = getattr(settings, "BLOG_SIDEBAR_CACHE_TIMEOUT", 300)
+POPULAR_POSTS_LIMIT = 5
+
+
+def build_sidebar_snapshot(lang):
+    published = Post.objects.filter(is_published=True)
+
+    # 1 query: categories with published posts (a stored count) + id of their oldest post
+    first_post_id = published.filter(category=OuterRef("pk")).order_by("created").values("pk")[:1]
+    categories = list(
+        Category.objects.filter(published_post_count__gt=0).annotate(first_post_id=Subquery(first_post_id))
+    )
+
+    # 1 query: the first posts themselves (only linked to)
+    first_posts = published.only("slug").in_bulk([category.first_post_id for category in categories])
+
+    # 1 query (2 while trending data is thin): trending posts
+    popular_posts = trending_posts(
+        published.for_language(lang).only("slug", "views"), limit=POPULAR_POSTS_LIMIT
+    )
+
+    # 1 query: the tag cloud, from the precomputed per-language counts
+    cloud = tag_cloud(lang)
+
+    return {
+        "categories": [
+            {
+                "category": category,
+                "first_post": first_posts[category.first_post_id],
+                "count": category.published_post_count,
+            }
+            for category in categories
+            if category.first_post_id in first_posts
+        ],
+        "popular_posts": popular_posts,
+        "tag_cloud": cloud,
+    }
+
+
+def get_sidebar_snapshot(lang):
+    key = SIDEBAR_CACHE_KEY.format(lang=lang)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_sidebar_snapshot(lang)
+        cache.set(key, snapshot, SIDEBAR_CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_sidebar():
+    cache.delete_many([SIDEBAR_CACHE_KEY.format(lang=code) for code, _name in settings.LANGUAGES])
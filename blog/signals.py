@@ -0,0 +1,279 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import Post, Category, Comment, PostTag, RelatedPost, Tag
+from .sidebar import invalidate_sidebar
+from .search import get_search_backend
+from .page_cache import purge_tags
+from .syndication import sitemap_tags
+from .images import delete_derivatives, refresh_featured_image
+from .related import refresh_post, refresh_posts
+from .tags import count_tag_stats, sync_post_tags
+from .totals import move_comment, move_post, recount_categories, recount_posts
+
+
+# ==================================================
+# IMAGE DERIVATIVES
+# ==================================================
+# Registered before the cache receivers below so pages are purged only
+# after the new width/height/placeholder are stored.
+@receiver(post_init, sender=Post)
+def remember_featured_image(sender, instance, **kwargs):
+    if "featured_image" in instance.__dict__:
+        instance._original_featured_image = instance.featured_image.name or ""
+        instance._original_featured_image_width = instance.__dict__.get("featured_image_width")
+
+
+@receiver(post_save, sender=Post)
+def refresh_image_derivatives(sender, instance, **kwargs):
+    original = getattr(instance, "_original_featured_image", None)
+    current = instance.featured_image.name or ""
+    if original is None or original == current:
+        return
+    if original and instance._original_featured_image_width:
+        delete_derivatives(instance.featured_image.storage, original, instance._original_featured_image_width)
+    refresh_featured_image(instance)
+    instance._original_featured_image = current
+    instance._original_featured_image_width = instance.featured_image_width
+
+
+@receiver(post_delete, sender=Post)
+def delete_image_derivatives(sender, instance, **kwargs):
+    if instance.featured_image and instance.featured_image_width:
+        delete_derivatives(instance.featured_image.storage, instance.featured_image.name, instance.featured_image_width)
+
+
+# ==================================================
+# DENORMALISED COUNTS (see blog/totals.py)
+# ==================================================
+# Also registered before the cache receivers, so the sidebar and pages are
+# rebuilt from the new counts. Instances loaded with one of the fields
+# deferred do not know their previous state and are recounted instead.
+COMMENT_COUNT_FIELDS = ("post_id", "parent_id", "approved")
+POST_COUNT_FIELDS = ("category_id", "is_published")
+
+
+def loaded_values(instance, names):
+    if all(name in instance.__dict__ for name in names):
+        return tuple(instance.__dict__[name] for name in names)
+    return None
+
+
+def deleted_with(origin, model):
+    """True when the delete() that removes this row started from ``model`` rows, which go too."""
+    return isinstance(origin, model) or getattr(origin, "model", None) is model
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_counts(sender, instance, **kwargs):
+    instance._original_count_fields = loaded_values(instance, COMMENT_COUNT_FIELDS)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_save(sender, instance, created, **kwargs):
+    current = tuple(getattr(instance, name) for name in COMMENT_COUNT_FIELDS)
+    original = (instance.post_id, None, False) if created else getattr(instance, "_original_count_fields", None)
+    if original is None:
+        recount_posts(Post.objects.filter(pk=instance.post_id))
+    elif original != current:
+        move_comment(original, current)
+    instance._original_count_fields = current
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Post):
+        return
+    original = getattr(instance, "_original_count_fields", None)
+    if original is None:
+        recount_posts(Post.objects.filter(pk=instance.post_id))
+    else:
+        post_id, parent_id, _approved = original
+        move_comment(original, (post_id, parent_id, False))
+
+
+@receiver(post_init, sender=Post)
+def remember_post_counts(sender, instance, **kwargs):
+    instance._original_post_count_fields = loaded_values(instance, POST_COUNT_FIELDS)
+
+
+@receiver(post_save, sender=Post)
+def count_post_on_save(sender, instance, created, **kwargs):
+    current = (instance.category_id, instance.is_published)
+    original = (instance.category_id, False) if created else getattr(instance, "_original_post_count_fields", None)
+    if original is None:
+        # The old category is unknown too; there are few categories
+        recount_categories(Category.objects.all())
+    elif original != current:
+        move_post(original, current)
+    instance._original_post_count_fields = current
+
+
+@receiver(post_delete, sender=Post)
+def count_post_on_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Category):
+        return
+    original = getattr(instance, "_original_post_count_fields", None)
+    if original is None:
+        recount_categories(Category.objects.filter(pk=instance.category_id))
+    else:
+        move_post(original, (original[0], False))
+
+
+# ==================================================
+# SIDEBAR INVALIDATION
+# ==================================================
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_sidebar_on_change(sender, **kwargs):
+    invalidate_sidebar()
+
+
+# ==================================================
+# SEARCH INDEX
+# ==================================================
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+# ==================================================
+# PAGE CACHE PURGING
+# ==================================================
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    # "sidebar" covers every page showing categories/trending posts; the
+    # feeds hang off "listing"/"category:N" and the post's sitemap chunk is purged too
+    purge_tags(
+        f"post:{instance.pk}", f"category:{instance.category_id}", "listing", "sidebar", *sitemap_tags(instance.pk)
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, **kwargs):
+    purge_tags(f"post:{instance.post_id}")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category_pages(sender, instance, **kwargs):
+    purge_tags(f"category:{instance.pk}", "sidebar")
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def purge_tag_pages(sender, instance, **kwargs):
+    # Tag names show on post cards ("listing") and in the tag cloud ("sidebar")
+    purge_tags("listing", "sidebar")
+
+
+# ==================================================
+# RELATED POSTS
+# ==================================================
+# Lists are refreshed once the change commits, so a post saved and tagged in
+# one transaction is scored from its final tags and a rollback costs nothing
+RELATED_FIELDS = ("category_id", "title_en", "title_sw", "is_published")
+
+
+@receiver(post_init, sender=Post)
+def remember_related_fields(sender, instance, **kwargs):
+    instance._original_related_fields = tuple(instance.__dict__.get(name) for name in RELATED_FIELDS)
+
+
+@receiver(post_save, sender=Post)
+def refresh_related_on_save(sender, instance, created, using, **kwargs):
+    current = tuple(getattr(instance, name) for name in RELATED_FIELDS)
+    if created or current != getattr(instance, "_original_related_fields", None):
+        transaction.on_commit(partial(refresh_post, instance.pk), using=using)
+        instance._original_related_fields = current
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_related_on_tags(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if reverse and action == "pre_clear":
+        # tag.post_set.clear() does not say which posts lost the tag
+        instance._cleared_post_ids = list(instance.post_set.values_list("pk", flat=True))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        transaction.on_commit(partial(refresh_post, instance.pk), using=using)
+    else:
+        # tag.post_set.add(...): every post that gained or lost the tag, in one batch
+        pks = set(pk_set or getattr(instance, "_cleared_post_ids", ()))
+        transaction.on_commit(partial(refresh_posts, pks), using=using)
+
+
+@receiver(pre_delete, sender=Post)
+def purge_related_pages(sender, instance, **kwargs):
+    # The rows go with the post (CASCADE); pages that listed it must not keep the link
+    pks = RelatedPost.objects.filter(related=instance).values_list("post_id", flat=True)
+    purge_tags(*(f"post:{pk}" for pk in pks))
+
+
+# ==================================================
+# TAG ARCHIVES + TAG STATS
+# ==================================================
+TAG_FIELDS = ("created", "is_published", "title_sw")
+
+
+@receiver(post_init, sender=Post)
+def remember_tag_fields(sender, instance, **kwargs):
+    instance._original_tag_fields = tuple(instance.__dict__.get(name) for name in TAG_FIELDS)
+
+
+@receiver(post_save, sender=Post)
+def refresh_tags_on_save(sender, instance, created, **kwargs):
+    # A new post has no tags yet; they arrive through m2m_changed below
+    current = tuple(getattr(instance, name) for name in TAG_FIELDS)
+    if created or current == getattr(instance, "_original_tag_fields", None):
+        return
+    links = PostTag.objects.filter(post=instance)
+    links.update(post_created=instance.created, is_published=instance.is_published)
+    count_tag_stats(Tag.objects.filter(pk__in=links.values("tag_id")))
+    instance._original_tag_fields = current
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def refresh_tags_on_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # clear() does not say which rows it removes
+        links = PostTag.objects.filter(**{"tag" if reverse else "post": instance})
+        instance._cleared_tag_links = list(links.values_list("post_id", "tag_id"))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if action == "post_clear":
+        pairs = instance._cleared_tag_links
+        pk_set = {tag_id if not reverse else post_id for post_id, tag_id in pairs}
+    post_ids, tag_ids = ([instance.pk], pk_set) if not reverse else (pk_set, [instance.pk])
+    if action == "post_add":
+        # add()/set() write the rows with bulk_create and the field defaults
+        sync_post_tags(PostTag.objects.filter(post_id__in=post_ids, tag_id__in=tag_ids))
+    count_tag_stats(Tag.objects.filter(pk__in=tag_ids))
+    invalidate_sidebar()
+    purge_tags("listing", "sidebar", *(f"post:{pk}" for pk in post_ids))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    instance._deleted_tag_ids = list(PostTag.objects.filter(post=instance).values_list("tag_id", flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def refresh_tags_on_delete(sender, instance, **kwargs):
+    # The PostTag rows went with the post (CASCADE)
+    if getattr(instance, "_deleted_tag_ids", None):
+        count_tag_stats(Tag.objects.filter(pk__in=instance._deleted_tag_ids))
@@ -29,3 +29,17 @@ document.addEventListener("DOMContentLoaded", function () {
     });
 });
 
+
+// Load more comment threads on the post page
+document.addEventListener("click", function (event) {
+    const button = event.target.closest("[data-load-more]");
+    if (!button) {
+        return;
+    }
+
+    button.disabled = true;
+    fetch(button.dataset.url, { headers: { "X-Requested-With": "XMLHttpRequest" } })
+        .then(function (response) { return response.text(); })
+        .then(function (html) { button.outerHTML = html; })
+        .catch(function () { button.disabled = false; });
+});
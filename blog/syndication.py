@@ -0,0 +1,196 @@
+import hashlib
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator, translation
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Category, Post
+from .page_cache import tag_versions
+
+
+# ==================================================
+# SITEMAPS + FEEDS (per language, cached per chunk)
+# ==================================================
+# Post sitemaps are split by id range: chunk n lists the published posts
+# with n * SITEMAP_CHUNK_SIZE <= id < (n + 1) * SITEMAP_CHUNK_SIZE, so a
+# saved post changes only its own chunk (and the index). Every document is
+# cached with the versions of the page-cache tags it was built from, which
+# blog/signals.py purges; a miss is streamed to the client while it is
+# being written to the cache. Rows come from values_list(), never models.
+SITEMAP_CHUNK_SIZE = getattr(settings, "BLOG_SITEMAP_CHUNK_SIZE", 50000)
+FEED_ITEMS = getattr(settings, "BLOG_FEED_ITEMS", 20)
+CACHE_TIMEOUT = getattr(settings, "BLOG_SYNDICATION_CACHE_TIMEOUT", 60 * 60 * 24)
+SITE_URL = getattr(settings, "BLOG_SITE_URL", "")
+SITE_NAME = "Phil Tech Blog"
+DOCUMENT_KEY = "blog:syndication:{name}:{lang}:{digest}"
+SITEMAP_CONTENT_TYPE = "application/xml; charset=utf-8"
+SLUG_PLACEHOLDER = "__slug__"
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = (
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+)
+
+
+def chunk_of(pk):
+    return pk // SITEMAP_CHUNK_SIZE
+
+
+def sitemap_tags(*pks):
+    """Page-cache tags to purge when the posts ``pks`` change."""
+    return ["sitemap", *{f"sitemap:{chunk_of(pk)}" for pk in pks}]
+
+
+def site_root(request):
+    return (SITE_URL or request.build_absolute_uri("/")).rstrip("/")
+
+
+def localized_paths(name, *args):
+    """``{lang: path}`` of one URL in every language."""
+    paths = {}
+    for code, _name in settings.LANGUAGES:
+        with translation.override(code):
+            paths[code] = reverse(name, args=args)
+    return paths
+
+
+def lastmod(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def url_entry(base, lang, paths, modified=None):
+    parts = [f"<url><loc>{escape(base + paths[lang])}</loc>"]
+    if modified is not None:
+        parts.append(f"<lastmod>{lastmod(modified)}</lastmod>")
+    for code, path in paths.items():
+        parts.append(f'<xhtml:link rel="alternate" hreflang="{code}" href={quoteattr(base + path)}/>')
+    parts.append("</url>\n")
+    return "".join(parts)
+
+
+# ----- documents (generators of str) -----
+def index_sitemap(base, lang):
+    chunks = (
+        Post.objects.filter(is_published=True)
+        .annotate(chunk=F("pk") / SITEMAP_CHUNK_SIZE)
+        .values_list("chunk")
+        .annotate(modified=Max("updated"))
+        .order_by("chunk")
+    )
+    yield XML_HEADER
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    yield f"<sitemap><loc>{escape(base + reverse('sitemap_pages'))}</loc></sitemap>\n"
+    for chunk, modified in chunks:
+        loc = base + reverse("sitemap_posts", args=[chunk])
+        yield f"<sitemap><loc>{escape(loc)}</loc><lastmod>{lastmod(modified)}</lastmod></sitemap>\n"
+    yield "</sitemapindex>\n"
+
+
+def pages_sitemap(base, lang):
+    yield XML_HEADER
+    yield URLSET_OPEN
+    for name in ("home", "about", "contact"):
+        yield url_entry(base, lang, localized_paths(name))
+    category_path = localized_paths("category_posts", SLUG_PLACEHOLDER)
+    slugs = Category.objects.filter(posts__is_published=True).distinct().order_by("slug").values_list("slug", flat=True)
+    for slug in slugs:
+        yield url_entry(base, lang, {code: path.replace(SLUG_PLACEHOLDER, slug) for code, path in category_path.items()})
+    yield "</urlset>\n"
+
+
+def posts_sitemap(base, lang, chunk):
+    posts = (
+        Post.objects.filter(
+            is_published=True, pk__gte=chunk * SITEMAP_CHUNK_SIZE, pk__lt=(chunk + 1) * SITEMAP_CHUNK_SIZE
+        )
+        .order_by("pk")
+        .values_list("slug", "updated")
+    )
+    # reverse() once per language, not once per post
+    post_path = localized_paths("post_detail", SLUG_PLACEHOLDER)
+    yield XML_HEADER
+    yield URLSET_OPEN
+    for slug, updated in posts.iterator(chunk_size=2000):
+        yield url_entry(base, lang, {code: path.replace(SLUG_PLACEHOLDER, slug) for code, path in post_path.items()}, updated)
+    yield "</urlset>\n"
+
+
+def feed(base, lang, feed_class, category=None):
+    posts = Post.objects.for_language(lang).filter(is_published=True)
+    if category is None:
+        title, link, feed_name, args = SITE_NAME, reverse("home"), "feed", []
+    else:
+        posts = posts.filter(category=category)
+        name = category.name_sw if lang == "sw" and category.name_sw else category.name_en
+        title, link, args = f"{name} | {SITE_NAME}", category.get_absolute_url(), [category.slug]
+        feed_name = "category_feed"
+    if feed_class is feedgenerator.Atom1Feed:
+        feed_name += "_atom"
+
+    document = feed_class(
+        title=title,
+        link=base + link,
+        description="Smart tech, tutorials, and money strategies",
+        language=lang,
+        feed_url=base + reverse(feed_name, args=args),
+    )
+    items = posts.order_by("-created").values_list("slug", "title", "excerpt", "created", "updated", "category_name")
+    post_path = reverse("post_detail", args=[SLUG_PLACEHOLDER])
+    for slug, item_title, excerpt, created, updated, category_name in items[:FEED_ITEMS]:
+        url = base + post_path.replace(SLUG_PLACEHOLDER, slug)
+        document.add_item(
+            title=item_title,
+            link=url,
+            description=excerpt,
+            unique_id=url,
+            pubdate=created,
+            updateddate=updated,
+            categories=[category_name],
+        )
+    yield document.writeString("utf-8")
+
+
+# ----- serving -----
+def cached_document(request, name, tags, content_type, generate, *args):
+    """
+    Serve ``generate(base, lang, *args)`` from the cache, or stream it and
+    cache it on the way; ``name`` must identify the document. Last-Modified is when the cached copy was built:
+    it is rebuilt only after one of ``tags`` is purged, and unlike
+    MAX(updated) that also moves when a post is deleted or unpublished.
+    """
+    base, lang = site_root(request), translation.get_language()
+    versions = tag_versions(tags)
+    raw = "|".join([base, *(f"{tag}={versions[tag]}" for tag in sorted(versions))])
+    key = DOCUMENT_KEY.format(name=name, lang=lang, digest=hashlib.md5(raw.encode()).hexdigest())
+
+    entry = cache.get(key)
+    if entry is not None:
+        last_modified = entry["last_modified"]
+        response = get_conditional_response(request, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(entry["body"], content_type=content_type)
+    else:
+        last_modified = int(time.time())
+        parts = caching(key, last_modified, lang, lambda: generate(base, lang, *args))
+        response = StreamingHttpResponse(parts, content_type=content_type)
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def caching(key, last_modified, lang, generate):
+    # Runs after the view has returned, so the language is set again here
+    body = []
+    with translation.override(lang):
+        for part in generate():
+            body.append(part)
+            yield part
+    # Only a document that was streamed to the end is stored
+    cache.set(key, {"body": "".join(body), "last_modified": last_modified}, CACHE_TIMEOUT)
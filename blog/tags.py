@@ -0,0 +1,95 @@
+import math
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
+
+from .models import Post, PostTag, TagStat
+
+
+# ==================================================
+# TAG ARCHIVES + TAG CLOUD (denormalised m2m rows and counts)
+# ==================================================
+# Every blog_post_tags row (PostTag) carries a copy of its post's created
+# and is_published, so a tag archive page is a range scan of the partial
+# (tag, post_created) index instead of a join sorted on blog_post. TagStat
+# holds the published-post count of every tag per language: all published
+# posts in the default language, posts with a translated title otherwise
+# (the archive itself falls back to English like every other listing).
+# blog/signals.py refreshes both on m2m_changed and on publish/title
+# changes; bulk writers (imports, seeding) call sync_post_tags() and
+# count_tag_stats() themselves, and rebuild_tag_stats redoes everything.
+TAG_CLOUD_SIZE = getattr(settings, "BLOG_TAG_CLOUD_SIZE", 30)
+# Smallest to largest Bootstrap font size
+CLOUD_CLASSES = ("small", "fs-6", "fs-5", "fs-4")
+BATCH_SIZE = 1000
+
+
+def sync_post_tags(links):
+    """Copy created/is_published from their posts onto the PostTag rows ``links``; returns the rows updated."""
+    post = Post.objects.filter(pk=OuterRef("post_id"))
+    return links.update(
+        post_created=Subquery(post.values("created")[:1]),
+        is_published=Subquery(post.values("is_published")[:1]),
+    )
+
+
+def language_filter(lang):
+    """Which PostTag rows (seen from Tag) count towards the stats of ``lang``."""
+    published = Q(post_links__is_published=True)
+    if lang == settings.LANGUAGE_CODE:
+        return published
+    return published & Q(**{f"post_links__post__title_{lang}__gt": ""})
+
+
+def count_tag_stats(tags):
+    """Recount the Tag queryset ``tags`` for every language (one grouped query); returns the rows written."""
+    languages = [code for code, _name in settings.LANGUAGES]
+    counts = tags.order_by().annotate(
+        **{f"count_{code}": Count("post_links", filter=language_filter(code)) for code in languages}
+    ).values_list("pk", *(f"count_{code}" for code in languages))
+    rows = [
+        TagStat(tag_id=row[0], language=code, post_count=count)
+        for row in counts
+        for code, count in zip(languages, row[1:])
+    ]
+    TagStat.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["tag", "language"],
+        update_fields=["post_count"],
+        batch_size=BATCH_SIZE,
+    )
+    return len(rows)
+
+
+def tag_cloud(lang, limit=TAG_CLOUD_SIZE):
+    """The ``limit`` biggest tags of ``lang`` in name order, each with a CSS size class."""
+    stats = list(
+        TagStat.objects.filter(language=lang, post_count__gt=0)
+        .select_related("tag")
+        .order_by("-post_count", "tag__name")[:limit]
+    )
+    if not stats:
+        return []
+    # Log scale between the smallest and the biggest tag shown
+    low = math.log(stats[-1].post_count)
+    span = math.log(stats[0].post_count) - low or 1
+    cloud = [
+        {
+            "tag": stat.tag,
+            "count": stat.post_count,
+            "size": CLOUD_CLASSES[round((len(CLOUD_CLASSES) - 1) * (math.log(stat.post_count) - low) / span)],
+        }
+        for stat in stats
+    ]
+    return sorted(cloud, key=lambda item: item["tag"].name.lower())
+
+
+def tag_archive(tag, lang):
+    """
+    PostTag rows of the published posts of ``tag``, to be paginated on
+    ("-post_created", "-post_id"); each row's ``post`` is a listing Post in
+    ``lang`` with its tags, loaded for the whole page in two queries.
+    """
+    posts = Post.objects.for_language(lang).listing().with_tags()
+    return PostTag.objects.filter(tag=tag, is_published=True).prefetch_related(Prefetch("post", queryset=posts))
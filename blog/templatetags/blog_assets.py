@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.assets import inline_text
+
+register = template.Library()
+
+
+@register.simple_tag
+def inline_static(path):
+    """Contents of a (trusted, build-generated) static file, e.g. critical CSS."""
+    return mark_safe(inline_text(path))
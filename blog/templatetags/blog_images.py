@@ -0,0 +1,58 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from blog.images import IMAGE_FORMATS, derivative_name, derivative_widths
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def responsive_image(context, post, sizes="100vw", css_class="", loading="lazy"):
+    """
+    <picture> for ``post.featured_image`` with WebP/JPEG srcsets, intrinsic
+    width/height (no layout shift) and the blurred placeholder as background.
+    Falls back to the original file until derivatives have been generated.
+    """
+    image = post.featured_image
+    if not image:
+        return ""
+    request = context.get("request")
+    if hasattr(post, "title"):
+        alt = post.title  # annotated by Post.objects.for_language(); the title columns may be deferred
+    elif getattr(request, "LANGUAGE_CODE", "en") == "sw" and post.title_sw:
+        alt = post.title_sw
+    else:
+        alt = post.title_en
+    if not post.featured_image_width:
+        return format_html(
+            '<img src="{}" class="{}" alt="{}" loading="{}" decoding="async">',
+            image.url, css_class, alt, loading,
+        )
+
+    storage = image.storage
+    widths = derivative_widths(post.featured_image_width)
+
+    def srcset(extension):
+        return ", ".join(
+            f"{storage.url(derivative_name(image.name, width, extension))} {width}w" for width in widths
+        )
+
+    sources = format_html_join(
+        "", '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, srcset(extension), sizes) for extension, _format, mime, _options in IMAGE_FORMATS[:-1]),
+    )
+    fallback_extension = IMAGE_FORMATS[-1][0]
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" class="{}" alt="{}" '
+        'loading="{}" decoding="async" style="background:url({}) center/cover no-repeat"></picture>',
+        sources,
+        storage.url(derivative_name(image.name, widths[-1], fallback_extension)),
+        srcset(fallback_extension),
+        sizes,
+        post.featured_image_width,
+        post.featured_image_height,
+        css_class,
+        alt,
+        loading,
+        post.featured_image_placeholder,
+    )
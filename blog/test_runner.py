@@ -0,0 +1,12 @@
+from django.test.runner import DiscoverRunner
+
+from .counters import stop_all
+
+
+class BlogTestRunner(DiscoverRunner):
+    """Writes the buffered counters while the test databases still exist."""
+
+    def teardown_databases(self, old_config, **kwargs):
+        # Otherwise the atexit flush runs against a dropped (or the real) database
+        stop_all()
+        super().teardown_databases(old_config, **kwargs)
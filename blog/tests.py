@@ -1,9 +1,1059 @@
-<<<<<<< HEAD
-from django.test import TestCase
+import importlib
+import logging
+import smtplib
+import re
+import tempfile
+import threading
+import unittest
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
-=======
-from django.test import TestCase
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections
+from django.db.models import F, Q
+from django.db.models.query import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
->>>>>>> 4a481a0 (Updated blog added comment system and authentication)
+from . import assets, counters, profiling, related, routers, syndication, trending
+from .counters import BufferedCounter, comment_likes, post_views
+from .management.commands import check_replicas
+from .management.commands.check_query_plans import FULL_SCAN_PATTERNS, view_queries
+from .models import (
+    Category, Comment, NewsletterDispatch, Post, PostTag, PostViewBucket, RelatedPost, Subscriber, Tag, TagStat,
+)
+from .newsletter import DeliveryStopped, NewsletterSender
+from .page_cache import purge_tags
+from .rendering import rendered_values
+from .search import SQLiteFTS5SearchBackend, get_search_backend
+from .ratelimit import RATE_LIMITS, limiter
+from .sidebar import build_sidebar_snapshot, get_sidebar_snapshot
+from .tags import count_tag_stats
+from .totals import category_count_drift, post_count_drift
+from .transfer import CommentImporter, PostImporter, SubscriberImporter
+
+
+def make_post(category, slug, **fields):
+    fields.setdefault("content_en", "Body")
+    return Post.objects.create(title_en=slug.title(), slug=slug, category=category, **fields)
+
+
+# ==================================================
+# SIDEBAR (constant queries, once per request, cached)
+# ==================================================
+# categories, their first posts, trending ranking + top-up, tag cloud
+SIDEBAR_QUERIES = 5
+
+
+class SidebarQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name_en="Python", slug="python")
+        cls.post = make_post(cls.category, "hello")
+        Comment.objects.create(post=cls.post, name="Ann", email="ann@example.com", content="Hi")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_snapshot_queries_do_not_grow_with_content(self):
+        with self.assertNumQueries(SIDEBAR_QUERIES):
+            build_sidebar_snapshot("en")
+        for n in range(5):
+            category = Category.objects.create(name_en=f"Category {n}", slug=f"category-{n}")
+            for m in range(4):
+                make_post(category, f"post-{n}-{m}")
+        cache.clear()
+        with self.assertNumQueries(SIDEBAR_QUERIES):
+            build_sidebar_snapshot("en")
+
+    def test_snapshot_loaded_once_per_request(self):
+        # categories, popular_posts and tag_cloud all come from one snapshot
+        with mock.patch("blog.context_processors.get_sidebar_snapshot", wraps=get_sidebar_snapshot) as snapshot:
+            self.client.get(reverse("home"))
+        snapshot.assert_called_once_with("en")
+
+    def test_home_builds_sidebar_once_then_reads_it_from_cache(self):
+        home = reverse("home")
+        # listing + tags prefetch, plus the sidebar
+        with self.assertNumQueries(2 + SIDEBAR_QUERIES):
+            self.assertEqual(self.client.get(home).status_code, 200)
+        # Another URL misses the page cache but reuses the sidebar snapshot
+        with self.assertNumQueries(2):
+            self.client.get(home + "?page-cache=miss")
+        with self.assertNumQueries(0):
+            self.client.get(home + "?page-cache=miss")
+
+    def test_post_detail_builds_sidebar_once_then_reads_it_from_cache(self):
+        url = self.post.get_absolute_url()
+        # conditional-GET validators + the view's own 5, plus the sidebar
+        with self.assertNumQueries(6 + SIDEBAR_QUERIES):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(6):
+            self.client.get(url + "?page-cache=miss")
+        # A page-cache hit still runs the conditional-GET validators
+        with self.assertNumQueries(1):
+            self.client.get(url + "?page-cache=miss")
+
+
+# ==================================================
+# COMMENT THREADS (constant queries however long the thread)
+# ==================================================
+class CommentThreadQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_en="Python", slug="python")
+        cls.user = User.objects.create(username="reader")
+        cls.quiet = make_post(category, "quiet", is_published=True)
+        Comment.objects.create(post=cls.quiet, name="Ann", email="ann@example.com", content="Hi")
+
+        cls.busy = make_post(category, "busy", is_published=True)
+        threads = Comment.objects.bulk_create([
+            Comment(post=cls.busy, user=cls.user if n % 2 else None, name="Guest", content=f"Thread {n}")
+            for n in range(50)
+        ])
+        Comment.objects.bulk_create([
+            Comment(post=cls.busy, parent=thread, user=cls.user if n % 2 else None, name="Guest", content=f"Reply {n}")
+            for thread in threads
+            for n in range(5)
+        ])
+
+    def count_queries(self, url):
+        cache.clear()  # page cache and sidebar both cold each time
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        quiet, _response = self.count_queries(self.quiet.get_absolute_url())
+        busy, response = self.count_queries(self.busy.get_absolute_url())
+        self.assertEqual(busy, quiet)
+        self.assertContains(response, "Thread 49")
+        self.assertContains(response, "Reply 4")
+
+    def test_load_more_queries_do_not_grow_with_comments(self):
+        quiet, _response = self.count_queries(reverse("post_comments", args=[self.quiet.slug]))
+        busy, response = self.count_queries(reverse("post_comments", args=[self.busy.slug]) + "?page=2")
+        self.assertEqual(busy, quiet)
+        # Newest first, 20 threads a page: page 2 holds threads 29..10
+        self.assertContains(response, "Thread 29")
+        self.assertNotContains(response, "Thread 30")
+        self.assertNotContains(response, "Thread 9")
+
+
+# ==================================================
+# BUFFERED VIEW COUNTS (shared cache buffer)
+# ==================================================
+class CacheBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_en="Python", slug="python")
+        cls.posts = [make_post(category, f"post-{n}") for n in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.counter = BufferedCounter(Post, "views", backend="cache", flush_interval=60 * 60)
+        self.addCleanup(counters._registry.remove, self.counter)
+
+    def test_parallel_hits_and_drains_lose_nothing(self):
+        threads, hits_per_thread = 16, 250
+        drained, done = [], threading.Event()
+
+        def visitor(n):
+            for i in range(hits_per_thread):
+                self.counter.hit(self.posts[(n + i) % len(self.posts)].pk)
+
+        def drainer():
+            # Drains race the hits; the database is written from the test thread below
+            while not done.is_set():
+                drained.append(self.counter.buffer.drain())
+
+        drain_thread = threading.Thread(target=drainer)
+        drain_thread.start()
+        workers = [threading.Thread(target=visitor, args=(n,)) for n in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        done.set()
+        drain_thread.join()
+
+        with mock.patch("blog.counters.record_views"):
+            for counts in drained:
+                self.counter.flush(counts)
+            self.counter.stop()
+        total = sum(Post.objects.filter(pk__in=[post.pk for post in self.posts]).values_list("views", flat=True))
+        self.assertEqual(total, threads * hits_per_thread)
+
+    def test_hit_survives_an_evicted_key(self):
+        pk = self.posts[0].pk
+        real_add, calls = cache.add, []
+
+        def add_then_evict(key, value, timeout=None):
+            # The first add() finds the key, which is evicted before incr() runs
+            calls.append(key)
+            return False if len(calls) == 1 else real_add(key, value, timeout=timeout)
+
+        with mock.patch("blog.counters.cache.add", side_effect=add_then_evict):
+            self.counter.hit(pk, 2)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.counter.pending(pk), 2)
+
+    def test_failed_flush_writes_nothing_and_retries_exactly(self):
+        first, second = self.posts[0], self.posts[1]
+        self.counter.hit(first.pk, 1)
+        self.counter.hit(second.pk, 2)  # a second increment, so a second UPDATE
+        real_update, updates = QuerySet.update, []
+
+        def fail_second_update(queryset, **kwargs):
+            updates.append(kwargs)
+            if len(updates) == 2:
+                raise DatabaseError("connection lost")
+            return real_update(queryset, **kwargs)
+
+        def views():
+            return list(Post.objects.filter(pk__in=[first.pk, second.pk]).order_by("pk").values_list("views", flat=True))
+
+        with mock.patch.object(QuerySet, "update", fail_second_update), self.assertRaises(DatabaseError):
+            self.counter.flush()
+        self.assertEqual(views(), [0, 0])
+        self.counter.flush()
+        self.assertEqual(views(), [1, 2])
+
+    def test_drain_keeps_counts_read_before_eviction(self):
+        pk = self.posts[0].pk
+        self.counter.hit(pk, 5)
+        with mock.patch("blog.counters.cache.decr", side_effect=ValueError):
+            self.assertEqual(self.counter.buffer.drain(), {pk: 5})
+
+
+# ==================================================
+# QUERY PLANS (every view query uses an index)
+# ==================================================
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f"No plan checks for {connection.vendor}")
+        self.pattern = pattern
+        if connection.vendor == "postgresql":
+            # Empty test tables make seq scans cheapest; ask whether an index *can* be used
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_view_queries_use_indexes(self):
+        for name, queryset in view_queries().items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertEqual(self.pattern.findall(plan), [], f"{name} scans a table:\n{plan}")
+
+    def test_full_scan_is_detected(self):
+        # Nothing indexes the price, so this must be reported
+        plan = Post.objects.filter(price=1).explain()
+        self.assertEqual(self.pattern.findall(plan), ["blog_post"])
+
+    def test_command_passes(self):
+        call_command("check_query_plans", stdout=StringIO())
+
+
+# ==================================================
+# PAGE CACHE (purges that land while a page renders)
+# ==================================================
+class PageCachePurgeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_en="Python", slug="python")
+        cls.post = make_post(category, "hello")
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_purge_during_render_is_not_lost(self, tag):
+        url = self.post.get_absolute_url()
+
+        def purge_mid_render(post, lang):
+            purge_tags(tag)
+            return []
+
+        with mock.patch("blog.views.related_posts", side_effect=purge_mid_render):
+            self.assertEqual(self.client.get(url)["X-Page-Cache"], "MISS")
+        # The stored copy predates the purge, so it must not be served
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "HIT")
+
+    def test_fixed_tag_purged_mid_render(self):
+        self.assert_purge_during_render_is_not_lost("sidebar")
+
+    def test_object_tag_purged_mid_render(self):
+        self.assert_purge_during_render_is_not_lost(f"post:{self.post.pk}")
+
+
+# ==================================================
+# PRE-RENDERED BODIES (save, migration 0009 backfill)
+# ==================================================
+RENDERED_COLUMNS = ("content_html_en", "content_html_sw", "excerpt_en", "excerpt_sw", "reading_time")
+CONTENT_EN = "First <b>paragraph</b>\nsame paragraph\n\n" + "word " * 450
+CONTENT_SW = "Aya ya kwanza\n\nAya ya pili"
+
+
+class RenderedContentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name_en="Python", slug="python")
+
+    def assert_rendered(self, post):
+        stored = Post.objects.filter(pk=post.pk).values(*RENDERED_COLUMNS).get()
+        self.assertEqual(stored, rendered_values(post.content_en, post.content_sw))
+
+    def test_save_renders_the_columns(self):
+        post = make_post(self.category, "hello", content_en=CONTENT_EN, content_sw=CONTENT_SW)
+        self.assert_rendered(post)
+        stored = Post.objects.get(pk=post.pk)
+        self.assertIn("<p>First &lt;b&gt;paragraph&lt;/b&gt;<br>same paragraph</p>", stored.content_html_en)
+        self.assertEqual(stored.reading_time, 3)
+
+        post.content_sw = "Mpya"
+        post.save(update_fields=["content_sw"])
+        self.assert_rendered(post)
+
+    def test_migration_fills_existing_rows(self):
+        posts = [make_post(self.category, f"post-{n}", content_en=CONTENT_EN, content_sw=CONTENT_SW) for n in range(3)]
+        Post.objects.update(content_html_en="", content_html_sw="", excerpt_en="", excerpt_sw="", reading_time=0)
+        migration = importlib.import_module("blog.migrations.0009_post_rendered_content")
+        migration.render_existing_posts(apps, None)
+        for post in posts:
+            self.assert_rendered(post)
+
+
+# ==================================================
+# CONDITIONAL GET (304s skip the view, ETags follow the data)
+# ==================================================
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_en="Python", slug="python")
+        cls.post = make_post(category, "hello")
+
+    def setUp(self):
+        cache.clear()
+
+    def etag(self):
+        response = self.client.get(self.post.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_repeat_get_is_not_modified_without_rendering(self):
+        url = self.post.get_absolute_url()
+        etag = self.etag()
+        # Only the validator query runs; the view and its template do not
+        with self.assertTemplateNotUsed("post_detail.html"), self.assertNumQueries(1):
+            response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_listing_repeat_get_is_not_modified(self):
+        url = reverse("home")
+        etag = self.client.get(url)["ETag"]
+        with self.assertTemplateNotUsed("post_list.html"), self.assertNumQueries(0):
+            response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_when_the_post_is_saved(self):
+        etag = self.etag()
+        self.post.title_en = "Hello again"
+        self.post.save()
+        self.assertNotEqual(self.etag(), etag)
+
+    def test_etag_changes_when_a_comment_is_saved(self):
+        etag = self.etag()
+        comment = Comment.objects.create(post=self.post, name="Ann", email="ann@example.com", content="Hi")
+        after_comment = self.etag()
+        self.assertNotEqual(after_comment, etag)
+        Comment.objects.filter(pk=comment.pk).update(likes=3)
+        self.assertNotEqual(self.etag(), after_comment)
+
+    def test_not_modified_still_counts_the_view(self):
+        url = self.post.get_absolute_url()
+        etag = self.etag()
+        with mock.patch.object(post_views, "hit") as hit:
+            response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        hit.assert_called_once_with(self.post.pk)
+
+
+# ==================================================
+# RATE LIMITS (429s before any query, one like per session)
+# ==================================================
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_en="Python", slug="python")
+        cls.comment = Comment.objects.create(
+            post=make_post(category, "hello"), name="Ann", email="ann@example.com", content="Hi"
+        )
+
+    def setUp(self):
+        cache.clear()
+        limiter.memory_store.clear()
+        comment_likes.buffer.drain()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "reader-session"
+
+    def assert_rejected_without_queries(self, scope, url, data=None):
+        for _ in range(RATE_LIMITS[scope][0]):
+            self.assertNotEqual(self.client.post(url, data).status_code, 429)
+        with self.assertNumQueries(0):
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.has_header("Retry-After"))
+
+    def test_like_over_budget_costs_no_query(self):
+        self.assert_rejected_without_queries("like", reverse("like_comment", args=[self.comment.pk]))
+
+    def test_subscribe_over_budget_costs_no_query(self):
+        self.assert_rejected_without_queries("subscribe", reverse("subscribe"), {"email": "reader@example.com"})
+
+    def test_repeat_likes_from_one_session_count_once(self):
+        url = reverse("like_comment", args=[self.comment.pk])
+        for _ in range(10):
+            self.client.post(url)
+        comment_likes.flush()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.likes, 1)
+
+
+# ==================================================
+# SEARCH (FTS5 ranking, index kept in sync by signals)
+# ==================================================
+@unittest.skipUnless(connection.vendor == "sqlite", "SQLite FTS5 backend")
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name_en="Python", slug="python")
+
+    def setUp(self):
+        self.backend = get_search_backend()
+        self.assertIsInstance(self.backend, SQLiteFTS5SearchBackend)
+
+    def test_title_match_outranks_body_match(self):
+        in_title = make_post(self.category, "walrus", content_en="Notes on marine mammals")
+        in_body = make_post(self.category, "notes", content_en="A walrus hauled out on the ice")
+        # The body match is newer, so only the bm25 weights put the title first
+        self.assertEqual(self.backend.search("walrus"), [in_title.pk, in_body.pk])
+
+    def test_index_follows_save_and_delete(self):
+        post = make_post(self.category, "walrus")
+        self.assertEqual(self.backend.search("walrus"), [post.pk])
+        post.title_en = "Narwhal"
+        post.save()
+        self.assertEqual(self.backend.search("walrus"), [])
+        self.assertEqual(self.backend.search("narwhal"), [post.pk])
+        post.delete()
+        self.assertEqual(self.backend.search("narwhal"), [])
+
+
+# ==================================================
+# RELATED POSTS (refreshed after commit when tags change)
+# ==================================================
+class RelatedPostTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # One category each, so only shared tags relate them
+        cls.alpha, cls.beta, cls.gamma = (
+            make_post(Category.objects.create(name_en=slug.title(), slug=slug), slug)
+            for slug in ("alpha", "beta", "gamma")
+        )
+        cls.orm, cls.async_ = Tag.objects.create(name="orm", slug="orm"), Tag.objects.create(name="async", slug="async")
+
+    def related_ids(self, post):
+        return list(RelatedPost.objects.filter(post=post).order_by("rank").values_list("related_id", flat=True))
+
+    def test_lists_follow_tag_changes_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alpha.tags.add(self.orm)
+            self.beta.tags.add(self.orm)
+            self.assertEqual(self.related_ids(self.alpha), [])  # nothing before the commit
+        self.assertEqual(self.related_ids(self.alpha), [self.beta.pk])
+        self.assertEqual(self.related_ids(self.beta), [self.alpha.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beta.tags.remove(self.orm)
+        self.assertEqual(self.related_ids(self.alpha), [])
+        self.assertEqual(self.related_ids(self.beta), [])
+
+    def test_reverse_add_refreshes_each_post_once(self):
+        with mock.patch.object(related, "refresh_post", wraps=related.refresh_post) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.async_.post_set.add(self.alpha, self.gamma)
+        self.assertEqual(sorted(call.args[0] for call in refresh.call_args_list), [self.alpha.pk, self.gamma.pk])
+        self.assertEqual(self.related_ids(self.gamma), [self.alpha.pk])
+
+    def test_large_reverse_add_rebuilds_once(self):
+        with mock.patch.object(related, "REBUILD_AFTER", 2), \
+                mock.patch.object(related, "rebuild", wraps=related.rebuild) as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.orm.post_set.add(self.alpha, self.beta, self.gamma)
+        self.assertEqual(rebuild.call_count, 1)
+        self.assertEqual(self.related_ids(self.alpha), [self.gamma.pk, self.beta.pk])
+
+
+# ==================================================
+# SITEMAPS (index and chunks, purged per chunk)
+# ==================================================
+SITE = "https://blog.example.com"
+LOC_RE = re.compile(r"<loc>([^<]+)</loc>")
+
+
+@mock.patch.object(syndication, "SITE_URL", SITE)
+@mock.patch.object(syndication, "SITEMAP_CHUNK_SIZE", 2)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_en="Python", slug="python")
+        cls.posts = [make_post(category, f"post-{n}") for n in range(4)]
+        make_post(category, "draft", is_published=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url):
+        """(locs, served from the cache) of one sitemap document."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return LOC_RE.findall(body.decode()), not response.streaming
+
+    def chunk_url(self, post):
+        return reverse("sitemap_posts", args=[syndication.chunk_of(post.pk)])
+
+    def test_index_lists_pages_and_every_chunk(self):
+        chunks = sorted({syndication.chunk_of(post.pk) for post in self.posts})
+        locs, _cached = self.get(reverse("sitemap"))
+        self.assertEqual(locs, [SITE + reverse("sitemap_pages")] + [
+            SITE + reverse("sitemap_posts", args=[chunk]) for chunk in chunks
+        ])
+
+    def test_chunk_lists_its_published_posts(self):
+        post = self.posts[0]
+        in_chunk = [p for p in self.posts if syndication.chunk_of(p.pk) == syndication.chunk_of(post.pk)]
+        locs, _cached = self.get(self.chunk_url(post))
+        self.assertEqual(locs, [SITE + p.get_absolute_url() for p in in_chunk])
+
+    def test_saving_a_post_purges_only_its_chunk(self):
+        first, last = self.posts[0], self.posts[-1]
+        self.assertNotEqual(syndication.chunk_of(first.pk), syndication.chunk_of(last.pk))
+        for post in (first, last):
+            self.get(self.chunk_url(post))
+            self.assertTrue(self.get(self.chunk_url(post))[1])
+
+        first.slug = "renamed"
+        first.save()
+        locs, cached = self.get(self.chunk_url(first))
+        self.assertFalse(cached)
+        self.assertIn(SITE + first.get_absolute_url(), locs)
+        self.assertTrue(self.get(self.chunk_url(last))[1])
+
+
+# ==================================================
+# TAG ARCHIVES (PostTag copies and TagStat counts kept in step)
+# ==================================================
+class TagUpkeepTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_en="Python", slug="python")
+        cls.translated = make_post(category, "translated", title_sw="Imetafsiriwa")
+        cls.english = make_post(category, "english")
+        cls.orm, cls.web = Tag.objects.create(name="orm", slug="orm"), Tag.objects.create(name="web", slug="web")
+
+    @staticmethod
+    def stats():
+        rows = TagStat.objects.filter(post_count__gt=0).values_list("tag", "language", "post_count")
+        return {(tag_id, language): n for tag_id, language, n in rows}
+
+    def assert_in_step(self, expected):
+        """``expected`` is {tag: (en, sw)}; the stored stats must also survive a full recount."""
+        stale = ~Q(post_created=F("post__created")) | ~Q(is_published=F("post__is_published"))
+        self.assertFalse(PostTag.objects.filter(stale).exists())
+        stats = self.stats()
+        self.assertEqual(
+            {tag: (stats.get((tag.pk, "en"), 0), stats.get((tag.pk, "sw"), 0)) for tag in expected}, expected
+        )
+        count_tag_stats(Tag.objects.all())
+        self.assertEqual(self.stats(), stats)
+
+    def test_add_and_remove(self):
+        self.translated.tags.add(self.orm, self.web)
+        self.english.tags.add(self.orm)
+        self.assert_in_step({self.orm: (2, 1), self.web: (1, 1)})
+        self.translated.tags.remove(self.orm)
+        self.assert_in_step({self.orm: (1, 0), self.web: (1, 1)})
+
+    def test_clear_and_reverse_clear(self):
+        self.translated.tags.add(self.orm, self.web)
+        self.english.tags.add(self.orm, self.web)
+        self.translated.tags.clear()
+        self.assert_in_step({self.orm: (1, 0), self.web: (1, 0)})
+        self.orm.post_set.clear()
+        self.assert_in_step({self.orm: (0, 0), self.web: (1, 0)})
+
+    def test_reverse_add(self):
+        self.web.post_set.add(self.translated, self.english)
+        self.assert_in_step({self.orm: (0, 0), self.web: (2, 1)})
+
+    def test_post_unpublished_and_deleted(self):
+        self.translated.tags.add(self.orm)
+        self.english.tags.add(self.orm)
+        post = Post.objects.get(pk=self.english.pk)
+        post.is_published = False
+        post.save()
+        self.assert_in_step({self.orm: (1, 1)})
+        Post.objects.get(pk=self.translated.pk).delete()
+        self.assert_in_step({self.orm: (0, 0)})
+
+
+# ==================================================
+# TRENDING (bucket upserts, top ids under their own key)
+# ==================================================
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name_en="Python", slug="python")
+        cls.old, cls.new = make_post(category, "old"), make_post(category, "new")
+
+    def setUp(self):
+        cache.clear()
+        trending._unapplied.clear()
+
+    def test_flushes_from_several_workers_add_up(self):
+        now = timezone.now()
+        # Two workers flushing the same post both land in the bucket
+        trending.record_views({self.old.pk: 3}, now)
+        trending.record_views({self.old.pk: 4, self.new.pk: 1}, now)
+        bucket = PostViewBucket.objects.get(post=self.old, period=PostViewBucket.HOUR)
+        self.assertEqual(bucket.views, 7)
+
+    def test_recent_views_outrank_older_ones(self):
+        now = timezone.now()
+        trending.record_views({self.old.pk: 10}, now - timedelta(hours=20))
+        trending.record_views({self.new.pk: 5}, now)
+        trending.recompute(now=now)
+        self.assertEqual(cache.get(trending.TOP_KEY.format(window="24h")), [self.new.pk, self.old.pk])
+        self.assertEqual(trending.trending_post_ids("24h", 1), [self.new.pk])
+
+    def test_flushes_update_the_ranking_without_a_rebuild(self):
+        now = timezone.now()
+        trending.record_views({self.old.pk: 3}, now)
+        with mock.patch.object(trending, "compute_scores", wraps=trending.compute_scores) as compute:
+            trending.record_views({self.new.pk: 5}, now)
+        compute.assert_not_called()
+        self.assertEqual(trending.trending_post_ids("24h"), [self.new.pk, self.old.pk])
+
+    def test_incremental_scores_match_a_full_rebuild(self):
+        now = timezone.now()
+        trending.record_views({self.old.pk: 10}, now - timedelta(hours=5))
+        trending.record_views({self.new.pk: 4, self.old.pk: 1}, now - timedelta(hours=2))
+        trending.record_views({self.new.pk: 2}, now)
+        for window in trending.WINDOWS:
+            cached = cache.get(trending.SCORES_KEY.format(window=window))["scores"]
+            rebuilt = dict(trending.compute_scores(window, now))
+            self.assertEqual(cached.keys(), rebuilt.keys())
+            for pk, score in rebuilt.items():
+                self.assertAlmostEqual(cached[pk], score)
+
+    def test_views_wait_for_the_lock_instead_of_being_lost(self):
+        now = timezone.now()
+        trending.recompute(now=now)
+        cache.add(trending.LOCK_KEY, True)  # another worker is applying its flush
+        trending.record_views({self.old.pk: 3}, now)
+        self.assertEqual(trending.trending_post_ids("24h"), [])
+        cache.delete(trending.LOCK_KEY)
+        trending.record_views({self.new.pk: 1}, now)
+        self.assertEqual(trending.trending_post_ids("24h"), [self.old.pk, self.new.pk])
+
+
+# ==================================================
+# DENORMALISED COUNTS (signal deltas agree with a recount)
+# ==================================================
+class CountSignalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.python = Category.objects.create(name_en="Python", slug="python")
+        cls.django = Category.objects.create(name_en="Django", slug="django")
+        cls.first, cls.second = make_post(cls.python, "first"), make_post(cls.django, "second")
+        cls.comment = cls.add_comment(cls.first)
+        cls.reply = cls.add_comment(cls.first, parent=cls.comment)
+
+    @staticmethod
+    def add_comment(post, **fields):
+        return Comment.objects.create(post=post, name="Ann", email="ann@example.com", content="Hi", **fields)
+
+    def assert_counts(self, first, second):
+        """(comment_count, reply_count) of both posts, and no row differing from a recount."""
+        self.assertEqual(post_count_drift(Post.objects.all()), [])
+        self.assertEqual(category_count_drift(Category.objects.all()), [])
+        rows = {pk: (comments, replies) for pk, comments, replies in
+                Post.objects.values_list("pk", "comment_count", "reply_count")}
+        self.assertEqual((rows[self.first.pk], rows[self.second.pk]), (first, second))
+
+    def test_comment_moved_between_posts(self):
+        self.assert_counts((2, 1), (0, 0))
+        reply = Comment.objects.get(pk=self.reply.pk)
+        reply.post, reply.parent = self.second, None
+        reply.save()
+        self.assert_counts((1, 0), (1, 0))
+
+    def test_comment_unapproved_and_approved_again(self):
+        comment = Comment.objects.get(pk=self.reply.pk)
+        comment.approved = False
+        comment.save()
+        self.assert_counts((1, 0), (0, 0))
+        comment.approved = True
+        comment.save()
+        self.assert_counts((2, 1), (0, 0))
+
+    def test_comment_deleted(self):
+        Comment.objects.get(pk=self.reply.pk).delete()
+        self.assert_counts((1, 0), (0, 0))
+
+    def test_post_deleted_with_its_comments(self):
+        self.add_comment(self.second)
+        Post.objects.get(pk=self.first.pk).delete()
+        self.assertEqual(post_count_drift(Post.objects.all()), [])
+        self.assertEqual(category_count_drift(Category.objects.all()), [])
+        self.assertEqual(Category.objects.get(pk=self.python.pk).published_post_count, 0)
+        self.assertEqual(Post.objects.get(pk=self.second.pk).comment_count, 1)
+
+    def test_post_moved_and_unpublished(self):
+        post = Post.objects.get(pk=self.first.pk)
+        post.category = self.django
+        post.save()
+        self.assertEqual(category_count_drift(Category.objects.all()), [])
+        post.is_published = False
+        post.save()
+        self.assertEqual(category_count_drift(Category.objects.all()), [])
+        counts = dict(Category.objects.values_list("pk", "published_post_count"))
+        self.assertEqual((counts[self.python.pk], counts[self.django.pk]), (0, 1))
+
+    def test_deferred_instances_fall_back_to_a_recount(self):
+        # Drifted rows show that the deferred saves recount instead of moving deltas
+        Post.objects.update(comment_count=9, reply_count=9)
+        Category.objects.update(published_post_count=9)
+        comment = Comment.objects.only("content").get(pk=self.reply.pk)
+        comment.approved = False
+        comment.save()
+        self.assertEqual(post_count_drift(Post.objects.filter(pk=self.first.pk)), [])
+        post = Post.objects.defer("is_published").get(pk=self.second.pk)
+        post.is_published = False
+        post.save()
+        self.assertEqual(category_count_drift(Category.objects.all()), [])
+
+
+# ==================================================
+# IMPORT (file timestamps, counts of both posts on a move)
+# ==================================================
+class ImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name_en="Python", slug="python")
+        cls.first, cls.second = make_post(cls.category, "first"), make_post(cls.category, "second")
+
+    def test_file_timestamps_are_kept(self):
+        PostImporter(rebuild_index=False).run([
+            {"slug": "old", "title_en": "Old", "category": "python", "created": "2020-01-02T03:04:05+00:00"},
+            {"slug": "first", "title_en": "First", "category": "python", "created": "2021-01-01T00:00:00+00:00"},
+        ])
+        self.assertEqual(Post.objects.get(slug="old").created.year, 2020)
+        self.assertEqual(Post.objects.get(slug="first").created.year, 2021)
+        # Saving normally still stamps "now"
+        self.assertEqual(make_post(self.category, "new").created.date(), timezone.now().date())
+
+    def test_comment_moved_to_another_post_recounts_both(self):
+        comment = Comment.objects.create(post=self.first, name="Ann", email="ann@example.com", content="Hi")
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.comment_count, 1)
+        CommentImporter().run([{
+            "id": comment.pk, "post": "second", "name": "Ann", "email": "ann@example.com", "content": "Hi",
+            "approved": True, "created": "2020-05-05T00:00:00+00:00",
+        }])
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.comment_count, self.second.comment_count), (0, 1))
+        self.assertEqual(Comment.objects.get(pk=comment.pk).created.year, 2020)
+
+    def test_existing_and_repeated_subscribers_are_skipped(self):
+        Subscriber.objects.create(email="ann@example.com")
+        imported, skipped = SubscriberImporter().run([
+            {"email": "ann@example.com"},
+            {"email": "ben@example.com"},
+            {"email": " BEN@example.com "},
+            {"email": ""},
+        ])
+        self.assertEqual((imported, skipped), (1, 3))
+        self.assertEqual(Subscriber.objects.count(), 2)
+
+
+# ==================================================
+# NEWSLETTER (one refused or dropped message never resends the batch)
+# ==================================================
+class NewsletterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        post = make_post(Category.objects.create(name_en="Python", slug="python"), "hello", is_published=True)
+        cls.dispatch = NewsletterDispatch.objects.create(post=post)
+        cls.emails = [f"reader{i}@example.com" for i in range(6)]
+        Subscriber.objects.bulk_create([Subscriber(email=email) for email in cls.emails])
+
+    def run_sender(self, send_messages):
+        with mock.patch.object(locmem.EmailBackend, "send_messages", send_messages):
+            return NewsletterSender(self.dispatch, workers=2, batch_size=3).run()
+
+    def assert_sent_once(self, emails):
+        self.assertEqual(sorted(to for message in mail.outbox for to in message.to), sorted(emails))
+
+    def test_refused_recipient_fails_only_its_message(self):
+        send = locmem.EmailBackend.send_messages
+
+        def refuse_one(backend, messages):
+            if any("reader1@example.com" in message.to for message in messages):
+                raise smtplib.SMTPRecipientsRefused({"reader1@example.com": (550, b"No such user")})
+            return send(backend, messages)
+
+        with self.assertLogs("blog.newsletter", "WARNING"):
+            result = self.run_sender(refuse_one)
+        self.assertEqual((result["sent"], result["failed"]), (5, 1))
+        self.assert_sent_once([email for email in self.emails if email != "reader1@example.com"])
+
+    def test_dropped_connection_retries_only_the_unsent_message(self):
+        send, dropped = locmem.EmailBackend.send_messages, []
+
+        def drop_once(backend, messages):
+            for i, message in enumerate(messages):
+                if "reader4@example.com" in message.to and not dropped:
+                    # The session drops after the messages before it went out
+                    dropped.append(True)
+                    send(backend, messages[:i])
+                    raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            return send(backend, messages)
+
+        result = self.run_sender(drop_once)
+        self.assertEqual((result["sent"], result["failed"]), (6, 0))
+        self.assert_sent_once(self.emails)
+        self.dispatch.refresh_from_db()
+        self.assertEqual((self.dispatch.sent, self.dispatch.last_subscriber_id), (6, Subscriber.objects.latest("pk").pk))
+
+
+    def assert_stopped_after(self, send_messages, email):
+        """The run stops; the checkpoint and counts end at ``email``, and the dispatch is not done."""
+        with self.assertRaises(DeliveryStopped):
+            self.run_sender(send_messages)
+        last = Subscriber.objects.get(email=email)
+        self.dispatch.refresh_from_db()
+        self.assertEqual(self.dispatch.status, NewsletterDispatch.RUNNING)
+        self.assertEqual(self.dispatch.last_subscriber_id, last.pk)
+        handled = list(Subscriber.objects.filter(pk__lte=last.pk).values_list("email", flat=True))
+        self.assertEqual((self.dispatch.sent, self.dispatch.failed), (len(handled), 0))
+        self.assert_sent_once(handled)
+
+    def test_lost_connection_stops_the_run(self):
+        send, attempts = locmem.EmailBackend.send_messages, []
+
+        def drop_for_good(backend, messages):
+            if any("reader4@example.com" in message.to for message in messages):
+                attempts.append(True)
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            return send(backend, messages)
+
+        self.assert_stopped_after(drop_for_good, "reader3@example.com")
+        self.assertEqual(len(attempts), 2)  # one reconnect, then give up
+
+        # The next run resumes after the checkpoint
+        self.assertEqual(self.run_sender(locmem.EmailBackend.send_messages)["sent"], 2)
+        self.assert_sent_once(self.emails)
+        self.dispatch.refresh_from_db()
+        self.assertEqual(self.dispatch.status, NewsletterDispatch.DONE)
+
+    def test_server_error_stops_the_run_without_retrying(self):
+        send, attempts = locmem.EmailBackend.send_messages, []
+
+        def shutting_down(backend, messages):
+            if any("reader4@example.com" in message.to for message in messages):
+                attempts.append(True)
+                raise smtplib.SMTPResponseException(421, b"Service not available")
+            return send(backend, messages)
+
+        self.assert_stopped_after(shutting_down, "reader3@example.com")
+        self.assertEqual(len(attempts), 1)
+
+
+# ==================================================
+# READ REPLICAS (router + middleware against a second alias)
+# ==================================================
+# The replica is a second connection to the test database, so it sees
+# what the primary committed (hence TransactionTestCase)
+REPLICA = "replica_test"
+
+
+@override_settings(ALLOWED_HOSTS=["blog.example.com"])
+class ReplicaRoutingTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered once the test databases exist; as a mirror it is never flushed
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        connections.settings[REPLICA] = {**primary, "TEST": {**primary["TEST"], "MIRROR": DEFAULT_DB_ALIAS}}
+        cls.databases = {DEFAULT_DB_ALIAS, REPLICA}
+        cls.addClassCleanup(connections.settings.pop, REPLICA)
+        cls.addClassCleanup(lambda: connections[REPLICA].close())
+
+    def setUp(self):
+        for module in (routers, check_replicas):
+            patcher = mock.patch.object(module, "REPLICAS", [REPLICA])
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        routers.health.reset()
+        self.addCleanup(routers.health.reset)
+        cache.clear()
+        category = Category.objects.create(name_en="Python", slug="python")
+        self.post = make_post(category, "hello", is_published=True)
+
+    def queries_by_alias(self, request):
+        with CaptureQueriesContext(connection) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = request()
+        self.assertLess(response.status_code, 400)
+        return len(primary), len(replica)
+
+    def test_router_outside_a_request_uses_the_primary(self):
+        router = routers.PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate(REPLICA, "blog"))
+
+    def test_reads_go_to_the_replica_until_the_visitor_writes(self):
+        url = self.post.get_absolute_url()
+        primary, replica = self.queries_by_alias(lambda: self.client.get(url, {"n": 1}, HTTP_HOST="blog.example.com"))
+        self.assertGreater(replica, 0)
+
+        primary, replica = self.queries_by_alias(lambda: self.client.post(
+            url, {"content": "Hi", "name": "Ann", "email": "ann@example.com"}, HTTP_HOST="blog.example.com",
+        ))
+        self.assertEqual(replica, 0)
+        self.assertIn(routers.STICKY_COOKIE, self.client.cookies)
+
+        # Pinned by the cookie: the visitor sees their own comment
+        primary, replica = self.queries_by_alias(lambda: self.client.get(url, {"n": 2}, HTTP_HOST="blog.example.com"))
+        self.assertEqual(replica, 0)
+
+    def test_check_replicas_passes(self):
+        # The command holds view counts back and quiets the router logger for its run
+        self.addCleanup(setattr, post_views, "flush_interval", post_views.flush_interval)
+        self.addCleanup(logging.getLogger("blog.routers").setLevel, logging.getLogger("blog.routers").level)
+        stdout = StringIO()
+        call_command("check_replicas", stdout=stdout)
+        self.assertIn("Reads on replicas", stdout.getvalue())
+
+
+# ==================================================
+# AUTH PAGES (no blog data at all)
+# ==================================================
+class AuthPageQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_post(Category.objects.create(name_en="Python", slug="python"), "hello")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_auth_pages_query_no_blog_tables(self):
+        for name in ("login", "register"):
+            with self.subTest(name), CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+            self.assertEqual([q["sql"] for q in queries if "blog_" in q["sql"]], [])
+
+    def test_anonymous_auth_pages_query_nothing(self):
+        for name in ("login", "register"):
+            with self.subTest(name), self.assertNumQueries(0):
+                self.client.get(reverse(name))
+
+
+# ==================================================
+# REQUEST PROFILING (Server-Timing for staff only)
+# ==================================================
+@mock.patch.object(profiling, "SERVER_TIMING", False)
+@mock.patch.object(profiling, "SAMPLE_RATE", 1.0)
+class ProfilingTests(TestCase):
+    def test_anonymous_request_loads_no_session(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("login"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_staff_gets_server_timing(self):
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        self.assertIn("Server-Timing", self.client.get(reverse("login")))
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def test_disallowed_host_is_a_plain_400(self):
+        self.assertEqual(self.client.get(reverse("login"), HTTP_HOST="evil.invalid").status_code, 400)
+
+
+# ==================================================
+# FRONTEND ASSETS (self-hosted, hashed bundle)
+# ==================================================
+# Stand-ins for the pinned vendor files, so the build runs offline. The
+# unused icon's name is split so this file does not count as using it.
+UNUSED_ICON = "bi" + "-unused"
+VENDOR_STUBS = {
+    "bootstrap.min.css": ".container{width:100%}.navbar{display:flex}",
+    "bootstrap.bundle.min.js": "/*! Bootstrap */!function(){}();",
+    "bootstrap-icons.css": (
+        '@font-face{font-family:"bootstrap-icons";src:url("./fonts/bootstrap-icons.woff2") format("woff2")}'
+        '.bi-search::before{content:"\\f52a"}.%s::before{content:"\\f000"}' % UNUSED_ICON
+    ),
+    "bootstrap-icons.woff2": "font",
+    "bootstrap-icons.woff": "font",
+}
+EXTERNAL_ASSET_RE = re.compile(r'<(?:link|script)[^>]+(?:href|src)="(?:https?:)?//', re.I)
+
+
+class AssetBundleTests(TestCase):
+    def setUp(self):
+        tmp = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        source = tmp / "downloads"
+        source.mkdir()
+        for name, text in VENDOR_STUBS.items():
+            (source / name).write_text(text)
+        self.enterContext(mock.patch.object(assets, "STATIC_DIR", tmp / "static"))
+        self.enterContext(override_settings(
+            STATICFILES_DIRS=[tmp / "static"],
+            STATIC_ROOT=tmp / "collected",
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+            },
+        ))
+        self.addCleanup(assets.bundle_available.cache_clear)
+        self.addCleanup(assets.inline_text.cache_clear)
+        call_command("build_assets", source=str(source), stdout=StringIO())
+        call_command("collectstatic", interactive=False, verbosity=0, ignore_patterns=["admin"])
+        assets.bundle_available.cache_clear()
+        assets.inline_text.cache_clear()
+        cache.clear()
+
+    def test_pages_load_only_the_hashed_bundle(self):
+        self.assertEqual(assets.check_bundle(), [])
+        html = self.client.get(reverse("about")).content.decode()
+        self.assertIsNone(EXTERNAL_ASSET_RE.search(html))
+        self.assertRegex(html, r'href="/static/dist/site\.[0-9a-f]{12}\.css"')
+        self.assertRegex(html, r'src="/static/dist/site\.[0-9a-f]{12}\.js"')
+        self.assertIn(".navbar{display:flex}", html)  # critical CSS inlined
+
+        css = (assets.STATIC_DIR / assets.BUNDLE_CSS).read_text()
+        self.assertIn(".bi-search::before", css)
+        self.assertNotIn(UNUSED_ICON, css)
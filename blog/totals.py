@@ -0,0 +1,111 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Category, Comment, Post
+
+
+# ==================================================
+# DENORMALISED COUNTS (comments per post, published posts per category)
+# ==================================================
+# Post.comment_count (approved comments, replies included), Post.reply_count
+# (approved replies) and Category.published_post_count are moved by
+# blog/signals.py with relative F() updates, so concurrent writers add up
+# instead of overwriting each other. Writers that skip signals (update(),
+# bulk_create: comment moderation, imports, seeding) apply the deltas or
+# recount themselves; `manage.py recount` finds and repairs any drift.
+# Decrements stop at 0 so a drifted row cannot fail a delete.
+
+
+def comment_weight(approved, parent_id):
+    """What one comment adds to its post's (comment_count, reply_count)."""
+    if not approved:
+        return 0, 0
+    return 1, int(parent_id is not None)
+
+
+def add_comment_counts(post_id, comments, replies):
+    if comments or replies:
+        Post.objects.filter(pk=post_id).update(
+            comment_count=Greatest(F("comment_count") + comments, 0),
+            reply_count=Greatest(F("reply_count") + replies, 0),
+        )
+
+
+def move_comment(before, after):
+    """Count one comment going from ``before`` to ``after``, both (post_id, parent_id, approved)."""
+    old_post, old_parent, old_approved = before
+    new_post, new_parent, new_approved = after
+    old = comment_weight(old_approved, old_parent)
+    new = comment_weight(new_approved, new_parent)
+    if old_post == new_post:
+        add_comment_counts(new_post, new[0] - old[0], new[1] - old[1])
+    else:
+        add_comment_counts(old_post, -old[0], -old[1])
+        add_comment_counts(new_post, *new)
+
+
+def comment_deltas(comments):
+    """{post_id: (comments, replies)} the Comment queryset ``comments`` weighs once approved (one grouped query)."""
+    rows = comments.order_by().values("post_id").annotate(
+        total=Count("pk"), replies=Count("pk", filter=Q(parent__isnull=False))
+    )
+    return {row["post_id"]: (row["total"], row["replies"]) for row in rows}
+
+
+def add_published_posts(category_id, posts):
+    if posts:
+        Category.objects.filter(pk=category_id).update(
+            published_post_count=Greatest(F("published_post_count") + posts, 0)
+        )
+
+
+def move_post(before, after):
+    """Count one post going from ``before`` to ``after``, both (category_id, is_published)."""
+    old_category, old_published = before
+    new_category, new_published = after
+    if old_category == new_category:
+        add_published_posts(new_category, int(new_published) - int(old_published))
+    else:
+        add_published_posts(old_category, -int(old_published))
+        add_published_posts(new_category, int(new_published))
+
+
+# ----- recounting -----
+def post_counts():
+    """Exact comment_count/reply_count expressions for Post rows."""
+    approved = Comment.objects.filter(post=OuterRef("pk"), approved=True).order_by().values("post")
+    return {
+        "comment_count": Coalesce(Subquery(approved.annotate(n=Count("pk")).values("n")), 0),
+        "reply_count": Coalesce(Subquery(approved.filter(parent__isnull=False).annotate(n=Count("pk")).values("n")), 0),
+    }
+
+
+def category_counts():
+    """Exact published_post_count expression for Category rows."""
+    published = Post.objects.filter(category=OuterRef("pk"), is_published=True).order_by().values("category")
+    return {"published_post_count": Coalesce(Subquery(published.annotate(n=Count("pk")).values("n")), 0)}
+
+
+def drifted(queryset, counts):
+    """Ids of the rows of ``queryset`` whose stored counts differ from ``counts``."""
+    actual = {f"actual_{name}": expression for name, expression in counts.items()}
+    matching = {name: F(f"actual_{name}") for name in counts}
+    return list(queryset.alias(**actual).exclude(**matching).values_list("pk", flat=True))
+
+
+def recount_posts(posts):
+    """Recount the Post queryset ``posts`` in one UPDATE; returns the rows updated."""
+    return posts.update(**post_counts())
+
+
+def recount_categories(categories):
+    """Recount the Category queryset ``categories`` in one UPDATE; returns the rows updated."""
+    return categories.update(**category_counts())
+
+
+def post_count_drift(posts):
+    return drifted(posts, post_counts())
+
+
+def category_count_drift(categories):
+    return drifted(categories, category_counts())
@@ -0,0 +1,387 @@
+import csv
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, Comment, Post, PostTag, Subscriber, Tag
+from .page_cache import purge_tags
+from .related import rebuild as rebuild_related
+from .rendering import RENDERED_FIELDS
+from .search import get_search_backend
+from .syndication import sitemap_tags
+from .sidebar import invalidate_sidebar
+from .tags import count_tag_stats, sync_post_tags
+from .totals import recount_categories, recount_posts
+
+
+# ==================================================
+# BULK IMPORT / EXPORT (JSONL + CSV, constant memory)
+# ==================================================
+# Rows are streamed one chunk at a time: every lookup (categories, tags,
+# authors, posts by slug) is one IN query per chunk, every write is one
+# bulk_create / bulk_update per chunk, and each chunk commits on its own.
+# Relations travel as natural keys (slugs, usernames); comments keep their
+# ids so reply threads survive a round trip.
+DEFAULT_CHUNK_SIZE = 2000
+LIST_SEPARATOR = "|"  # tags in CSV cells
+
+POST_FIELDS = [
+    "slug", "title_en", "title_sw", "content_en", "content_sw",
+    "meta_description_en", "meta_description_sw", "category", "tags", "author",
+    "featured_image", "views", "is_published", "is_featured", "post_type",
+    "cta_text", "cta_link", "price", "instructions", "created",
+]
+COMMENT_FIELDS = ["id", "post", "parent", "user", "name", "email", "content", "likes", "approved", "created"]
+SUBSCRIBER_FIELDS = ["email", "language", "subscribed_at"]
+RELATIONS = {"category", "tags", "author", "post", "parent", "user", "created"}  # resolved separately
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+# ----- file formats -----
+@contextmanager
+def open_stream(path, mode):
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+    else:
+        with open(path, mode, encoding="utf-8", newline="") as fh:
+            yield fh
+
+
+def guess_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_rows(fh, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(fh)
+        return
+    for line in fh:
+        if line.strip():
+            yield json.loads(line)
+
+
+class RowWriter:
+    def __init__(self, fh, fmt, fields):
+        self.fh = fh
+        self.fmt = fmt
+        if fmt == "csv":
+            self.writer = csv.DictWriter(fh, fieldnames=fields)
+            self.writer.writeheader()
+
+    def write(self, row):
+        if self.fmt == "csv":
+            self.writer.writerow({
+                key: LIST_SEPARATOR.join(value) if isinstance(value, list) else ("" if value is None else value)
+                for key, value in row.items()
+            })
+        else:
+            self.fh.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+
+
+# ----- value conversion (CSV cells are all strings; JSON numbers are not) -----
+def to_python(model, name, value):
+    field = model._meta.get_field(name)
+    if value is None or (value == "" and not isinstance(field, (models.CharField, models.TextField))):
+        return None
+    if value == "" and field.null:
+        return None
+    if isinstance(field, models.BooleanField):
+        return value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "t", "y")
+    if isinstance(field, models.IntegerField):
+        return int(value)
+    if isinstance(field, models.DecimalField):
+        return Decimal(str(value))
+    if isinstance(field, models.DateTimeField):
+        moment = value if isinstance(value, datetime) else parse_datetime(value)
+        if moment is not None and timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, timezone.get_default_timezone())
+        return moment
+    return value
+
+
+def to_list(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    return [item for item in value.split(LIST_SEPARATOR) if item]
+
+
+def write_timestamps(model, name, stamps, key="pk"):
+    """
+    Set the ``auto_now_add`` field ``name`` to the file's values, given as
+    ``{key value: timestamp}``, in one UPDATE: bulk_create stamps every row
+    it inserts or upserts with "now".
+    """
+    if not stamps:
+        return
+    field = model._meta.get_field(name)
+    model.objects.filter(**{f"{key}__in": list(stamps)}).update(**{name: models.Case(
+        *(models.When(**{key: value}, then=models.Value(stamp, output_field=field)) for value, stamp in stamps.items()),
+        output_field=field,
+    )})
+
+
+def lookup_or_create(model, slugs, make):
+    """{slug: pk} for ``slugs``, creating the missing ones with ``make(slug)``."""
+    found = dict(model.objects.filter(slug__in=slugs).values_list("slug", "pk"))
+    missing = [slug for slug in slugs if slug not in found]
+    if missing:
+        model.objects.bulk_create([make(slug) for slug in missing], ignore_conflicts=True)
+        found.update(model.objects.filter(slug__in=missing).values_list("slug", "pk"))
+    return found
+
+
+def title_from_slug(slug):
+    return slug.replace("-", " ").replace("_", " ").title()
+
+
+# ----- import -----
+class Importer:
+    model = None
+    timestamp_field = None
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.skipped = 0
+
+    def run(self, rows):
+        for chunk in chunked(rows, self.chunk_size):
+            with transaction.atomic():
+                self.import_chunk(chunk)
+        self.finish()
+        return self.imported, self.skipped
+
+    def timestamp(self, row):
+        """The file's timestamp for ``row``, None when it has none (the row keeps "now")."""
+        return to_python(self.model, self.timestamp_field, row.get(self.timestamp_field))
+
+    def finish(self):
+        pass
+
+
+class PostImporter(Importer):
+    """Upserts on slug; categories and tags are created when they do not exist yet."""
+
+    model = Post
+    timestamp_field = "created"
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, rebuild_index=True):
+        super().__init__(chunk_size)
+        self.rebuild_index = rebuild_index
+        self.categories = {}  # slug -> pk; there are few categories, so this stays small
+
+    def import_chunk(self, rows):
+        # A slug twice in one INSERT ... ON CONFLICT is an error; the last row wins
+        by_slug = {row["slug"]: row for row in rows if row.get("slug") and row.get("category")}
+        self.skipped += len(rows) - len(by_slug)
+        rows = list(by_slug.values())
+        if not rows:
+            return
+
+        category_slugs = {row["category"] for row in rows} - self.categories.keys()
+        if category_slugs:
+            self.categories.update(lookup_or_create(
+                Category, list(category_slugs), lambda slug: Category(name_en=title_from_slug(slug), slug=slug)
+            ))
+        tag_slugs = {slug for row in rows for slug in to_list(row.get("tags"))}
+        tags = lookup_or_create(Tag, list(tag_slugs), lambda slug: Tag(name=title_from_slug(slug), slug=slug))
+        usernames = {row["author"] for row in rows if row.get("author")}
+        authors = dict(User.objects.filter(username__in=usernames).values_list("username", "pk"))
+
+        present = set().union(*(row.keys() for row in rows))
+        objs, rendered = [], []
+        for row in rows:
+            values = {name: to_python(Post, name, row[name]) for name in POST_FIELDS if name in row and name not in RELATIONS}
+            post = Post(
+                category_id=self.categories[row["category"]],
+                author_id=authors.get(row.get("author")),
+                **values,
+            )
+            # bulk_create skips save(), which renders the body columns
+            rendered = post.render_content(present & RENDERED_FIELDS.keys())
+            objs.append(post)
+
+        Post.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["slug"],
+            update_fields=[name for name in POST_FIELDS if name in present and name not in ("slug", "tags", "created")]
+            + rendered,
+        )
+        if any(obj.pk is None for obj in objs):  # backends that cannot return ids from an upsert
+            pks = dict(Post.objects.filter(slug__in=[obj.slug for obj in objs]).values_list("slug", "pk"))
+            for obj in objs:
+                obj.pk = pks[obj.slug]
+        write_timestamps(Post, "created", {
+            obj.pk: stamp for obj, row in zip(objs, rows) if (stamp := self.timestamp(row)) is not None
+        })
+
+        # Tags are replaced, not merged, as saving the post in the admin would
+        if "tags" in present:
+            through = Post.tags.through
+            through.objects.filter(post_id__in=[obj.pk for obj in objs]).delete()
+            through.objects.bulk_create([
+                through(post_id=obj.pk, tag_id=tags[slug])
+                for obj, row in zip(objs, rows)
+                for slug in dict.fromkeys(to_list(row.get("tags")))
+            ])
+        # Upserts can change created/is_published of posts whose tags stay
+        sync_post_tags(PostTag.objects.filter(post_id__in=[obj.pk for obj in objs]))
+        purge_tags(
+            *{f"post:{obj.pk}" for obj in objs},
+            *{f"category:{obj.category_id}" for obj in objs},
+            *sitemap_tags(*(obj.pk for obj in objs)),
+        )
+        self.imported += len(objs)
+
+    def finish(self):
+        # bulk_create skips the signals that keep these in step
+        if self.rebuild_index:
+            with transaction.atomic():
+                get_search_backend().rebuild()
+            rebuild_related()
+        count_tag_stats(Tag.objects.all())
+        recount_categories(Category.objects.all())
+        invalidate_sidebar()
+        purge_tags("listing", "sidebar")
+
+
+class CommentImporter(Importer):
+    """Upserts on id, so replies keep pointing at their parents; rows for unknown posts are skipped."""
+
+    model = Comment
+    timestamp_field = "created"
+    explicit_ids = False
+
+    def import_chunk(self, rows):
+        post_ids = dict(Post.objects.filter(slug__in={row.get("post") for row in rows}).values_list("slug", "pk"))
+        usernames = {row["user"] for row in rows if row.get("user")}
+        users = dict(User.objects.filter(username__in=usernames).values_list("username", "pk"))
+        parent_ids = {to_python(Comment, "id", row.get("parent")) for row in rows} - {None}
+        chunk_ids = {to_python(Comment, "id", row.get("id")) for row in rows if row.get("post") in post_ids}
+        known_parents = parent_ids & chunk_ids
+        known_parents |= set(Comment.objects.filter(pk__in=parent_ids - chunk_ids).values_list("pk", flat=True))
+
+        with_id, without_id, stamps = [], [], []
+        for row in rows:
+            if row.get("post") not in post_ids:
+                self.skipped += 1
+                continue
+            parent_id = to_python(Comment, "id", row.get("parent"))
+            obj = Comment(
+                post_id=post_ids[row["post"]],
+                parent_id=parent_id if parent_id in known_parents else None,
+                user_id=users.get(row.get("user")),
+                **{name: to_python(Comment, name, row[name]) for name in COMMENT_FIELDS if name in row and name not in RELATIONS},
+            )
+            (with_id if obj.pk is not None else without_id).append(obj)
+            stamps.append((obj, self.timestamp(row)))
+
+        # Upserts can move a comment to another post, which then counts one less
+        touched_posts = set(
+            Comment.objects.filter(pk__in=[obj.pk for obj in with_id]).values_list("post_id", flat=True)
+        )
+        if with_id:
+            Comment.objects.bulk_create(
+                with_id,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=[name for name in COMMENT_FIELDS if name not in ("id", "created")],
+            )
+            self.explicit_ids = True
+        if without_id:
+            Comment.objects.bulk_create(without_id)
+        objs = with_id + without_id
+        write_timestamps(Comment, "created", {obj.pk: stamp for obj, stamp in stamps if stamp is not None})
+        # bulk_create skips the signals that keep comment_count/reply_count in step
+        touched_posts |= {obj.post_id for obj in objs}
+        recount_posts(Post.objects.filter(pk__in=touched_posts))
+        purge_tags(*(f"post:{pk}" for pk in touched_posts))
+        self.imported += len(objs)
+
+    def finish(self):
+        # Explicit ids leave sequences behind the table on PostgreSQL
+        if self.explicit_ids:
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Comment]):
+                    cursor.execute(sql)
+
+
+class SubscriberImporter(Importer):
+    """Existing emails are left alone."""
+
+    model = Subscriber
+    timestamp_field = "subscribed_at"
+
+    def import_chunk(self, rows):
+        by_email = {row["email"].strip().lower(): row for row in rows if row.get("email")}
+        self.skipped += len(rows) - len(by_email)
+        existing = set(Subscriber.objects.filter(email__in=list(by_email)).values_list("email", flat=True))
+        new = {email: row for email, row in by_email.items() if email not in existing}
+        Subscriber.objects.bulk_create(
+            [Subscriber(email=email, language=row.get("language") or "en") for email, row in new.items()],
+            ignore_conflicts=True,
+        )
+        write_timestamps(Subscriber, "subscribed_at", {
+            email: stamp for email, row in new.items() if (stamp := self.timestamp(row)) is not None
+        }, key="email")
+        self.imported += len(new)
+        self.skipped += len(by_email) - len(new)
+
+
+# ----- export -----
+def export_posts(chunk_size=DEFAULT_CHUNK_SIZE):
+    plain = [name for name in POST_FIELDS if name not in ("category", "tags", "author")]
+    posts = (
+        Post.objects.order_by("pk")
+        .values("pk", *plain, category_slug=models.F("category__slug"), author_name=models.F("author__username"))
+    )
+    for chunk in chunked(posts.iterator(chunk_size=chunk_size), chunk_size):
+        # One query per chunk for the tags of all its posts
+        tags = {}
+        tag_rows = Post.tags.through.objects.filter(post_id__in=[post["pk"] for post in chunk]).order_by("tag__slug")
+        for post_id, slug in tag_rows.values_list("post_id", "tag__slug"):
+            tags.setdefault(post_id, []).append(slug)
+        for post in chunk:
+            row = {name: post[name] for name in plain}
+            row.update(category=post["category_slug"], tags=tags.get(post["pk"], []), author=post["author_name"])
+            yield {name: row[name] for name in POST_FIELDS}
+
+
+def export_comments(chunk_size=DEFAULT_CHUNK_SIZE):
+    comments = Comment.objects.order_by("pk").values_list(
+        "pk", "post__slug", "parent_id", "user__username", "name", "email", "content", "likes", "approved", "created"
+    )
+    for values in comments.iterator(chunk_size=chunk_size):
+        yield dict(zip(COMMENT_FIELDS, values))
+
+
+def export_subscribers(chunk_size=DEFAULT_CHUNK_SIZE):
+    for values in Subscriber.objects.order_by("pk").values_list(*SUBSCRIBER_FIELDS).iterator(chunk_size=chunk_size):
+        yield dict(zip(SUBSCRIBER_FIELDS, values))
+
+
+MODELS = {
+    # name: (fields, importer, exporter)
+    "posts": (POST_FIELDS, PostImporter, export_posts),
+    "comments": (COMMENT_FIELDS, CommentImporter, export_comments),
+    "subscribers": (SUBSCRIBER_FIELDS, SubscriberImporter, export_subscribers),
+}
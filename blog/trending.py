@@ -0,0 +1,215 @@
+import math
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Post, PostViewBucket
+
+
+# ==================================================
+# TRENDING POSTS (time-decayed view rankings)
+# ==================================================
+# Flushed view counts land in hourly and daily PostViewBucket rows (one
+# atomic upsert per post and period), which stay the source of truth.
+# Each window's ranking is refreshed incrementally from the same flushed
+# deltas: its cached scores are decayed from their timestamp to now (decay
+# is exponential, so that is one multiplication) and the new views added
+# with the weight of the current bucket. Only the top CANDIDATES scores are
+# kept, and the top TOP_SIZE ids go under their own key, so reading the
+# ranking is one small cache get. A full decay-weighted SUM over the
+# buckets runs only to seed a cold cache and from `recompute_trending`,
+# which also drops views that have since left the window.
+WINDOWS = getattr(settings, "BLOG_TRENDING_WINDOWS", {
+    # name: (bucket period, window length, score half-life)
+    "24h": (PostViewBucket.HOUR, timedelta(hours=24), timedelta(hours=6)),
+    "7d": (PostViewBucket.DAY, timedelta(days=7), timedelta(days=2)),
+})
+DEFAULT_WINDOW = "24h"
+TOP_SIZE = 50
+CANDIDATES = 4 * TOP_SIZE
+MIN_SCORE = 0.01
+TOP_KEY = "blog:trending:{window}:top"
+SCORES_KEY = "blog:trending:{window}:scores"
+LOCK_KEY = "blog:trending:lock"
+LOCK_TIMEOUT = 10  # seconds
+RETENTION = {PostViewBucket.HOUR: timedelta(days=3), PostViewBucket.DAY: timedelta(days=90)}
+PERIOD_STEP = {PostViewBucket.HOUR: timedelta(hours=1), PostViewBucket.DAY: timedelta(days=1)}
+
+
+def bucket_start(moment, period):
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if period == PostViewBucket.DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def decay(age_seconds, half_life):
+    return math.exp(-math.log(2) * age_seconds / half_life.total_seconds())
+
+
+# ----- recording -----
+def record_views(counts, now=None):
+    """Add ``{post_id: views}`` to the buckets; rebuild the rankings if they are due."""
+    if not counts:
+        return
+    now = now or timezone.now()
+    table = PostViewBucket._meta.db_table
+    rows = []
+    for period in (PostViewBucket.HOUR, PostViewBucket.DAY):
+        start = connection.ops.adapt_datetimefield_value(bucket_start(now, period))
+        rows.extend((period, start, n, pk) for pk, n in counts.items())
+    with connection.cursor() as cursor:
+        # INSERT ... SELECT skips posts deleted since the view was counted
+        cursor.executemany(
+            f"""
+            INSERT INTO {table} (post_id, period, start, views)
+            SELECT id, %s, %s, %s FROM {Post._meta.db_table} WHERE id = %s
+            ON CONFLICT (post_id, period, start)
+            DO UPDATE SET views = {table}.views + excluded.views
+            """,
+            rows,
+        )
+
+    apply_views(counts, now)
+
+
+# ----- incremental refresh -----
+# Deltas this process could not apply yet because another worker held the
+# lock; they go in with this process's next flush
+_unapplied = defaultdict(int)
+_unapplied_lock = threading.Lock()
+
+
+def apply_views(counts, now=None):
+    """Fold ``{post_id: views}`` into every window's cached scores."""
+    now = now or timezone.now()
+    with _unapplied_lock:
+        for pk, n in counts.items():
+            _unapplied[pk] += n
+        # One worker at a time rewrites the scores, so none are overwritten
+        if not cache.add(LOCK_KEY, True, timeout=LOCK_TIMEOUT):
+            return False
+        counts = dict(_unapplied)
+        _unapplied.clear()
+    try:
+        for window in WINDOWS:
+            state = cache.get(SCORES_KEY.format(window=window))
+            if state is None:
+                # Cold cache: the buckets already hold these views
+                store_scores(window, compute_scores(window, now), now)
+                continue
+            store_scores(window, advance(window, state, counts, now), now)
+    finally:
+        cache.delete(LOCK_KEY)
+    return True
+
+
+def advance(window, state, counts, now):
+    """Scores of ``state`` decayed to ``now`` plus ``counts`` in the current bucket."""
+    period, _, half_life = WINDOWS[window]
+    factor = decay(max((now - state["as_of"]).total_seconds(), 0), half_life)
+    weight = decay((now - bucket_start(now, period)).total_seconds(), half_life)
+    scores = {pk: score * factor for pk, score in state["scores"].items()}
+    for pk, n in counts.items():
+        scores[pk] = scores.get(pk, 0.0) + n * weight
+    top = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:CANDIDATES]
+    return [(pk, score) for pk, score in top if score >= MIN_SCORE]
+
+
+def store_scores(window, scores, now):
+    cache.set_many({
+        SCORES_KEY.format(window=window): {"as_of": now, "scores": dict(scores)},
+        TOP_KEY.format(window=window): [pk for pk, _ in scores[:TOP_SIZE]],
+    }, timeout=None)
+
+
+# ----- rebuilding -----
+def bucket_weights(window, now):
+    """{bucket start: decay factor} for every bucket inside ``window``."""
+    period, length, half_life = WINDOWS[window]
+    start, weights = bucket_start(now - length, period), {}
+    while start <= now:
+        weights[start] = decay((now - start).total_seconds(), half_life)
+        start += PERIOD_STEP[period]
+    return weights
+
+
+def compute_scores(window, now=None, limit=CANDIDATES):
+    """[(post id, decayed views)] of ``window``'s top ``limit`` posts, summed and sorted in the database."""
+    now = now or timezone.now()
+    period = WINDOWS[window][0]
+    weights = bucket_weights(window, now)
+    score = Sum(Case(
+        *(When(start=start, then=Cast("views", FloatField()) * weight) for start, weight in weights.items()),
+        default=Value(0.0),
+        output_field=FloatField(),
+    ))
+    return list(
+        PostViewBucket.objects.filter(period=period, start__gte=min(weights))
+        .values("post_id")
+        .annotate(score=score)
+        .filter(score__gte=MIN_SCORE)
+        .order_by("-score", "post_id")
+        .values_list("post_id", "score")[:limit]
+    )
+
+
+def recompute(windows=None, now=None):
+    """Full rebuild from the buckets (backfills, and dropping views that left the window)."""
+    now = now or timezone.now()
+    for window in windows or WINDOWS:
+        store_scores(window, compute_scores(window, now), now)
+
+
+def prune(now=None):
+    now = now or timezone.now()
+    deleted = 0
+    for period, keep in RETENTION.items():
+        deleted += PostViewBucket.objects.filter(period=period, start__lt=now - keep).delete()[0]
+    return deleted
+
+
+def rollup_days(since):
+    """Rebuild daily buckets from the hourly ones (e.g. after importing hourly data)."""
+    hourly = (
+        PostViewBucket.objects.filter(period=PostViewBucket.HOUR, start__gte=since)
+        .values_list("post_id", "start", "views")
+    )
+    days = defaultdict(int)
+    for post_id, start, views in hourly.iterator(chunk_size=5000):
+        days[(post_id, bucket_start(start, PostViewBucket.DAY))] += views
+    PostViewBucket.objects.bulk_create(
+        [PostViewBucket(post_id=post_id, period=PostViewBucket.DAY, start=start, views=views)
+         for (post_id, start), views in days.items()],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["post", "period", "start"],
+        update_fields=["views"],
+    )
+    return len(days)
+
+
+# ----- reading -----
+def trending_post_ids(window=DEFAULT_WINDOW, limit=5):
+    top = cache.get(TOP_KEY.format(window=window))
+    if top is None:
+        recompute([window])
+        top = cache.get(TOP_KEY.format(window=window), [])
+    return top[:limit]
+
+
+def trending_posts(queryset, window=DEFAULT_WINDOW, limit=5):
+    """Top ``limit`` posts of ``queryset`` by decayed views, topped up by lifetime views."""
+    ids = trending_post_ids(window, TOP_SIZE)
+    found = queryset.in_bulk(ids)
+    posts = [found[pk] for pk in ids if pk in found][:limit]
+    if len(posts) < limit:
+        posts += list(queryset.exclude(pk__in=[post.pk for post in posts]).order_by("-views")[:limit - len(posts)])
+    return posts
@@ -4,7 +4,9 @@ from . import views
 urlpatterns = [
     path("", views.post_list, name="home"),
     path("post/<slug:slug>/", views.post_detail, name="post_detail"),
+    path("post/<slug:slug>/comments/", views.post_comments, name="post_comments"),
     path("category/<slug:slug>/", views.category_posts, name="category_posts"),
+    path("tag/<slug:slug>/", views.tag_posts, name="tag_posts"),
     path("search/", views.search, name="search"),
     path("register/", views.register, name="register"),
     path("login/", views.user_login, name="login"),
@@ -14,4 +16,11 @@ urlpatterns = [
     path("about/", views.about, name="about"),
     path("contact/", views.contact, name="contact"),
     path("set-language/", views.set_language, name="set_language"),
+    path("sitemap.xml", views.sitemap_index, name="sitemap"),
+    path("sitemap-pages.xml", views.sitemap_pages, name="sitemap_pages"),
+    path("sitemap-<int:chunk>.xml", views.sitemap_posts, name="sitemap_posts"),
+    path("feed/", views.post_feed, name="feed"),
+    path("feed/atom/", views.post_feed, {"kind": "atom"}, name="feed_atom"),
+    path("category/<slug:slug>/feed/", views.category_feed, name="category_feed"),
+    path("category/<slug:slug>/feed/atom/", views.category_feed, {"kind": "atom"}, name="category_feed_atom"),
 ]
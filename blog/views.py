@@ -1,7 +1,8 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
 from django.contrib import messages
-from django.db.models import Q, Count, F
+from django.db import router
+from django.db.models import Max, Q, Sum
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.utils.translation import gettext as _
@@ -9,8 +10,20 @@ from django.views.decorators.http import require_POST
 from django.conf import settings
 from django.http import HttpResponseRedirect
 from django.urls import translate_url
-
-from .models import Post, Category, Subscriber, Comment
+from django.utils.http import urlencode
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+from .models import Post, Category, Subscriber, Comment, Tag
+from .counters import comment_likes, post_views
+from .search import get_search_backend
+from .comments import load_comment_threads, paginate_threads
+from .pagination import cursor_paginate
+from .ratelimit import first_like, rate_limit
+from .related import related_posts
+from .tags import tag_archive
+from .page_cache import cache_anonymous_page, tag_page
+from .conditional import PageValidators, conditional_page, tag_parts
+from .syndication import SITEMAP_CONTENT_TYPE, cached_document, feed, index_sitemap, pages_sitemap, posts_sitemap
 
 
 # ==================================================
@@ -21,49 +34,75 @@ def get_lang(request):
 
 
 # ==================================================
-# SIDEBAR CONTEXT (Categories + Popular Posts)
+# CONDITIONAL GET VALIDATORS (run before the views)
 # ==================================================
-def get_sidebar_context():
-    categories = []
-    for category in Category.objects.annotate(post_count=Count("posts")):
-        first_post = category.posts.filter(is_published=True).order_by("created").first()
-        if first_post:
-            categories.append({
-                "category": category,
-                "first_post": first_post,
-                "count": category.posts.filter(is_published=True).count()
-            })
-    popular_posts = Post.objects.filter(is_published=True).order_by("-views")[:5]
-    return {"categories": categories, "popular_posts": popular_posts}
+def listing_validators(request, slug=None):
+    # Listings only change through Post/Category saves, which purge these tags
+    return PageValidators(tag_parts("listing", "sidebar"))
+
+
+def post_validators(request, slug):
+    approved = Q(comments__approved=True)
+    row = (
+        Post.objects.filter(slug=slug, is_published=True)
+        .annotate(
+            last_comment=Max("comments__created", filter=approved),
+            comment_likes=Sum("comments__likes", filter=approved),
+        )
+        .values("pk", "updated", "comment_count", "last_comment", "comment_likes")
+        .first()
+    )
+    if row is None:
+        return None
+    last_modified = max(filter(None, [row["updated"], row["last_comment"]]))
+    parts = [row["updated"], row["last_comment"], row["comment_count"], row["comment_likes"]]
+    # "post:N" is also purged when the related posts of N change
+    return PageValidators(parts + tag_parts("sidebar", "related", f"post:{row['pk']}"), last_modified, row["pk"])
+
+
+def count_not_modified_view(request, validated, slug):
+    # A 304 skips the view, but the visit still counts
+    post_views.hit(validated.obj)
 
 
 # ==================================================
 # HOME PAGE — POST LIST
 # ==================================================
+@conditional_page(listing_validators)
+@cache_anonymous_page(tags=("listing", "sidebar"))
 def post_list(request):
     lang = get_lang(request)
-    posts = Post.objects.filter(is_published=True).select_related("category", "author").order_by('-created')
-    paginator = Paginator(posts, 5)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    posts = Post.objects.for_language(lang).listing().with_tags().filter(is_published=True).order_by('-created')
+    page_obj = cursor_paginate(request, posts, 5)
 
     context = {"posts": page_obj, "lang": lang}
-    context.update(get_sidebar_context())
     return render(request, "post_list.html", context)
 
 
 # ==================================================
 # POST DETAIL — COMMENTS + REPLIES + CTA
 # ==================================================
+def count_cached_view(request, tags, slug):
+    # A page-cache hit skips the view, but the visit still counts
+    for tag in tags:
+        if tag.startswith("post:"):
+            post_views.hit(int(tag.split(":", 1)[1]))
+
+
+@rate_limit("comment")
+@conditional_page(post_validators, on_not_modified=count_not_modified_view)
+@cache_anonymous_page(tags=("sidebar", "related"), on_hit=count_cached_view)
 def post_detail(request, slug):
     lang = get_lang(request)
     post = get_object_or_404(Post, slug=slug, is_published=True)
+    tag_page(request, f"post:{post.pk}", f"category:{post.category_id}")
 
-    # Increment views
-    post.views += 1
-    post.save(update_fields=["views"])
+    # Count the view; buffered and written back in batches by blog.counters
+    post_views.hit(post.pk)
+    post.views += post_views.pending(post.pk)
 
-    # Parent comments only
-    comments = post.comments.filter(parent__isnull=True, approved=True).order_by("-created")
+    # Approved comments + replies in one query, first page of threads shown
+    threads = load_comment_threads(post)
 
     # Handle comment submission
     if request.method == "POST":
@@ -109,55 +148,120 @@ def post_detail(request, slug):
 
     context = {
         "post": post,
-        "comments": comments,
+        "related_posts": related_posts(post, lang),
+        "threads": paginate_threads(threads, 1),
         "lang": lang,
         "cta_text": post.get_cta_text_display() if post.cta_text else None,
         "cta_link": post.cta_link,
         "price": post.price,
         "instructions": post.instructions
     }
-    context.update(get_sidebar_context())
     return render(request, "post_detail.html", context)
 
 
+# ==================================================
+# MORE COMMENT THREADS ("load more" on post detail)
+# ==================================================
+def post_comments(request, slug):
+    post = get_object_or_404(Post, slug=slug, is_published=True)
+    threads = paginate_threads(load_comment_threads(post), request.GET.get("page"))
+    return render(request, "includes/comment_threads.html", {"post": post, "threads": threads})
+
+
 # ==================================================
 # CATEGORY POSTS
 # ==================================================
+@conditional_page(listing_validators)
+@cache_anonymous_page(tags=("sidebar",))
 def category_posts(request, slug):
     lang = get_lang(request)
     category = get_object_or_404(Category, slug=slug)
-    posts = category.posts.filter(is_published=True).order_by('-created')
-    paginator = Paginator(posts, 5)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    tag_page(request, f"category:{category.pk}")
+    posts = category.posts.for_language(lang).listing().with_tags().filter(is_published=True).order_by('-created')
+    page_obj = cursor_paginate(request, posts, 5)
 
     context = {"category": category, "posts": page_obj, "lang": lang}
-    context.update(get_sidebar_context())
     return render(request, "category_posts.html", context)
 
 
+# ==================================================
+# TAG ARCHIVE
+# ==================================================
+@conditional_page(listing_validators)
+@cache_anonymous_page(tags=("listing", "sidebar"))
+def tag_posts(request, slug):
+    lang = get_lang(request)
+    tag = get_object_or_404(Tag, slug=slug)
+    # Pages through the (tag, post_created) index of the m2m table, see blog/tags.py
+    page_obj = cursor_paginate(request, tag_archive(tag, lang), 5, ordering=("-post_created", "-post_id"))
+
+    context = {"tag": tag, "links": page_obj, "lang": lang}
+    return render(request, "tag_posts.html", context)
+
+
 # ==================================================
 # SEARCH (BILINGUAL)
 # ==================================================
 def search(request):
     lang = get_lang(request)
     query = request.GET.get("q", "").strip()
-    results = Post.objects.filter(is_published=True)
     if query:
-        results = results.filter(
-            Q(title_en__icontains=query) |
-            Q(title_sw__icontains=query) |
-            Q(content_en__icontains=query) |
-            Q(content_sw__icontains=query)
-        )
-    results = results.order_by('-created')
-    paginator = Paginator(results, 5)
-    page_obj = paginator.get_page(request.GET.get("page"))
+        # Ranked ids from the full-text index (a bounded in-memory list, so
+        # ?page= costs no COUNT); only the current page is loaded. The raw
+        # index query goes wherever the router sends this request's reads
+        backend = get_search_backend(router.db_for_read(Post))
+        paginator = Paginator(backend.search(query), 5)
+        page_obj = paginator.get_page(request.GET.get("page"))
+        posts = Post.objects.for_language(lang).listing().with_tags().in_bulk(page_obj.object_list)
+        page_obj.object_list = [posts[pk] for pk in page_obj.object_list if pk in posts]
+    else:
+        results = Post.objects.for_language(lang).listing().with_tags().filter(is_published=True)
+        page_obj = cursor_paginate(request, results, 5)
 
-    context = {"results": page_obj, "query": query, "lang": lang}
-    context.update(get_sidebar_context())
+    context = {
+        "results": page_obj,
+        "query": query,
+        "query_prefix": urlencode({"q": query}) + "&" if query else "",
+        "lang": lang,
+    }
     return render(request, "search_results.html", context)
 
 
+# ==================================================
+# SITEMAPS + RSS/ATOM FEEDS (see blog/syndication.py)
+# ==================================================
+FEED_CLASSES = {"rss": Rss201rev2Feed, "atom": Atom1Feed}
+
+
+def sitemap_index(request):
+    return cached_document(request, "sitemap", ("sitemap",), SITEMAP_CONTENT_TYPE, index_sitemap)
+
+
+def sitemap_pages(request):
+    # Category links change with Category saves, which purge "sidebar"
+    return cached_document(request, "sitemap:pages", ("sidebar",), SITEMAP_CONTENT_TYPE, pages_sitemap)
+
+
+def sitemap_posts(request, chunk):
+    return cached_document(
+        request, f"sitemap:{chunk}", (f"sitemap:{chunk}",), SITEMAP_CONTENT_TYPE, posts_sitemap, chunk
+    )
+
+
+def post_feed(request, kind="rss"):
+    feed_class = FEED_CLASSES[kind]
+    return cached_document(request, f"feed:{kind}", ("listing",), feed_class.content_type, feed, feed_class)
+
+
+def category_feed(request, slug, kind="rss"):
+    category = get_object_or_404(Category, slug=slug)
+    feed_class = FEED_CLASSES[kind]
+    return cached_document(
+        request, f"feed:{kind}:{category.pk}", (f"category:{category.pk}",), feed_class.content_type,
+        feed, feed_class, category,
+    )
+
+
 # ==================================================
 # REGISTER USER
 # ==================================================
@@ -232,21 +336,27 @@ def user_logout(request):
 # ==================================================
 # LIKE COMMENT
 # ==================================================
+@require_POST
+@rate_limit("like")
 def like_comment(request, comment_id):
-    Comment.objects.filter(id=comment_id).update(likes=F("likes") + 1)
+    # Repeat likes from one session are dropped; the rest are written back
+    # in batches by blog.counters, like post views
+    if first_like(request, comment_id):
+        comment_likes.hit(comment_id)
     return redirect(request.META.get("HTTP_REFERER", "/"))
 
 
 # ==================================================
 # SUBSCRIBE
 # ==================================================
+@rate_limit("subscribe")
 def subscribe(request):
     if request.method == "POST":
         email = request.POST.get("email")
         if Subscriber.objects.filter(email=email).exists():
             messages.warning(request, _("Already subscribed"))
         else:
-            Subscriber.objects.create(email=email)
+            Subscriber.objects.create(email=email, language=get_lang(request))
             messages.success(request, _("Subscribed successfully"))
     return redirect(request.META.get("HTTP_REFERER", "/"))
 
@@ -254,17 +364,16 @@ def subscribe(request):
 # ==================================================
 # STATIC PAGES
 # ==================================================
+@cache_anonymous_page(tags=("sidebar",))
 def about(request):
     lang = get_lang(request)
     context = {"lang": lang}
-    context.update(get_sidebar_context())
     return render(request, "about.html", context)
 
 
 def contact(request):
     lang = get_lang(request)
     context = {"lang": lang}
-    context.update(get_sidebar_context())
     if request.method == "POST":
         messages.success(request, _("Message sent"))
     return render(request, "contact.html", context)
@@ -11,6 +11,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 import os
+import sys
 import dj_database_url
 from pathlib import Path
 
@@ -27,6 +28,9 @@ SECRET_KEY = 'django-insecure-nyv$x98+j)a_)*(pwl&_ge!u_&nn@hn13sr@&+=o1-)3mx%riy
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# `manage.py test`: see STORAGES
+TESTING = sys.argv[1:2] == ["test"]
+
 ALLOWED_HOSTS = ['philtech-blog.onrender.com']
 
 
@@ -47,6 +51,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'blog.profiling.RequestProfilingMiddleware',
+    'blog.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
 
     # Language middleware MUST be after SessionMiddleware
@@ -74,8 +80,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
 
-                # Add this
-                'blog.context_processors.categories_processor',
+                # Sidebar categories + popular posts (lazy)
+                'blog.context_processors.sidebar_processor',
             ],
         },
     },
@@ -93,6 +99,18 @@ DATABASES = {
     )
 }
 
+# Read replicas: comma-separated URLs in DATABASE_REPLICA_URLS become
+# "replica_1", "replica_2", ... and serve blog reads (blog/routers.py).
+# Tests run them as mirrors of the test primary.
+BLOG_DATABASE_REPLICAS = []
+for number, url in enumerate(filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(",")), start=1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = dj_database_url.parse(url.strip())
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    BLOG_DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["blog.routers.PrimaryReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -155,8 +173,125 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Hashed names (served with far-future cache headers) plus .gz/.br copies
+# of every static file (brotli needs the Brotli package). Outside DEBUG
+# {% static %} needs the manifest, so every deploy runs
+# `manage.py build_assets` and collectstatic. Tests render pages without
+# collecting, so they keep plain names.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+if TESTING:
+    STORAGES["staticfiles"] = {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
+
 # For images
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 
+
+# ===============================
+# BLOG PERFORMANCE
+# ===============================
+
+# Sidebar snapshots, the anonymous page cache and its purge tags live in
+# the default cache. Set REDIS_URL (needs the `redis` package) so all
+# workers share one cache; the local-memory default is per process.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+
+BLOG_PAGE_CACHE_TIMEOUT = 600  # seconds; purged early by tag on Post/Comment/Category changes
+
+# Post view counts are buffered and flushed as batched UPDATEs.
+# "memory" buffers per process; "cache" shares the buffer through CACHES
+# so `manage.py flush_counters` can drain it from any process.
+BLOG_COUNTER_BACKEND = os.environ.get("BLOG_COUNTER_BACKEND", "memory")
+BLOG_COUNTER_FLUSH_INTERVAL = int(os.environ.get("BLOG_COUNTER_FLUSH_INTERVAL", 10))  # seconds, 0 = write-through
+# Flushes the counters before the test databases are dropped
+TEST_RUNNER = "blog.test_runner.BlogTestRunner"
+
+# Budgets enforced by `manage.py benchmark_views` (per URL name, "*" = every
+# view). Query counts are the stable signal; timings depend on the machine.
+BLOG_BENCHMARK_BUDGETS = {
+    "*": {"queries": 15, "p95_ms": 1000, "peak_kb": 16384},
+    "home": {"queries": 10},
+    "category_posts": {"queries": 10},
+}
+
+# Request profiling (blog.profiling): a sampled share of requests records
+# SQL time, duplicate queries and template time. Requests slower than
+# BLOG_PROFILING_SLOW_MS are logged as JSON; summarise them with
+# `manage.py summarize_slow_requests <logfile>`. The Server-Timing header
+# goes to staff (and everyone when DEBUG is on).
+BLOG_PROFILING_SAMPLE_RATE = float(os.environ.get("BLOG_PROFILING_SAMPLE_RATE", 0.05))
+BLOG_PROFILING_SLOW_MS = int(os.environ.get("BLOG_PROFILING_SLOW_MS", 500))
+BLOG_PROFILING_SERVER_TIMING = DEBUG
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "blog": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+# Newsletter (`manage.py send_newsletter`). Point EMAIL_* at the SMTP
+# relay; every worker keeps one SMTP connection open for the whole run.
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", 25))
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "") == "1"
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "Phil Tech Blog <no-reply@philtech-blog.onrender.com>")
+
+BLOG_SITE_URL = os.environ.get("BLOG_SITE_URL", "https://philtech-blog.onrender.com")  # absolute links in emails, sitemaps, feeds
+BLOG_NEWSLETTER_WORKERS = 4
+BLOG_NEWSLETTER_BATCH_SIZE = 100
+
+# Sitemaps (/<lang>/sitemap.xml) and RSS/Atom feeds (/<lang>/feed/, per
+# category under /<lang>/category/<slug>/feed/). Post sitemaps hold one
+# id range each and are rebuilt only when a post in that range changes.
+BLOG_SITEMAP_CHUNK_SIZE = 50000  # URLs per sitemap file (the protocol's maximum)
+BLOG_FEED_ITEMS = 20
+BLOG_SYNDICATION_CACHE_TIMEOUT = 60 * 60 * 24  # seconds; purged early by tag like the page cache
+
+# Related posts on post_detail: top-K neighbours by shared tags (idf-weighted
+# cosine), category and title words, kept up to date on save/tag changes.
+# Run `manage.py rebuild_related_posts` nightly to clear incremental drift.
+BLOG_RELATED_POSTS = 5
+BLOG_RELATED_TITLE_WEIGHT = 0.2  # 0 disables title-word overlap
+BLOG_RELATED_MAX_TAG_POSTS = 5000  # tags on more posts than this are ignored
+
+# Tags shown in the sidebar tag cloud (largest per language)
+BLOG_TAG_CLOUD_SIZE = 30
+
+# Admin changelists: filtered lists count at most this many rows; unfiltered
+# ones use the PostgreSQL planner estimate above it (blog/pagination.py)
+BLOG_ADMIN_EXACT_COUNT_LIMIT = 10000
+
+# Write endpoints: (requests, seconds) token buckets per client IP and per
+# session cookie; over budget answers 429 (blog/ratelimit.py)
+BLOG_RATE_LIMITS = {"comment": (5, 60), "like": (30, 60), "subscribe": (3, 600)}
+BLOG_CLIENT_IP_HEADER = None  # e.g. "HTTP_X_FORWARDED_FOR" behind a trusted proxy
+BLOG_LIKE_DEDUP_TIMEOUT = 60 * 60 * 24  # one like per comment per session a day
+
+# Read replicas (blog/routers.py): a visitor who wrote reads from the primary
+# for BLOG_REPLICA_STICKY_SECONDS; replicas are probed every
+# BLOG_REPLICA_CHECK_INTERVAL seconds and skipped when more than
+# BLOG_REPLICA_MAX_LAG seconds behind. Keep the sticky window above the lag.
+BLOG_REPLICA_STICKY_SECONDS = 15
+BLOG_REPLICA_CHECK_INTERVAL = 10
+BLOG_REPLICA_MAX_LAG = 5